@@ -0,0 +1,32 @@
+"""add message truncated flag
+
+Revision ID: 1d5e7a9c2b40
+Revises: f8b841b9477a
+Create Date: 2026-10-17 10:12:31.402113
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1d5e7a9c2b40"
+down_revision: str | None = "f8b841b9477a"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "message",
+        sa.Column("truncated", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("message", "truncated")
@@ -0,0 +1,38 @@
+"""store document paths as storage keys
+
+Revision ID: 3c6e1f8a4b27
+Revises: 9e4a7d2c6f18
+Create Date: 2026-10-17 13:02:44.207361
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c6e1f8a4b27"
+down_revision: str | None = "9e4a7d2c6f18"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# UPLOAD_FOLDER padrão: caminhos gravados até aqui eram relativos ao diretório da aplicação
+UPLOAD_PREFIX = "uploads/"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in (("document", "file_path"), ("documentblob", "storage_path")):
+        op.execute(
+            f"UPDATE {table} SET {column} = substr({column}, {len(UPLOAD_PREFIX) + 1}) "
+            f"WHERE {column} LIKE '{UPLOAD_PREFIX}%'"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in (("document", "file_path"), ("documentblob", "storage_path")):
+        op.execute(
+            f"UPDATE {table} SET {column} = '{UPLOAD_PREFIX}' || {column} "
+            f"WHERE {column} NOT LIKE '/%'"
+        )
@@ -0,0 +1,46 @@
+"""unique extracted data per document field and method
+
+Revision ID: 4f7b2e9d1a63
+Revises: e2d94b0a7c31
+Create Date: 2026-10-17 15:04:51.660382
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4f7b2e9d1a63"
+down_revision: str | None = "e2d94b0a7c31"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Duplicatas de execuções anteriores do OCR: fica a linha mais recente
+    op.execute(
+        """
+        DELETE FROM documentextracteddata d
+        USING documentextracteddata newer
+        WHERE d.document_id = newer.document_id
+          AND d.field_name = newer.field_name
+          AND d.extraction_method = newer.extraction_method
+          AND (d.created_at, d.id) < (newer.created_at, newer.id)
+        """
+    )
+    op.create_unique_constraint(
+        "uq_documentextracteddata_document_field_method",
+        "documentextracteddata",
+        ["document_id", "field_name", "extraction_method"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        "uq_documentextracteddata_document_field_method",
+        "documentextracteddata",
+        type_="unique",
+    )
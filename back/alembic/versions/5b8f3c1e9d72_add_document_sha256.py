@@ -0,0 +1,31 @@
+"""add document sha256
+
+Revision ID: 5b8f3c1e9d72
+Revises: 1d5e7a9c2b40
+Create Date: 2026-10-17 11:03:47.118265
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8f3c1e9d72"
+down_revision: str | None = "1d5e7a9c2b40"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("document", sa.Column("sha256", sa.String(), nullable=True))
+    op.create_index(op.f("ix_document_sha256"), "document", ["sha256"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_document_sha256"), table_name="document")
+    op.drop_column("document", "sha256")
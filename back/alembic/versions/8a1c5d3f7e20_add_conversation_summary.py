@@ -0,0 +1,66 @@
+"""add conversation summary
+
+Revision ID: 8a1c5d3f7e20
+Revises: 4f7b2e9d1a63
+Create Date: 2026-10-17 16:02:18.904127
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8a1c5d3f7e20"
+down_revision: str | None = "4f7b2e9d1a63"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "conversationsummary",
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("conversation_id", sa.Uuid(), nullable=False),
+        sa.Column("content", sa.String(), nullable=False),
+        sa.Column("covers_until", sa.DateTime(), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["conversation_id"], ["conversation.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Janela da memória: resumo mais recente e últimas mensagens de uma conversa
+    op.create_index(
+        "ix_conversationsummary_conversation_id_covers_until",
+        "conversationsummary",
+        ["conversation_id", "covers_until"],
+    )
+    # `message` já tem dados: CONCURRENTLY não bloqueia escritas, mas não roda dentro de
+    # transação. Se o build falhar, o índice fica INVALID: remova-o antes de rodar de novo.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_message_conversation_id_created_at",
+            "message",
+            ["conversation_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_message_conversation_id_created_at",
+            table_name="message",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_index(
+        "ix_conversationsummary_conversation_id_covers_until", table_name="conversationsummary"
+    )
+    op.drop_table("conversationsummary")
@@ -0,0 +1,52 @@
+"""add content-addressed document blobs
+
+Revision ID: 9e4a7d2c6f18
+Revises: 5b8f3c1e9d72
+Create Date: 2026-10-17 12:20:05.512904
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e4a7d2c6f18"
+down_revision: str | None = "5b8f3c1e9d72"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "documentblob",
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("sha256", sa.String(), nullable=False),
+        sa.Column("storage_path", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    # Documentos já enviados com hash viram referências ao arquivo que já têm no disco
+    op.execute(
+        """
+        INSERT INTO documentblob (created_at, updated_at, sha256, storage_path, size, ref_count)
+        SELECT now(), now(), sha256, min(file_path), min(file_size), count(*)
+        FROM document
+        WHERE sha256 IS NOT NULL
+        GROUP BY sha256
+        """
+    )
+    op.create_foreign_key(
+        "document_sha256_fkey", "document", "documentblob", ["sha256"], ["sha256"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("document_sha256_fkey", "document", type_="foreignkey")
+    op.drop_table("documentblob")
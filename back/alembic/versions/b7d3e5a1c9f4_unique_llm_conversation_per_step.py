@@ -0,0 +1,66 @@
+"""unique llm conversation per step
+
+Revision ID: b7d3e5a1c9f4
+Revises: 8a1c5d3f7e20
+Create Date: 2026-10-17 18:41:07.215390
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d3e5a1c9f4"
+down_revision: str | None = "8a1c5d3f7e20"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Junta conversas LLM duplicadas (mesmo usuário e step) na mais antiga antes de criar o
+    # índice único. Os resumos do grupo são descartados: o histórico mudou e eles são
+    # refeitos a partir das mensagens.
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE conversation_merge ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, first_value(id) OVER (
+                PARTITION BY user_id, onboarding_step_id ORDER BY created_at, id
+            ) AS keep_id
+            FROM conversation
+            WHERE is_llm AND onboarding_step_id IS NOT NULL
+        ) ranked
+        WHERE id <> keep_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE message SET conversation_id = conversation_merge.keep_id
+        FROM conversation_merge WHERE message.conversation_id = conversation_merge.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM conversationsummary WHERE conversation_id IN (
+            SELECT id FROM conversation_merge UNION SELECT keep_id FROM conversation_merge
+        )
+        """
+    )
+    op.execute("DELETE FROM conversation WHERE id IN (SELECT id FROM conversation_merge)")
+
+    op.create_index(
+        "uq_conversation_llm_user_step",
+        "conversation",
+        ["user_id", "onboarding_step_id"],
+        unique=True,
+        postgresql_where=sa.text("is_llm"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_conversation_llm_user_step", table_name="conversation")
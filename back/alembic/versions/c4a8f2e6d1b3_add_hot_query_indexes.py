@@ -0,0 +1,49 @@
+"""add hot query indexes
+
+Revision ID: c4a8f2e6d1b3
+Revises: b7d3e5a1c9f4
+Create Date: 2026-10-17 20:12:44.530861
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4a8f2e6d1b3"
+down_revision: str | None = "b7d3e5a1c9f4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (nome, tabela, colunas). Busca de conversa LLM e histórico de mensagens já são cobertos por
+# uq_conversation_llm_user_step e ix_message_conversation_id_created_at.
+INDEXES = [
+    ("ix_document_status", "document", ["status"]),
+    ("ix_document_user_step_id", "document", ["user_step_id"]),
+    ("ix_documentreview_document_id", "documentreview", ["document_id"]),
+    ("ix_documentrequirement_step_id_doc_type", "documentrequirement", ["step_id", "doc_type"]),
+    (
+        "ix_useronboardingstep_user_flow_id_step_id",
+        "useronboardingstep",
+        ["user_flow_id", "step_id"],
+    ),
+    ("ix_useronboardingflow_user_id", "useronboardingflow", ["user_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY não bloqueia escritas nas tabelas, mas não roda dentro de transação.
+    # Se um build falhar, o índice fica INVALID: remova-o antes de rodar de novo (IF NOT
+    # EXISTS pula os que já foram criados).
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,44 @@
+"""add ocr cache entry
+
+Revision ID: e2d94b0a7c31
+Revises: 3c6e1f8a4b27
+Create Date: 2026-10-17 14:11:26.830514
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2d94b0a7c31"
+down_revision: str | None = "3c6e1f8a4b27"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ocrcacheentry",
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("cache_key", sa.String(), nullable=False),
+        sa.Column("sha256", sa.String(), nullable=False),
+        sa.Column("engine_id", sa.String(), nullable=False),
+        sa.Column("engine_version", sa.String(), nullable=False),
+        sa.Column("params_hash", sa.String(), nullable=False),
+        sa.Column("pages", sa.JSON(), nullable=False),
+        sa.Column("hit_count", sa.Integer(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+    op.create_index(op.f("ix_ocrcacheentry_sha256"), "ocrcacheentry", ["sha256"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_ocrcacheentry_sha256"), table_name="ocrcacheentry")
+    op.drop_table("ocrcacheentry")
@@ -1,11 +1,21 @@
+import math
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session, select
+from sqlalchemy.orm import aliased, contains_eager
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from core.database import get_session
+from core.database import get_async_session
+from core.principal_cache import principal_cache
+from core.rate_limit import rate_limiter
 from core.security import verify_token
+from core.tracing import tracer
+from models.conversation import Conversation
 from models.onboarding import (
     OnboardingStep,
     OnboardingStepType,
@@ -17,10 +27,16 @@ from models.user import User
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
 
 
-def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], session: Annotated[Session, Depends(get_session)]
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> User:
-    """Obtém o usuário atual a partir do token JWT"""
+    """
+    Obtém o usuário atual a partir do token JWT.
+
+    O usuário vem do principal_cache quando possível; nesse caso é uma instância
+    desanexada da sessão (use para id/flags, não para relacionamentos).
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas",
@@ -31,11 +47,13 @@ def get_current_user(
     if not user_id:
         raise credentials_exception
 
-    statement = select(User).where(User.id == user_id)
-    user = session.exec(statement).first()
-    if user is None:
-        raise credentials_exception
+    async def fetch() -> User | None:
+        return (await session.exec(select(User).where(User.id == user_id))).first()
 
+    user = await principal_cache.load(user_id, fetch)
+    # Um usuário desativado perde o acesso já com o token emitido
+    if user is None or not user.is_active:
+        raise credentials_exception
     return user
 
 
@@ -49,107 +67,108 @@ def get_current_consultant(current_user: Annotated[User, Depends(get_current_use
     return current_user
 
 
-async def get_user_step_for_llm_chat(
+@dataclass
+class LLMChatContext:
+    """Step validado do chat LLM e a conversa do usuário nele (None se ainda não existe)"""
+
+    user_step: UserOnboardingStep
+    conversation_id: uuid.UUID | None
+
+
+async def get_llm_chat_context(
     step_id: int,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     current_user: Annotated[User, Depends(get_current_user)],
-) -> UserOnboardingStep:
+) -> LLMChatContext:
     """
-    Valida e retorna o UserOnboardingStep para chat LLM.
-
-    Verifica:
-    - Se o step existe e pertence ao usuário
-    - Se o step é do tipo LLM_CHAT
-    - Se o usuário tem permissão para acessar
+    Valida o acesso ao step do chat LLM em uma única query: step do usuário, flow, definição
+    do step, primeiro step obrigatório anterior ainda pendente e id da conversa LLM vêm juntos
+    (subqueries correlacionadas).
     """
 
-    # Busca o UserOnboardingStep
+    previous_user_step = aliased(UserOnboardingStep)
+    previous_step = aliased(OnboardingStep)
+    pending_prerequisite = (
+        select(previous_step.name)
+        .select_from(previous_user_step)
+        .join(previous_step, previous_user_step.step_id == previous_step.id)  # type: ignore
+        .where(
+            previous_user_step.user_flow_id == UserOnboardingStep.user_flow_id,
+            previous_step.order < OnboardingStep.order,
+            previous_step.type == OnboardingStepType.PERSONAL_DATA,
+            previous_user_step.is_completed == False,  # noqa: E712
+        )
+        .order_by(previous_step.order)
+        .limit(1)
+        .scalar_subquery()
+    )
+    conversation_id = (
+        select(Conversation.id)
+        .where(
+            Conversation.user_id == current_user.id,
+            Conversation.is_llm == True,  # noqa: E712
+            Conversation.onboarding_step_id == UserOnboardingStep.step_id,
+        )
+        .limit(1)
+        .scalar_subquery()
+    )
+
     stmt = (
-        select(UserOnboardingStep)
+        select(UserOnboardingStep, pending_prerequisite, conversation_id)
         .join(UserOnboardingFlow)
+        .join(OnboardingStep)
         .where(UserOnboardingStep.step_id == step_id, UserOnboardingFlow.user_id == current_user.id)
+        .options(
+            contains_eager(UserOnboardingStep.user_flow),  # type: ignore
+            contains_eager(UserOnboardingStep.step),  # type: ignore
+        )
     )
 
-    user_step = session.exec(stmt).first()
+    with tracer.start_as_current_span("chat.bootstrap"):
+        row = (await session.exec(stmt)).first()  # type: ignore
 
-    if not user_step:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Step não encontrado ou você não tem acesso a ele",
         )
 
-    # Verifica se é um step de LLM Chat
+    user_step, pending_step_name, conversation_id = row
+
     if user_step.step.type != OnboardingStepType.LLM_CHAT:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Este step não é do tipo LLM Chat"
         )
 
-    # Verifica se o usuário é consultor (consultores não fazem onboarding)
     if current_user.is_consultant:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Consultores não podem acessar o chat LLM de onboarding",
         )
 
-    # Verifica se o flow está ativo
     if user_step.user_flow.is_completed:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="O fluxo de onboarding já foi concluído"
         )
 
-    return user_step
-
-
-async def validate_step_access(
-    user_step: Annotated[UserOnboardingStep, Depends(get_user_step_for_llm_chat)],
-    session: Annotated[Session, Depends(get_session)],
-) -> UserOnboardingStep:
-    """
-    Validação adicional de acesso ao step.
-
-    Pode ser usado para verificar:
-    - Se steps anteriores foram concluídos
-    - Se há dependências não satisfeitas
-    - Regras de negócio específicas
-    """
-
-    # Verifica se steps anteriores obrigatórios foram concluídos
-    previous_steps = session.exec(
-        select(UserOnboardingStep)
-        .join(OnboardingStep)
-        .where(
-            UserOnboardingStep.user_flow_id == user_step.user_flow_id,
-            OnboardingStep.order < user_step.step.order,
+    if pending_step_name is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O step '{pending_step_name}' deve ser concluído antes deste chat",
         )
-    ).all()
 
-    # Verifica se todos os steps anteriores obrigatórios foram concluídos
-    for prev_step in previous_steps:
-        # Aqui você pode definir quais steps são obrigatórios
-        # Por exemplo, se for um step de dados pessoais, pode ser obrigatório
-        if prev_step.step.type == OnboardingStepType.PERSONAL_DATA and not prev_step.is_completed:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"O step '{prev_step.step.name}' deve ser concluído antes deste chat",
-            )
-
-    return user_step
+    return LLMChatContext(user_step=user_step, conversation_id=conversation_id)
 
 
 async def get_validated_user_step(
-    step_id: int,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    context: Annotated[LLMChatContext, Depends(get_llm_chat_context)],
 ) -> UserOnboardingStep:
     """
     Dependency principal que combina todas as validações.
     Use esta nos endpoints que precisam de acesso validado ao step LLM.
     """
 
-    user_step = await get_user_step_for_llm_chat(step_id, session, current_user)
-    validated_step = await validate_step_access(user_step, session)
-
-    return validated_step
+    return context.user_step
 
 
 # === DEPENDENCIES AUXILIARES ===
@@ -163,7 +182,7 @@ async def get_user_onboarding_flow_by_step(
 
 
 async def check_llm_chat_enabled(
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> bool:
     """
     Verifica se o chat LLM está habilitado globalmente.
@@ -195,50 +214,29 @@ async def validate_llm_chat_enabled(
 # === DEPENDENCY PARA RATE LIMITING ===
 
 
-class RateLimiter:
-    """Simple rate limiter para chat LLM"""
+def get_user_role(user: User) -> str:
+    """Papel do usuário usado para escolher o limite de requests"""
+    if user.is_admin:
+        return "admin"
+    if user.is_consultant:
+        return "consultant"
+    return "client"
 
-    def __init__(self) -> None:
-        self.user_requests = {}  # user_id -> list of timestamps
-        self.max_requests = 10  # máximo de requests por minuto
-        self.window_seconds = 60
 
-    def is_allowed(self, user_id: str) -> bool:
-        """Verifica se o usuário pode fazer mais requests"""
-        import time
+def rate_limit(scope: str) -> Callable[[User], Awaitable[None]]:
+    """Cria uma dependency que aplica o rate limit configurado para `scope`"""
 
-        now = time.time()
-
-        if user_id not in self.user_requests:
-            self.user_requests[user_id] = []
-
-        # Remove requests antigos
-        self.user_requests[user_id] = [
-            req_time
-            for req_time in self.user_requests[user_id]
-            if now - req_time < self.window_seconds
-        ]
-
-        # Verifica limite
-        if len(self.user_requests[user_id]) >= self.max_requests:
-            return False
-
-        # Adiciona request atual
-        self.user_requests[user_id].append(now)
-        return True
-
-
-# Instância global do rate limiter
-rate_limiter = RateLimiter()
+    async def dependency(current_user: Annotated[User, Depends(get_current_user)]) -> None:
+        result = await rate_limiter.hit(scope, get_user_role(current_user), str(current_user.id))
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Muitas mensagens enviadas. Tente novamente em alguns instantes.",
+                headers={"Retry-After": str(max(1, math.ceil(result.retry_after)))},
+            )
 
+    return dependency
 
-async def check_rate_limit(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> None:
-    """Verifica rate limit para o usuário"""
 
-    if not rate_limiter.is_allowed(str(current_user.id)):
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Muitas mensagens enviadas. Tente novamente em alguns instantes.",
-        )
+# Rate limit do chat LLM
+check_rate_limit = rate_limit("llm_chat")
@@ -1,17 +1,23 @@
-import os
 import uuid
-from datetime import datetime
 from typing import Annotated
+from urllib.parse import quote
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status as http_status
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
 from sqlmodel import Session, select
 
 from api.dependencies import get_current_user
+from api.routes.documents import DOCUMENT_OUT_LOAD_OPTIONS
 from api.schemas.document import DocumentOut
+from core.config import settings
 from core.database import get_session
+from core.ocr.cache import ocr_cache
+from core.ocr.pipeline import OCR_STATUSES, STATUS_PENDING_REVIEW, STATUS_UPLOADED
+from core.storage import storage
+from models.base import utcnow
 from models.document import Document
 from models.user import User
+from tasks.document_tasks import enqueue_document_ocr
 
 router = APIRouter(tags=["admin-documents"])
 
@@ -33,7 +39,7 @@ def list_all_documents(
 ) -> ...:
     """Admin: List all submitted documents (optionally filter by status)."""
     require_admin(current_user)
-    query = select(Document)
+    query = select(Document).options(*DOCUMENT_OUT_LOAD_OPTIONS)
     if status:
         query = query.where(Document.status == status)
     query = query.offset(skip).limit(limit)
@@ -42,28 +48,82 @@ def list_all_documents(
     return documents
 
 
+@router.get("/ocr-cache/stats")
+def get_ocr_cache_stats(
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> dict[str, int]:
+    """Admin: OCR cache hit/miss counters (redis_hits, db_hits, misses)."""
+    require_admin(current_user)
+    return ocr_cache.stats()
+
+
 @router.get("/{document_id}/download")
 def download_document(
     document_id: uuid.UUID,
     session: Annotated[Session, Depends(get_session)],
     # current_user: Annotated[User, Depends(get_current_user)],
-) -> FileResponse:
-    """Admin: Download document file."""
+) -> Response:
+    """
+    Admin: Download document file.
+
+    Backends with direct downloads (S3) redirect to a short-lived presigned URL, so the bytes
+    never pass through the API worker; otherwise the file is streamed in chunks.
+    """
     # require_admin(current_user)
     document = session.exec(select(Document).where(Document.id == document_id)).one_or_none()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    file_path = document.file_path
-    if not os.path.isfile(file_path):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(
-        path=file_path,
+    url = storage.presigned_url(
+        document.file_path,
         filename=document.original_filename,
+        content_type=document.content_type,
+        expires_in=settings.STORAGE_PRESIGNED_URL_EXPIRES_SECONDS,
+    )
+    if url:
+        return RedirectResponse(url, status_code=307)
+
+    try:
+        chunks = storage.iter_chunks(document.file_path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail="File not found") from e
+    return StreamingResponse(
+        chunks,
         media_type=document.content_type,
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename*=UTF-8''{quote(document.original_filename)}"
+            ),
+            "Content-Length": str(document.file_size),
+        },
     )
 
 
+@router.post(
+    "/{document_id}/reprocess",
+    response_model=DocumentOut,
+    status_code=http_status.HTTP_202_ACCEPTED,
+)
+def reprocess_document(
+    document_id: uuid.UUID,
+    session: Annotated[Session, Depends(get_session)],
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> ...:
+    """Admin: Run OCR again for a document, ahead of the background backlog."""
+    require_admin(current_user)
+    document = session.get(Document, document_id, options=DOCUMENT_OUT_LOAD_OPTIONS)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    document.ocr_processed = False
+    if document.status in (*OCR_STATUSES, STATUS_PENDING_REVIEW):
+        document.status = STATUS_UPLOADED
+    session.add(document)
+    session.commit()
+
+    enqueue_document_ocr(document.id, interactive=True, force=True)
+    return document
+
+
 @router.patch("/{document_id}/status", response_model=DocumentOut)
 def update_document_status(
     session: Annotated[Session, Depends(get_session)],
@@ -81,7 +141,7 @@ def update_document_status(
         raise HTTPException(status_code=400, detail="Invalid status")
     document.status = status
     document.validated_by_user_id = current_user.id
-    document.validated_at = datetime.utcnow()
+    document.validated_at = utcnow()
     if status == "invalid":
         document.rejection_reason = rejection_reason
     else:
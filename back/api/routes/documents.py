@@ -1,19 +1,34 @@
-import os
+import logging
 import uuid
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
-from sqlmodel import Session
+from kombu.exceptions import OperationalError
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
 
 from api.dependencies import get_current_user
 from api.schemas.document import DocumentOut, DocumentRequirementOut
+from core.config import settings
+from core.content_store import reuse_extracted_data, store_document_content
 from core.database import get_session
+from core.metrics import UPLOAD_BYTES, UPLOAD_DURATION
+from core.uploads import UploadTooLargeError
 from models.document import Document, DocumentRequirement
 from models.onboarding import OnboardingStep, UserOnboardingStep
 from models.user import User
+from tasks.document_tasks import enqueue_document_ocr
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["documents"])
 
+# Relacionamentos serializados por DocumentOut, carregados em lote (evita N+1 por documento)
+DOCUMENT_OUT_LOAD_OPTIONS = (
+    selectinload(Document.extracted_data),  # type: ignore
+    selectinload(Document.reviews),  # type: ignore
+)
+
 
 @router.get("/steps/{step_id}/requirements", response_model=list[DocumentRequirementOut])
 def list_step_requirements(
@@ -70,7 +85,11 @@ def list_user_step_documents(
     user_step = session.get(UserOnboardingStep, user_step_id)
     if not user_step:
         raise HTTPException(status_code=404, detail="User onboarding step not found")
-    return user_step.documents
+    return session.exec(
+        select(Document)
+        .where(Document.user_step_id == user_step_id)
+        .options(*DOCUMENT_OUT_LOAD_OPTIONS)
+    ).all()
 
 
 @router.post(
@@ -90,38 +109,52 @@ def upload_user_step_document(
     if not user_step:
         raise HTTPException(status_code=404, detail="User onboarding step not found")
 
-    upload_dir = "uploads/documents"
-    os.makedirs(upload_dir, exist_ok=True)
-    unique_name = f"{uuid.uuid4().hex}_{file.filename}"
-    file_path = os.path.join(upload_dir, unique_name)
     content_type = file.content_type or "application/octet-stream"
     file_type = content_type.split("/")[0]
-    file_size = len(file.file.read())
-    file.file.seek(0)
-    with open(file_path, "wb") as f:
-        f.write(file.file.read())
+    try:
+        if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
+            raise UploadTooLargeError(settings.MAX_UPLOAD_SIZE)
+        with UPLOAD_DURATION.time():
+            blob = store_document_content(
+                session, file.file, settings.MAX_UPLOAD_SIZE, content_type=content_type
+            )
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        ) from e
+    UPLOAD_BYTES.inc(blob.size)
 
     document = Document(
         user_step_id=user_step_id,
         requirement_id=requirement_id,
-        file_path=file_path,
+        file_path=blob.storage_path,
         original_filename=file.filename or "",
         file_type=file_type,
-        file_size=file_size,
+        file_size=blob.size,
+        sha256=blob.sha256,
         content_type=content_type,
         uploaded_by_id=current_user.id,
         status="uploaded",
     )
     session.add(document)
+    # Mesmo conteúdo já processado em outro documento: reaproveita o OCR
+    reused_ocr = reuse_extracted_data(session, document)
     session.commit()
     session.refresh(document)
+
+    if not reused_ocr:
+        try:
+            enqueue_document_ocr(document.id)
+        except OperationalError:
+            # O documento fica como 'uploaded' e pode ser reenfileirado depois
+            logger.exception("Não foi possível enfileirar o OCR do documento %s", document.id)
     return document
 
 
 @router.get("/user-steps/{user_step_id}/documents/{document_id}", response_model=DocumentOut)
 def get_user_step_document(
     user_step_id: int,
-    document_id: str,
+    document_id: uuid.UUID,
     session: Annotated[Session, Depends(get_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> ...:
@@ -129,7 +162,7 @@ def get_user_step_document(
     user_step = session.get(UserOnboardingStep, user_step_id)
     if not user_step:
         raise HTTPException(status_code=404, detail="User onboarding step not found")
-    document = session.get(Document, document_id)
+    document = session.get(Document, document_id, options=DOCUMENT_OUT_LOAD_OPTIONS)
     if not document or document.user_step_id != user_step_id:
         raise HTTPException(status_code=404, detail="Document not found for this step")
     return document
@@ -142,7 +175,11 @@ def list_documents_for_requirement(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> ...:
     """List all documents for a given requirement (across all user steps)."""
-    requirement = session.get(DocumentRequirement, requirement_id)
+    requirement = session.get(
+        DocumentRequirement,
+        requirement_id,
+        options=[selectinload(DocumentRequirement.documents).options(*DOCUMENT_OUT_LOAD_OPTIONS)],  # type: ignore
+    )
     if not requirement:
         raise HTTPException(status_code=404, detail="Requirement not found")
     return requirement.documents
@@ -155,7 +192,7 @@ def get_document_by_id(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> ...:
     """Get document details by document id."""
-    document = session.get(Document, document_id)
+    document = session.get(Document, document_id, options=DOCUMENT_OUT_LOAD_OPTIONS)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     return document
@@ -1,13 +1,19 @@
+import itertools
 from collections.abc import AsyncGenerator
+from dataclasses import asdict
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
-from sqlmodel import Session, asc
+from sqlmodel import asc
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.dependencies import (
+    LLMChatContext,
     check_rate_limit,
+    get_current_consultant,
     get_current_user,
+    get_llm_chat_context,
     get_validated_user_step,
     validate_llm_chat_enabled,
 )
@@ -17,8 +23,11 @@ from api.schemas.llm_chat import (
     MessageResponse,
     StreamMessageChunk,
 )
-from core.database import get_session
+from core.config import settings
+from core.database import get_async_session
 from core.llm_chat import llm_chat_service
+from core.metrics import CHAT_ACTIVE_STREAMS
+from core.sse import SSE_MEDIA_TYPE, format_sse, relay_stream
 from models.onboarding import UserOnboardingStep
 from models.user import User
 
@@ -28,42 +37,80 @@ router = APIRouter(tags=["llm-chat"])
 @router.post("/message/stream")
 async def send_message_stream(
     request: ChatMessageRequest,
-    session: Annotated[Session, Depends(get_session)],
+    http_request: Request,
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     current_user: Annotated[User, Depends(get_current_user)],
-    user_step: Annotated[UserOnboardingStep, Depends(get_validated_user_step)],
+    context: Annotated[LLMChatContext, Depends(get_llm_chat_context)],
     _: Annotated[None, Depends(validate_llm_chat_enabled)],
     __: Annotated[None, Depends(check_rate_limit)],
+    accept: Annotated[str | None, Header()] = None,
 ) -> StreamingResponse:
     """
     Envia uma mensagem para o chat LLM e retorna resposta em streaming.
 
-    A resposta é enviada como Server-Sent Events (SSE) com chunks JSON.
-    Cada chunk tem o formato:
+    Clientes que enviam `Accept: text/event-stream` recebem um stream SSE de verdade, com
+    ids de evento, heartbeats (`: keep-alive`) e apenas o texto novo em cada chunk:
+    ```
+    id: 1
+    event: delta
+    data: {"type": "delta", "content": "texto ", "seq": 1}
+    ```
+
+    Os demais (modo legado) recebem chunks JSON com o texto acumulado:
     ```
     data: {"type": "message", "content": "texto parcial"}
     data: {"type": "complete"}
     ```
+
+    Se o cliente desconectar no meio da resposta, a geração é cancelada e o texto parcial
+    é salvo como mensagem truncada.
     """
 
+    stream_deltas = SSE_MEDIA_TYPE in (accept or "")
+    event_ids = itertools.count(1)
+
+    def encode(chunk: StreamMessageChunk) -> str:
+        if stream_deltas:
+            return format_sse(chunk.model_dump_json(), event_id=next(event_ids), event=chunk.type)
+        return f"data: {chunk.model_dump_json()}\n\n"
+
     async def generate_stream() -> AsyncGenerator[str]:
         """Generator para streaming da resposta"""
-        try:
-            async for chunk in llm_chat_service.process_message_stream(
-                session=session,
-                user=current_user,
-                user_step=user_step,
-                message_content=request.message,
-            ):
-                # Envia chunk como JSON
-                yield f"data: {chunk.model_dump_json()}\n\n"
-
-        except Exception as e:
-            # Em caso de erro, envia chunk de erro
-            error_chunk = StreamMessageChunk(type="complete", content=f"Erro interno: {e!s}")
-            yield f"data: {error_chunk.model_dump_json()}\n\n"
+        with CHAT_ACTIVE_STREAMS.labels(mode="sse" if stream_deltas else "text").track_inprogress():
+            try:
+                async for chunk in llm_chat_service.process_message_stream(
+                    session=session,
+                    user=current_user,
+                    user_step=context.user_step,
+                    message_content=request.message,
+                    delta=stream_deltas,
+                    conversation_id=context.conversation_id,
+                ):
+                    # Envia chunk como JSON
+                    yield encode(chunk)
+
+            except Exception as e:
+                # Em caso de erro, envia chunk de erro
+                error_chunk = StreamMessageChunk(type="complete", content=f"Erro interno: {e!s}")
+                yield encode(error_chunk)
+
+    if stream_deltas:
+        return StreamingResponse(
+            relay_stream(
+                generate_stream(),
+                heartbeat_interval=settings.SSE_HEARTBEAT_SECONDS,
+                is_disconnected=http_request.is_disconnected,
+            ),
+            media_type=SSE_MEDIA_TYPE,
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no",
+            },
+        )
 
     return StreamingResponse(
-        generate_stream(),
+        relay_stream(generate_stream(), is_disconnected=http_request.is_disconnected),
         media_type="text/plain",
         headers={
             "Cache-Control": "no-cache",
@@ -73,6 +120,18 @@ async def send_message_stream(
     )
 
 
+@router.get("/generation-stats", response_model=dict)
+async def get_generation_stats(
+    _: Annotated[User, Depends(get_current_consultant)],
+) -> ...:
+    """
+    Contadores de gerações do LLM neste processo: concluídas, canceladas por desconexão
+    do cliente e estimativa de tokens economizados com os cancelamentos.
+    """
+
+    return asdict(llm_chat_service.generation_stats)
+
+
 @router.get("/structured-data", response_model=ChatStructuredData)
 async def get_structured_data(
     user_step: Annotated[UserOnboardingStep, Depends(get_validated_user_step)],
@@ -94,7 +153,7 @@ async def get_structured_data(
 
 @router.post("/reset", response_model=dict)
 async def reset_chat(
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     current_user: Annotated[User, Depends(get_current_user)],
     user_step: Annotated[UserOnboardingStep, Depends(get_validated_user_step)],
     _: Annotated[None, Depends(validate_llm_chat_enabled)],
@@ -125,7 +184,7 @@ async def reset_chat(
 
 @router.get("/messages", response_model=list[MessageResponse])
 async def get_chat_messages(
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     current_user: Annotated[User, Depends(get_current_user)],
     user_step: Annotated[UserOnboardingStep, Depends(get_validated_user_step)],
     limit: int = 50,
@@ -152,7 +211,7 @@ async def get_chat_messages(
             .limit(1)
         )
 
-        conversation = session.exec(stmt).first()
+        conversation = (await session.exec(stmt)).first()
 
         if not conversation:
             return []
@@ -166,7 +225,7 @@ async def get_chat_messages(
             .limit(limit)
         )
 
-        messages = session.exec(stmt).all()
+        messages = (await session.exec(stmt)).all()
 
         return messages
 
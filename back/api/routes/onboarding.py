@@ -2,7 +2,9 @@ import uuid
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.dependencies import get_current_user
 from api.schemas.llm_chat import ChatStructuredData
@@ -12,7 +14,7 @@ from api.schemas.onboarding import (
     UserOnboardingFlowRead,
     UserOnboardingStepRead,
 )
-from core.database import get_session
+from core.database import get_async_session
 from core.user_crud import (
     check_onboarding_flow_completion,
     complete_onboarding_flow,
@@ -34,7 +36,7 @@ router = APIRouter(tags=["onboarding"])
 
 @router.get("/flow", response_model=UserOnboardingFlowRead)
 async def get_current_onboarding_flow(
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> UserOnboardingFlowRead:
     """Get the current user's onboarding flow and steps"""
@@ -44,7 +46,7 @@ async def get_current_onboarding_flow(
             detail="Consultants don't have onboarding flows",
         )
 
-    user_flow = get_user_onboarding_flow(session, current_user.id)
+    user_flow = await get_user_onboarding_flow(session, current_user.id, with_steps=True)
     if not user_flow:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -57,18 +59,18 @@ async def get_current_onboarding_flow(
 @router.get("/step/{step_id}", response_model=UserOnboardingStepRead)
 async def get_onboarding_step(
     step_id: int,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> UserOnboardingStepRead:
     """Get details for a specific onboarding step"""
-    user_flow = get_user_onboarding_flow(session, current_user.id)
+    user_flow = await get_user_onboarding_flow(session, current_user.id)
     if not user_flow:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No active onboarding flow found for this user",
         )
 
-    user_step = get_user_onboarding_step(session, step_id, user_flow.id)  # type: ignore
+    user_step = await get_user_onboarding_step(session, step_id, user_flow.id)  # type: ignore
     if not user_step:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Step not found in user's onboarding flow"
@@ -81,15 +83,19 @@ async def get_onboarding_step(
 async def update_step_status(
     user_step_id: int,
     status_update: StepStatusUpdate,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> UserOnboardingStepRead:
     """Mark a step as completed or not completed"""
-    user_step = session.get(UserOnboardingStep, user_step_id)
+    user_step = await session.get(
+        UserOnboardingStep,
+        user_step_id,
+        options=[selectinload(UserOnboardingStep.step)],  # type: ignore
+    )
     if not user_step:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Step not found")
 
-    user_flow = session.get(UserOnboardingFlow, user_step.user_flow_id)
+    user_flow = await session.get(UserOnboardingFlow, user_step.user_flow_id)
     if not user_flow:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User flow not found for this step"
@@ -101,7 +107,7 @@ async def update_step_status(
         )
 
     # Update the step status
-    updated_step = update_onboarding_step(
+    updated_step = await update_onboarding_step(
         session=session, user_step_id=user_step_id, is_completed=status_update.is_completed
     )
 
@@ -113,9 +119,9 @@ async def update_step_status(
         )
 
     # Check if the entire flow is completed
-    is_completed = check_onboarding_flow_completion(session, user_flow.id)  # type: ignore
+    is_completed = await check_onboarding_flow_completion(session, user_flow.id)  # type: ignore
     if status_update.is_completed and is_completed:
-        complete_onboarding_flow(session, user_flow.id)  # type: ignore
+        await complete_onboarding_flow(session, user_flow.id)  # type: ignore
 
     return updated_step  # type: ignore
 
@@ -124,16 +130,20 @@ async def update_step_status(
 async def update_step_data(
     user_step_id: int,
     step_data: StepDataUpdate,
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> UserOnboardingStepRead:
     """Update data for a specific onboarding step"""
     # First verify the step belongs to this user
-    user_step = session.get(UserOnboardingStep, user_step_id)
+    user_step = await session.get(
+        UserOnboardingStep,
+        user_step_id,
+        options=[selectinload(UserOnboardingStep.step)],  # type: ignore
+    )
     if not user_step:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Step not found")
 
-    user_flow = session.get(UserOnboardingFlow, user_step.user_flow_id)
+    user_flow = await session.get(UserOnboardingFlow, user_step.user_flow_id)
     if not user_flow:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User flow not found for this step"
@@ -144,7 +154,7 @@ async def update_step_data(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this step"
         )
 
-    updated_step = update_onboarding_step(
+    updated_step = await update_onboarding_step(
         session=session, user_step_id=user_step_id, data=step_data.data
     )
 
@@ -159,7 +169,7 @@ async def update_step_data(
 
 
 async def create_document_requirements_for_verification_step(
-    session: Session, llm_step: UserOnboardingStep, user_id: uuid.UUID
+    session: AsyncSession, llm_step: UserOnboardingStep, user_id: uuid.UUID
 ) -> None:
     """Create document requirements for the DATA_VERIFICATION step based on structured data from LLM
     chat.
@@ -178,7 +188,7 @@ async def create_document_requirements_for_verification_step(
         )
     )
 
-    verification_step = session.exec(stmt).first()
+    verification_step = (await session.exec(stmt)).first()
 
     if not verification_step:
         # No verification step found in this flow
@@ -195,10 +205,15 @@ async def create_document_requirements_for_verification_step(
     existing_requirements = set()
 
     # Get existing requirements for the verification step
-    for req in session.exec(
-        select(DocumentRequirement).where(DocumentRequirement.step_id == verification_step.step_id)
-    ).all():
-        existing_requirements.add(req.doc_type)
+    existing_requirements.update(
+        (
+            await session.exec(
+                select(DocumentRequirement.doc_type).where(
+                    DocumentRequirement.step_id == verification_step.step_id
+                )
+            )
+        ).all()
+    )
 
     new_requirements = []
 
@@ -391,7 +406,6 @@ async def create_document_requirements_for_verification_step(
             )
             existing_requirements.add(doc_type)
 
-    for req in new_requirements:
-        session.add(req)
+    session.add_all(new_requirements)
 
-    session.commit()
+    await session.commit()
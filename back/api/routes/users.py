@@ -2,11 +2,12 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from sqlalchemy.orm import joinedload
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.dependencies import get_current_user
 from api.schemas.user import Token, UserCreate, UserRead
-from core.database import get_session
+from core.database import get_async_session
 from core.security import create_access_token
 from core.user_crud import authenticate_user, create_user, get_user_by_email
 from models.user import User
@@ -18,10 +19,12 @@ router = APIRouter(
 
 
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def signup(user: UserCreate, session: Annotated[Session, Depends(get_session)]) -> Token:
+async def signup(
+    user: UserCreate, session: Annotated[AsyncSession, Depends(get_async_session)]
+) -> Token:
     """Cria um novo usuário"""
     # Verifica se o email já existe
-    existing_user = get_user_by_email(session, user.email)
+    existing_user = await get_user_by_email(session, user.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -43,19 +46,28 @@ async def signup(user: UserCreate, session: Annotated[Session, Depends(get_sessi
 
 
 @router.get("/me", response_model=UserRead)
-async def get_me(current_user: Annotated[User, Depends(get_current_user)]) -> User:
+async def get_me(
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> User:
     """Retorna os dados do usuário autenticado"""
-    return current_user
+    user = await session.get(
+        User,
+        current_user.id,
+        options=[joinedload(User.profile)],  # type: ignore
+        populate_existing=True,
+    )
+    return user  # type: ignore
 
 
 @router.post("/login", response_model=Token)
 async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> Token:
     """Login do usuário"""
     # Autentica o usuário
-    user = authenticate_user(session, form_data.username, form_data.password)
+    user = await authenticate_user(session, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -55,6 +55,7 @@ class DocumentOut(BaseModel):
     original_filename: str
     file_type: str
     file_size: int
+    sha256: str | None = None
     content_type: str
     uploaded_by_id: uuid.UUID
     status: str
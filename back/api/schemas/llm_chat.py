@@ -21,6 +21,7 @@ class MessageResponse(BaseModel):
     id: uuid.UUID
     sender_type: str  # user | llm
     content: str
+    truncated: bool = False
     created_at: datetime
 
     class Config:
@@ -37,11 +38,17 @@ class ChatProgressResponse(BaseModel):
 
 
 class StreamMessageChunk(BaseModel):
-    """Chunk de mensagem para streaming"""
+    """
+    Chunk de mensagem para streaming.
 
-    type: Literal["message", "structured_data", "progress", "complete"]
+    - message: texto acumulado da resposta até o momento (modo legado)
+    - delta: apenas o texto novo desde o chunk anterior; `seq` ordena os deltas
+    """
+
+    type: Literal["message", "delta", "structured_data", "progress", "complete"]
     content: str = ""
     data: dict[str, Any] | None = None
+    seq: int | None = None
 
 
 class ImovelData(BaseModel):
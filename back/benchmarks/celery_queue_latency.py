@@ -0,0 +1,118 @@
+"""
+Latência de fila do Celery sob um backlog misto.
+
+Sobe, neste processo, um worker para a fila ocr-heavy e outro para ocr-light (com a
+configuração de celery_app: prefetch, acks_late, prioridades) e enfileira:
+
+- `--background` tasks de OCR pesado (dormem `--duration` segundos) com prioridade padrão;
+- no meio desse backlog, `--interactive` tasks pesadas com prioridade interativa;
+- `--light` tasks curtas na fila ocr-light.
+
+Mostra, por classe, o tempo entre o enfileiramento e o início da execução. Com prioridades e
+filas separadas, interativas e leves não esperam o backlog pesado terminar.
+
+Uso (precisa do broker Redis de CELERY_BROKER_URL, ou outro com --broker):
+
+    python -m benchmarks.celery_queue_latency --background 40 --interactive 5 --light 20
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from celery.contrib.testing.worker import start_worker
+
+from celery_app import (
+    PRIORITY_DEFAULT,
+    PRIORITY_INTERACTIVE,
+    QUEUE_OCR_HEAVY,
+    QUEUE_OCR_LIGHT,
+    celery_app,
+)
+
+_latencies: dict[str, list[float]] = defaultdict(list)
+_lock = threading.Lock()
+_done = threading.Semaphore(0)
+
+
+@celery_app.task(name="benchmarks.simulated_task")
+def simulated_task(kind: str, enqueued_at: float, duration: float) -> None:
+    with _lock:
+        _latencies[kind].append(time.time() - enqueued_at)
+    time.sleep(duration)
+    _done.release()
+
+
+def _enqueue(kind: str, queue: str, priority: int, duration: float) -> None:
+    simulated_task.apply_async(
+        (kind, time.time(), duration), queue=queue, priority=priority, ignore_result=True
+    )
+
+
+def _report(kind: str, values: list[float]) -> None:
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    print(
+        f"{kind:<12} n={len(values):<4} p50={statistics.median(values) * 1000:8.1f}ms "
+        f"p95={p95 * 1000:8.1f}ms max={values[-1] * 1000:8.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--broker", help="URL do broker (padrão: CELERY_BROKER_URL)")
+    parser.add_argument("--background", type=int, default=40)
+    parser.add_argument("--interactive", type=int, default=5)
+    parser.add_argument("--light", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=0.2, help="segundos por task pesada")
+    parser.add_argument("--heavy-concurrency", type=int, default=4)
+    parser.add_argument("--light-concurrency", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.broker:
+        celery_app.conf.broker_url = args.broker
+
+    total = args.background + args.interactive + args.light
+    with (
+        start_worker(
+            celery_app,
+            concurrency=args.heavy_concurrency,
+            pool="threads",
+            perform_ping_check=False,
+            queues=[QUEUE_OCR_HEAVY],
+            hostname="bench-heavy@localhost",
+        ),
+        start_worker(
+            celery_app,
+            concurrency=args.light_concurrency,
+            pool="threads",
+            perform_ping_check=False,
+            queues=[QUEUE_OCR_LIGHT],
+            hostname="bench-light@localhost",
+        ),
+    ):
+        started = time.time()
+        half = args.background // 2
+        for _ in range(half):
+            _enqueue("background", QUEUE_OCR_HEAVY, PRIORITY_DEFAULT, args.duration)
+        for _ in range(args.interactive):
+            _enqueue("interactive", QUEUE_OCR_HEAVY, PRIORITY_INTERACTIVE, args.duration)
+        for _ in range(args.light):
+            _enqueue("light", QUEUE_OCR_LIGHT, PRIORITY_DEFAULT, 0.0)
+        for _ in range(args.background - half):
+            _enqueue("background", QUEUE_OCR_HEAVY, PRIORITY_DEFAULT, args.duration)
+
+        for _ in range(total):
+            _done.acquire()
+        elapsed = time.time() - started
+
+    print(f"{total} tasks em {elapsed:.2f}s (broker: {celery_app.conf.broker_url})")
+    for kind in ("interactive", "light", "background"):
+        if _latencies[kind]:
+            _report(kind, _latencies[kind])
+
+
+if __name__ == "__main__":
+    main()
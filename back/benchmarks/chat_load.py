@@ -0,0 +1,260 @@
+"""
+Teste de carga do chat LLM: muitos usuários simultâneos fazendo a entrevista de onboarding.
+
+Cada usuário virtual se cadastra, libera a etapa de chat (conclui os dados pessoais) e envia
+as mensagens de INTERVIEW por `POST /api/llm-chat/message/stream` (SSE), com um intervalo
+de "digitação" entre elas. Rode contra a API com o modelo falso (benchmarks/fake_chat_server.py)
+e um banco descartável: os usuários e conversas criados não são removidos.
+
+Durante o teste o /metrics da API é lido periodicamente. Ao final são mostrados:
+
+- TTFT (até o primeiro `event: delta`) e duração dos turnos: p50/p95/p99;
+- vazão: turnos e tokens gerados por segundo;
+- pool do banco: pico de conexões em uso e de overflow, e a fração das amostras acima do
+  pool_size;
+- memória por stream: crescimento do RSS do servidor dividido pelo pico de streams abertos
+  (só sem PROMETHEUS_MULTIPROC_DIR, que não exporta as métricas de processo).
+
+Cada usuário mantém uma conexão aberta: com milhares deles, aumente o limite de arquivos
+abertos (`ulimit -n`) do driver e do servidor.
+
+    python -m benchmarks.chat_load --base-url http://localhost:8000 --users 2000 --ramp-up 60
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+# Uma entrevista de onboarding completa, cobrindo as tools do agente
+INTERVIEW = (
+    "Olá, quero estruturar uma holding para a minha família",
+    "Tenho um apartamento em São Paulo onde moro, vale uns 850 mil",
+    "Também tenho uma casa na praia que fica alugada",
+    "Sou sócio de uma empresa de comércio, tenho 50% dela",
+    "Sou casado no regime de comunhão parcial",
+    "Minha esposa se chama Maria e tem 40 anos",
+    "Temos um filho, o Pedro, de 12 anos",
+    "Tenho 200 mil em CDB e um pouco em ações",
+    "Também tenho um carro de passeio",
+    "Pode me mostrar um resumo do que foi coletado?",
+)
+
+
+@dataclass
+class LoadResults:
+    ttft: list[float] = field(default_factory=list)
+    turn_duration: list[float] = field(default_factory=list)
+    errors: Counter[str] = field(default_factory=Counter)
+    users_done: int = 0
+
+
+@dataclass
+class ServerSamples:
+    """Amostras do /metrics da API ao longo do teste"""
+
+    pool_checked_out: list[float] = field(default_factory=list)
+    pool_overflow: list[float] = field(default_factory=list)
+    active_streams: list[float] = field(default_factory=list)
+    rss_bytes: list[float] = field(default_factory=list)
+    output_tokens: list[float] = field(default_factory=list)
+
+
+def _parse_metrics(text: str) -> dict[str, float]:
+    """Soma as séries de cada métrica (ex.: todos os engines do pool)"""
+    values: dict[str, float] = {}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == "llm_tokens_total" and sample.labels.get("direction") != "output":
+                continue
+            values[sample.name] = values.get(sample.name, 0.0) + sample.value
+    return values
+
+
+async def _sample_metrics(
+    client: httpx.AsyncClient, samples: ServerSamples, interval: float, stop: asyncio.Event
+) -> None:
+    while not stop.is_set():
+        try:
+            values = _parse_metrics((await client.get("/metrics")).text)
+        except httpx.HTTPError:
+            values = {}
+        samples.pool_checked_out.append(values.get("db_pool_checked_out_connections", 0.0))
+        samples.pool_overflow.append(values.get("db_pool_overflow_connections", 0.0))
+        samples.active_streams.append(values.get("chat_active_streams", 0.0))
+        if "process_resident_memory_bytes" in values:
+            samples.rss_bytes.append(values["process_resident_memory_bytes"])
+        if "llm_tokens_total" in values:
+            samples.output_tokens.append(values["llm_tokens_total"])
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except TimeoutError:
+            pass
+
+
+async def _send_turn(
+    client: httpx.AsyncClient, headers: dict[str, str], step_id: int, message: str
+) -> tuple[float | None, float, str | None]:
+    """Envia uma mensagem; retorna (ttft, duração, erro)"""
+    started = time.perf_counter()
+    ttft = None
+    async with client.stream(
+        "POST",
+        f"/api/llm-chat/message/stream?step_id={step_id}",
+        json={"message": message, "step_id": step_id},
+        headers={**headers, "Accept": "text/event-stream"},
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return None, time.perf_counter() - started, f"HTTP {response.status_code}"
+        async for line in response.aiter_lines():
+            if ttft is None and line == "event: delta":
+                ttft = time.perf_counter() - started
+    return ttft, time.perf_counter() - started, None if ttft is not None else "sem texto"
+
+
+async def _interview(
+    client: httpx.AsyncClient,
+    index: int,
+    run_id: str,
+    args: argparse.Namespace,
+    results: LoadResults,
+) -> None:
+    rng = random.Random(f"{args.seed}:{index}")
+    await asyncio.sleep(args.ramp_up * index / args.users)
+
+    response = await client.post(
+        "/api/users/signup",
+        json={
+            "email": f"load-{run_id}-{index}@example.com",
+            "password": "load-test",
+            "name": f"Usuário de carga {index}",
+        },
+    )
+    if response.status_code != 201:
+        results.errors[f"signup HTTP {response.status_code}"] += 1
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    flow = (await client.get("/api/onboarding/flow", headers=headers)).json()
+    steps = {user_step["step"]["type"]: user_step for user_step in flow["user_steps"]}
+    await client.patch(
+        f"/api/onboarding/step/{steps['personal_data']['id']}/status",
+        json={"is_completed": True},
+        headers=headers,
+    )
+    step_id = steps["llm_chat"]["step_id"]
+
+    for message in INTERVIEW[: args.turns]:
+        await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_time)
+        try:
+            ttft, duration, error = await _send_turn(client, headers, step_id, message)
+        except httpx.HTTPError as e:
+            results.errors[type(e).__name__] += 1
+            continue
+        if error:
+            results.errors[error] += 1
+            continue
+        assert ttft is not None
+        results.ttft.append(ttft)
+        results.turn_duration.append(duration)
+    results.users_done += 1
+
+
+def _percentiles(name: str, values: list[float]) -> None:
+    if not values:
+        print(f"{name:<10} sem amostras")
+        return
+    values = sorted(values)
+
+    def pct(q: float) -> float:
+        return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+    print(
+        f"{name:<10} n={len(values):<6} p50={statistics.median(values) * 1000:8.1f}ms "
+        f"p95={pct(0.95):8.1f}ms p99={pct(0.99):8.1f}ms max={values[-1] * 1000:8.1f}ms"
+    )
+
+
+def _report(results: LoadResults, samples: ServerSamples, elapsed: float) -> None:
+    print(f"usuários concluídos: {results.users_done}  tempo: {elapsed:.1f}s")
+    _percentiles("ttft", results.ttft)
+    _percentiles("turno", results.turn_duration)
+
+    print(f"vazão: {len(results.turn_duration) / elapsed:.1f} turnos/s", end="")
+    if len(samples.output_tokens) >= 2:
+        tokens = samples.output_tokens[-1] - samples.output_tokens[0]
+        print(f", {tokens / elapsed:.0f} tokens gerados/s")
+    else:
+        print()
+
+    if samples.pool_checked_out:
+        above_pool = sum(1 for value in samples.pool_overflow if value > 0)
+        print(
+            f"pool do banco: pico {max(samples.pool_checked_out):.0f} conexões em uso, "
+            f"overflow pico {max(samples.pool_overflow):.0f}, acima do pool_size em "
+            f"{above_pool / len(samples.pool_overflow):.0%} das amostras"
+        )
+
+    peak_streams = max(samples.active_streams, default=0)
+    if len(samples.rss_bytes) >= 2 and peak_streams:
+        growth = max(samples.rss_bytes) - samples.rss_bytes[0]
+        print(
+            f"memória: RSS {samples.rss_bytes[0] / 2**20:.0f} -> "
+            f"{max(samples.rss_bytes) / 2**20:.0f} MiB com pico de {peak_streams:.0f} streams "
+            f"(~{growth / peak_streams / 2**10:.0f} KiB por stream)"
+        )
+    else:
+        print("memória: sem process_resident_memory_bytes/streams no /metrics")
+
+    if results.errors:
+        print("erros:", dict(results.errors.most_common()))
+
+
+async def _run(args: argparse.Namespace) -> None:
+    run_id = uuid.uuid4().hex[:8]
+    results = LoadResults()
+    samples = ServerSamples()
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=args.users + 1, max_keepalive_connections=args.users)
+    timeout = httpx.Timeout(args.timeout, connect=30)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        sampler = asyncio.create_task(_sample_metrics(client, samples, args.sample_interval, stop))
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(_interview(client, index, run_id, args, results) for index in range(args.users))
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+    _report(results, samples, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=100, help="usuários simultâneos")
+    parser.add_argument("--turns", type=int, default=len(INTERVIEW), help="mensagens por usuário")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="segundos até todos entrarem")
+    parser.add_argument(
+        "--think-time", type=float, default=2.0, help="intervalo médio entre mensagens (s)"
+    )
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="leitura do /metrics")
+    parser.add_argument("--timeout", type=float, default=120.0, help="timeout de cada request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Tempo até o primeiro token (TTFT) de um turno do chat LLM, sem o tempo do modelo.
+
+Usa um modelo falso que responde na hora, então o TTFT medido é só o trabalho de banco antes
+da geração, nos dois caminhos:
+
+- legacy: as validações antigas do step (`_legacy_user_step`, uma query por etapa, como a
+  API fazia antes do `get_llm_chat_context`) e busca da conversa no service;
+- bootstrap: `get_llm_chat_context` (step, flow, pré-requisitos e conversa em uma query).
+
+Em ambos o histórico vem do cache de histórico e a mensagem do usuário é gravada. As
+mensagens criadas pelo benchmark são removidas ao final.
+
+Com banco local, `--rtt-ms` soma uma latência fixa a cada statement para simular a ida e volta
+até um Postgres remoto.
+
+    python -m benchmarks.chat_ttft --email cliente@exemplo.com --step-id 2 --turns 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import AsyncIterator
+
+from fastapi import HTTPException, status
+from pydantic_ai.messages import ModelMessage
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from sqlalchemy import event
+from sqlalchemy.orm import contains_eager, joinedload
+from sqlmodel import delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from api.dependencies import get_llm_chat_context
+from core.database import async_engine, async_session_maker
+from core.llm_chat import llm_chat_service
+from models.base import utcnow
+from models.conversation import Conversation, Message
+from models.onboarding import (
+    OnboardingStep,
+    OnboardingStepType,
+    UserOnboardingFlow,
+    UserOnboardingStep,
+)
+from models.user import User
+
+
+async def _legacy_user_step(
+    step_id: int, session: AsyncSession, current_user: User
+) -> UserOnboardingStep:
+    """Validações do step como eram antes do `get_llm_chat_context` (step e pré-requisitos)"""
+    stmt = (
+        select(UserOnboardingStep)
+        .join(UserOnboardingFlow)
+        .where(UserOnboardingStep.step_id == step_id, UserOnboardingFlow.user_id == current_user.id)
+        .options(
+            contains_eager(UserOnboardingStep.user_flow),  # type: ignore
+            joinedload(UserOnboardingStep.step),  # type: ignore
+        )
+    )
+    user_step = (await session.exec(stmt)).first()
+
+    if not user_step:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Step não encontrado ou você não tem acesso a ele",
+        )
+    if user_step.step.type != OnboardingStepType.LLM_CHAT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Este step não é do tipo LLM Chat"
+        )
+    if current_user.is_consultant:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Consultores não podem acessar o chat LLM de onboarding",
+        )
+    if user_step.user_flow.is_completed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="O fluxo de onboarding já foi concluído"
+        )
+
+    previous_steps = (
+        await session.exec(
+            select(UserOnboardingStep)
+            .join(OnboardingStep)
+            .where(
+                UserOnboardingStep.user_flow_id == user_step.user_flow_id,
+                OnboardingStep.order < user_step.step.order,
+            )
+            .options(contains_eager(UserOnboardingStep.step))  # type: ignore
+        )
+    ).all()
+    for prev_step in previous_steps:
+        if prev_step.step.type == OnboardingStepType.PERSONAL_DATA and not prev_step.is_completed:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"O step '{prev_step.step.name}' deve ser concluído antes deste chat",
+            )
+
+    return user_step
+
+
+async def _instant_reply(messages: list[ModelMessage], info: AgentInfo) -> AsyncIterator[str]:
+    yield "ok"
+
+
+async def _turn(email: str, step_id: int, bootstrap: bool) -> float:
+    """Um turno completo; retorna o tempo até o primeiro chunk de texto"""
+    started = time.perf_counter()
+    ttft = 0.0
+    async with async_session_maker() as session:
+        user = (await session.exec(select(User).where(User.email == email))).one()
+        if bootstrap:
+            context = await get_llm_chat_context(step_id, session, user)
+            user_step, conversation_id = context.user_step, context.conversation_id
+        else:
+            user_step = await _legacy_user_step(step_id, session, user)
+            conversation_id = None
+
+        async for chunk in llm_chat_service.process_message_stream(
+            session, user, user_step, "benchmark", delta=True, conversation_id=conversation_id
+        ):
+            if chunk.type == "delta" and not ttft:
+                ttft = time.perf_counter() - started
+    return ttft
+
+
+def _report(name: str, values: list[float]) -> None:
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    print(
+        f"{name:<10} n={len(values):<4} p50={statistics.median(values) * 1000:7.1f}ms "
+        f"p95={p95 * 1000:7.1f}ms"
+    )
+
+
+async def _run(email: str, step_id: int, turns: int) -> None:
+    llm_chat_service.agent.model = FunctionModel(stream_function=_instant_reply)
+    started_at = utcnow()
+    try:
+        # Aquecimento: cria a conversa (se preciso) e popula o cache de histórico
+        await _turn(email, step_id, bootstrap=True)
+        results: dict[str, list[float]] = {"legacy": [], "bootstrap": []}
+        for _ in range(turns):
+            for name in results:
+                results[name].append(await _turn(email, step_id, bootstrap=name == "bootstrap"))
+        for name, values in results.items():
+            _report(name, values)
+    finally:
+        async with async_session_maker() as session:
+            user = (await session.exec(select(User).where(User.email == email))).one()
+            conversation = (
+                await session.exec(
+                    select(Conversation).where(
+                        Conversation.user_id == user.id,
+                        Conversation.is_llm == True,  # noqa: E712
+                        Conversation.onboarding_step_id == step_id,
+                    )
+                )
+            ).first()
+            if conversation:
+                await session.exec(
+                    delete(Message).where(
+                        Message.conversation_id == conversation.id,  # type: ignore
+                        Message.created_at >= started_at,  # type: ignore
+                    )
+                )
+                await session.commit()
+                await llm_chat_service.memory.invalidate(conversation.id)
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--email", required=True, help="cliente com um step de chat LLM")
+    parser.add_argument("--step-id", type=int, required=True)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="latência extra por statement")
+    args = parser.parse_args()
+
+    async_engine.echo = False
+    if args.rtt_ms:
+        # Roda no thread/greenlet do driver: bloqueia como uma ida e volta de rede bloquearia
+        @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+        def _simulate_rtt(*_: object) -> None:
+            time.sleep(args.rtt_ms / 1000)
+
+    asyncio.run(_run(args.email, args.step_id, args.turns))
+
+
+if __name__ == "__main__":
+    main()
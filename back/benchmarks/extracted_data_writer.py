@@ -0,0 +1,99 @@
+"""
+Gravação de DocumentExtractedData: ORM linha a linha x escritor em lote.
+
+Para cada tamanho em `--fields`, grava N campos sintéticos em um documento existente:
+
+- orm: um `session.add` por campo (caminho antigo do OCR), flush no commit;
+- bulk: `write_extracted_fields` (INSERT ... VALUES em lote com upsert; COPY acima de
+  COPY_THRESHOLD no Postgres);
+- re-run: `write_extracted_fields` de novo com as mesmas chaves (caminho de upsert).
+
+Tudo roda dentro de uma transação desfeita ao final: o banco não é alterado.
+
+    python -m benchmarks.extracted_data_writer --fields 50 500 5000
+"""
+
+import argparse
+import time
+import uuid
+from collections.abc import Callable
+
+from sqlmodel import Session, select
+
+from core.database import engine
+from core.ocr.engine import FieldCandidate
+from core.ocr.writer import write_extracted_fields
+from models.document import Document, DocumentExtractedData
+
+METHOD = "benchmark"
+
+
+def _fields(count: int) -> list[FieldCandidate]:
+    return [
+        FieldCandidate(field_name=f"campo_{i}", value=f"valor {i}", confidence=0.9, page_number=1)
+        for i in range(count)
+    ]
+
+
+def _orm(session: Session, document_id: uuid.UUID, fields: list[FieldCandidate]) -> None:
+    for field in fields:
+        session.add(
+            DocumentExtractedData(
+                document_id=document_id,
+                field_name=field.field_name,
+                field_value=field.value,
+                confidence=field.confidence,
+                extraction_method=METHOD,
+            )
+        )
+    session.flush()
+
+
+def _bulk(session: Session, document_id: uuid.UUID, fields: list[FieldCandidate]) -> None:
+    write_extracted_fields(session, document_id, fields, METHOD)
+    session.flush()
+
+
+def _timed(
+    session: Session,
+    write: Callable[[Session, uuid.UUID, list[FieldCandidate]], None],
+    document_id: uuid.UUID,
+    fields: list[FieldCandidate],
+    runs: int = 1,
+) -> list[float]:
+    """Tempo de `runs` gravações seguidas dos mesmos campos (a partir da 2ª, re-run)"""
+    savepoint = session.begin_nested()
+    elapsed = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        write(session, document_id, fields)
+        elapsed.append(time.perf_counter() - started)
+    savepoint.rollback()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fields", type=int, nargs="+", default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    engine.echo = False
+    with Session(engine) as session:
+        document_id = session.exec(select(Document.id).limit(1)).first()
+        if document_id is None:
+            raise SystemExit("Nenhum documento no banco: envie um documento antes")
+
+        print(f"{'campos':>8} {'orm':>10} {'bulk':>10} {'re-run':>10} {'ganho':>8}")
+        for count in args.fields:
+            fields = _fields(count)
+            (orm,) = _timed(session, _orm, document_id, fields)
+            bulk, rerun = _timed(session, _bulk, document_id, fields, runs=2)
+            print(
+                f"{count:>8} {orm * 1000:>8.1f}ms {bulk * 1000:>8.1f}ms "
+                f"{rerun * 1000:>8.1f}ms {orm / bulk:>7.1f}x"
+            )
+        session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+A API completa com o modelo falso de benchmarks/fake_llm.py no lugar da OpenAI.
+
+O agente do chat e o sumarizador da memória usam modelos falsos configurados por FAKE_LLM_*
+(veja `FakeLLMProfile.from_env`); o resto (banco, cache, rate limit, métricas) é o mesmo da
+API real. Para um teste de carga, aumente também o rate limit do chat:
+
+    RATE_LIMITS='{"llm_chat": {"default": 100000}}' FAKE_LLM_TOKENS_PER_SECOND=40 \\
+        uvicorn benchmarks.fake_chat_server:app --workers 4 --port 8000
+"""
+
+from pydantic_ai.models.test import TestModel
+
+from benchmarks.fake_llm import FakeLLMProfile, fake_chat_model
+from core.chat_memory import chat_memory
+from core.llm_chat import llm_chat_service
+from main import app
+
+llm_chat_service.agent.model = fake_chat_model(FakeLLMProfile.from_env())
+chat_memory.summarizer.model = TestModel(custom_output_text="Resumo da conversa de teste.")
+
+__all__ = ["app"]
@@ -0,0 +1,156 @@
+"""
+Modelo falso e determinístico para o agente do chat LLM, para testes de carga sem OpenAI.
+
+Um `FunctionModel` do PydanticAI que imita o comportamento do modelo real com parâmetros
+configuráveis: latência até o primeiro token, tokens por segundo, tamanho da resposta e
+chamadas de tools. A tool é escolhida por palavras-chave da mensagem do usuário (ex.:
+"apartamento" -> `adicionar_imovel`) e chamada com argumentos fixos; a decisão de chamar ou
+não e o texto gerado dependem só de `seed` e da mensagem, então a mesma entrevista produz
+sempre a mesma conversa.
+
+    llm_chat_service.agent.model = fake_chat_model(FakeLLMProfile(tokens_per_second=40))
+"""
+
+import asyncio
+import json
+import os
+import random
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from pydantic_ai.messages import ModelMessage, ModelRequest, ToolReturnPart, UserPromptPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, DeltaToolCalls, FunctionModel
+
+# Intervalo entre chunks: com vários tokens por chunk, milhares de streams não viram
+# milhares de timers por token no servidor
+CHUNK_INTERVAL_SECONDS = 0.05
+
+_WORDS = (
+    "perfeito",
+    "entendi",
+    "vamos",
+    "registrar",
+    "esse",
+    "patrimônio",
+    "na",
+    "estrutura",
+    "da",
+    "holding",
+    "e",
+    "depois",
+    "seguimos",
+    "com",
+    "os",
+    "próximos",
+    "dados",
+    "familiares",
+    "investimentos",
+    "imóveis",
+)
+
+# Palavra-chave da mensagem do usuário -> (tool, argumentos)
+TOOL_CALLS: tuple[tuple[tuple[str, ...], str, dict[str, object]], ...] = (
+    (
+        ("apartamento", "casa", "imóvel", "terreno"),
+        "adicionar_imovel",
+        {
+            "tipo": "apartamento",
+            "localizacao": "São Paulo - SP",
+            "status": "uso próprio",
+            "valor_estimado_str": "850000",
+        },
+    ),
+    (
+        ("empresa", "sócio", "cnpj"),
+        "adicionar_participacao",
+        {"empresa": "Exemplo Ltda", "segmento": "comércio", "participacao": "50%"},
+    ),
+    (
+        ("casado", "casada", "regime"),
+        "atualizar_estrutura_familiar",
+        {"estado_civil": "casado", "regime_bens": "comunhão parcial"},
+    ),
+    (("esposa", "marido", "cônjuge"), "adicionar_conjuge", {"nome": "Maria", "idade": 40}),
+    (("filho", "filha", "filhos"), "adicionar_filho", {"nome": "Pedro", "idade": 12}),
+    (
+        ("investimento", "cdb", "ações", "tesouro"),
+        "adicionar_investimento",
+        {"tipo": "CDB", "valor_str": "200000", "instituicao": "Banco Exemplo"},
+    ),
+    (
+        ("carro", "veículo", "obra"),
+        "adicionar_outro_ativo",
+        {"tipo": "veículo", "descricao": "carro de passeio", "valor_str": "90000"},
+    ),
+    (("resumo",), "obter_resumo_dados", {}),
+)
+
+
+@dataclass(frozen=True)
+class FakeLLMProfile:
+    """Comportamento do modelo falso"""
+
+    first_token_latency: float = 0.6  # segundos até o primeiro chunk de cada resposta
+    tokens_per_second: float = 40.0
+    response_tokens: int = 120  # tamanho da resposta em texto
+    tool_call_rate: float = 0.7  # chance de chamar a tool da mensagem, se houver uma
+    seed: int = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMProfile":
+        """Perfil a partir de FAKE_LLM_* (para servidores iniciados pelo uvicorn)"""
+        return cls(
+            first_token_latency=float(os.getenv("FAKE_LLM_FIRST_TOKEN_MS", "600")) / 1000,
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "40")),
+            response_tokens=int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", "120")),
+            tool_call_rate=float(os.getenv("FAKE_LLM_TOOL_CALL_RATE", "0.7")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+
+def _last_user_prompt(messages: list[ModelMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, ModelRequest):
+            for part in message.parts:
+                if isinstance(part, UserPromptPart) and isinstance(part.content, str):
+                    return part.content
+    return ""
+
+
+def _tool_for(prompt: str, info: AgentInfo) -> tuple[str, dict[str, object]] | None:
+    available = {tool.name for tool in info.function_tools}
+    lowered = prompt.lower()
+    for keywords, tool_name, args in TOOL_CALLS:
+        if tool_name in available and any(keyword in lowered for keyword in keywords):
+            return tool_name, args
+    return None
+
+
+def fake_chat_model(profile: FakeLLMProfile) -> FunctionModel:
+    """Modelo para `Agent.model` que responde segundo `profile`"""
+
+    async def stream(
+        messages: list[ModelMessage], info: AgentInfo
+    ) -> AsyncIterator[str | DeltaToolCalls]:
+        prompt = _last_user_prompt(messages)
+        rng = random.Random(f"{profile.seed}:{prompt}")
+        await asyncio.sleep(profile.first_token_latency)
+
+        # Primeira resposta do turno (ainda sem retorno de tool): talvez chame uma tool
+        answered_tool = isinstance(messages[-1], ModelRequest) and any(
+            isinstance(part, ToolReturnPart) for part in messages[-1].parts
+        )
+        tool = None if answered_tool else _tool_for(prompt, info)
+        if tool is not None and rng.random() < profile.tool_call_rate:
+            name, args = tool
+            yield {0: DeltaToolCall(name=name, json_args=json.dumps(args))}
+            return
+
+        chunk_tokens = max(1, round(profile.tokens_per_second * CHUNK_INTERVAL_SECONDS))
+        for start in range(0, profile.response_tokens, chunk_tokens):
+            count = min(chunk_tokens, profile.response_tokens - start)
+            if start:
+                await asyncio.sleep(count / profile.tokens_per_second)
+            yield "".join(f"{rng.choice(_WORDS)} " for _ in range(count))
+
+    return FunctionModel(stream_function=stream, model_name="fake-chat")
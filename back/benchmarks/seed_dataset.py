@@ -0,0 +1,597 @@
+"""
+Gera um banco sintético para testes de desempenho (listagens, requisitos, histórico do chat).
+
+Para cada usuário cria perfil, família, fluxo de onboarding com as três etapas, o
+`ChatStructuredData` da entrevista (imóveis, participações, família, investimentos), uma
+conversa LLM com um histórico longo (e o resumo da memória, se passar da janela), documentos
+com blobs, campos extraídos e revisões. Alguns consultores/admins revisam os documentos.
+
+As linhas são montadas a partir das colunas dos models (defaults e conversões de tipo
+incluídos) e carregadas com COPY em lotes de `--chunk` usuários, cada lote em uma transação.
+Os arquivos dos documentos não são gravados no storage.
+
+Todos os usuários usam a senha SEED_PASSWORD, então servem para os outros benchmarks:
+
+    python -m benchmarks.seed_dataset --users 1000 --messages 1000  # ~1M mensagens
+    python -m benchmarks.chat_ttft --email seed-0@example.com --step-id <id do step llm_chat>
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+import random
+import time
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from pydantic_core import PydanticUndefined
+from sqlalchemy.engine.interfaces import DBAPICursor
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, SQLModel, select
+
+from api.schemas.llm_chat import (
+    ChatStructuredData,
+    EstruturaFamiliarData,
+    ImovelData,
+    InvestimentoData,
+    MembroFamiliaData,
+    OutroAtivoData,
+    ParticipacaoSocietariaData,
+)
+from core.config import settings
+from core.content_store import blob_key
+from core.database import async_engine, async_session_maker, engine
+from core.security import get_password_hash
+from core.user_crud import create_default_onboarding_flow
+from models.base import utcnow
+from models.conversation import Conversation, ConversationSummary, Message, SenderType
+from models.document import (
+    Document,
+    DocumentBlob,
+    DocumentExtractedData,
+    DocumentRequirement,
+    DocumentReview,
+)
+from models.onboarding import (
+    OnboardingFlow,
+    OnboardingStepType,
+    UserOnboardingFlow,
+    UserOnboardingStep,
+)
+from models.user import FamilyMember, User, UserProfile
+
+SEED_PASSWORD = "senha-seed"
+
+# Ordem de carga (chaves estrangeiras)
+TABLES: tuple[type[SQLModel], ...] = (
+    User,
+    UserProfile,
+    FamilyMember,
+    UserOnboardingFlow,
+    UserOnboardingStep,
+    Conversation,
+    Message,
+    ConversationSummary,
+    DocumentRequirement,
+    DocumentBlob,
+    Document,
+    DocumentExtractedData,
+    DocumentReview,
+)
+
+_NULL = r"\N"
+
+FIRST_NAMES = ("Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique")
+LAST_NAMES = ("Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Costa", "Almeida")
+CITIES = ("São Paulo - SP", "Rio de Janeiro - RJ", "Belo Horizonte - MG", "Curitiba - PR")
+PROPERTY_TYPES = ("apartamento", "casa", "terreno", "sala comercial", "galpão")
+SEGMENTS = ("comércio", "indústria", "serviços", "agronegócio", "tecnologia")
+INVESTMENT_TYPES = ("CDB", "Tesouro Direto", "ações", "fundo imobiliário", "previdência")
+DOCUMENT_STATUSES = (
+    ("validated", 40),
+    ("pending_review", 30),
+    ("uploaded", 10),
+    ("processing", 5),
+    ("ocr_failed", 5),
+    ("invalid", 10),
+)
+USER_TURNS = (
+    "Tenho um {tipo} em {cidade}, comprei faz uns {anos} anos.",
+    "O {tipo} está alugado, rende uns R$ {valor} por mês.",
+    "Sou sócio da {empresa}, tenho {percentual}% das cotas.",
+    "Sou casado em comunhão parcial, minha esposa se chama {nome}.",
+    "Temos {filhos} filhos, o mais velho tem {idade} anos.",
+    "Tenho cerca de R$ {valor} aplicados em {investimento}.",
+    "Não sei o valor exato, acho que uns R$ {valor}.",
+    "Pode me explicar por que isso é importante para a holding?",
+)
+LLM_TURNS = (
+    "Perfeito! Registrei o {tipo} em {cidade}. Para a estruturação patrimonial é importante "
+    "saber também a área e se há financiamento em aberto. Você tem essas informações?",
+    "Entendi. A renda de aluguel entra no planejamento tributário da holding, já que os "
+    "aluguéis recebidos pela pessoa jurídica podem ter tributação diferente da pessoa física.",
+    "Ótimo, anotei a participação na {empresa}. Você sabe o faturamento anual aproximado e o "
+    "CNPJ? Isso ajuda a avaliar se faz sentido integralizar as cotas na holding.",
+    "Obrigado! O regime de bens define como o patrimônio é dividido e influencia o desenho "
+    "da holding e do planejamento sucessório. Próximo passo: seus filhos e dependentes.",
+    "Anotado. Com esses dados já conseguimos montar uma proposta inicial de estrutura. "
+    "Quer revisar o resumo do que foi coletado até agora?",
+)
+EXTRACTED_FIELDS = ("nome", "cpf", "rg", "data_emissao", "orgao_emissor", "endereco", "valor")
+
+
+def _cpf(rng: random.Random) -> str:
+    """CPF com dígitos verificadores válidos"""
+    digits = [rng.randint(0, 9) for _ in range(9)]
+    for length in (9, 10):
+        total = sum(d * w for d, w in zip(digits, range(length + 1, 1, -1), strict=True))
+        digits.append(total * 10 % 11 % 10)
+    text = "".join(map(str, digits))
+    return f"{text[:3]}.{text[3:6]}.{text[6:9]}-{text[9:]}"
+
+
+def _money(rng: random.Random, low: int, high: int) -> str:
+    return str(rng.randrange(low, high, 1000))
+
+
+class CopyLoader:
+    """Acumula linhas por model em CSV e as carrega com COPY"""
+
+    def __init__(self) -> None:
+        self.dialect = engine.dialect
+        self.buffers: dict[type[SQLModel], io.StringIO] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, model: type[SQLModel], **values: object) -> None:
+        """Linha de `model`: colunas omitidas recebem o default do model"""
+        buffer = self.buffers.setdefault(model, io.StringIO())
+        csv.writer(buffer).writerow(self._row(model, values))
+
+    def _row(self, model: type[SQLModel], values: dict[str, object]) -> list[object]:
+        row = []
+        for column in model.__table__.columns:  # type: ignore
+            if column.name in values:
+                value = values[column.name]
+            else:
+                value = model.model_fields[column.name].get_default(call_default_factory=True)
+                if value is PydanticUndefined:
+                    raise ValueError(f"{model.__name__}.{column.name} é obrigatório")
+            # Mesma conversão do ORM (ex.: enums pelo nome, JSON serializado)
+            processor = column.type.bind_processor(self.dialect)
+            if processor is not None and value is not None:
+                value = processor(value)
+            row.append(_csv_value(value))
+        return row
+
+    def flush(self, cursor: DBAPICursor) -> None:
+        for model in TABLES:
+            buffer = self.buffers.pop(model, None)
+            if buffer is None:
+                continue
+            table = model.__table__  # type: ignore
+            columns = ", ".join(f'"{column.name}"' for column in table.columns)
+            buffer.seek(0)
+            cursor.copy_expert(  # type: ignore
+                f"COPY \"{table.name}\" ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')",
+                buffer,
+            )
+            self.counts[table.name] = self.counts.get(table.name, 0) + cursor.rowcount
+
+
+def _csv_value(value: object) -> object:
+    if value is None:
+        return _NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class DatasetGenerator:
+    def __init__(self, args: argparse.Namespace, flow: OnboardingFlow) -> None:
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.now = utcnow()
+        self.password_hash = get_password_hash(SEED_PASSWORD)
+        self.steps = {step.type: step for step in flow.steps}
+        self.requirements: dict[str, uuid.UUID] = {}
+        self.reviewers: list[uuid.UUID] = []
+
+    def load_requirements(self, session: Session) -> None:
+        """Reaproveita os requisitos já existentes do step de verificação (por doc_type)"""
+        step_id = self.steps[OnboardingStepType.DATA_VERIFICATION].id
+        rows = session.exec(
+            select(DocumentRequirement.doc_type, DocumentRequirement.id).where(
+                DocumentRequirement.step_id == step_id
+            )
+        ).all()
+        self.requirements = dict(rows)  # type: ignore
+
+    def reviewers_chunk(self, loader: CopyLoader) -> None:
+        for index in range(self.args.consultants):
+            user_id = uuid.uuid4()
+            loader.add(
+                User,
+                id=user_id,
+                email=f"{self.args.prefix}-consultor-{index}@example.com",
+                hashed_password=self.password_hash,
+                is_consultant=True,
+                is_admin=index == 0,
+            )
+            loader.add(UserProfile, user_id=user_id, full_name=self._name())
+            self.reviewers.append(user_id)
+
+    def users_chunk(
+        self,
+        loader: CopyLoader,
+        indexes: Iterable[int],
+        flow_ids: list[int],
+        step_ids: list[int],
+    ) -> None:
+        for index, flow_id in zip(indexes, flow_ids, strict=True):
+            self._user(loader, index, flow_id, step_ids[:3])
+            del step_ids[:3]
+
+    def _name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def _structured_data(self) -> ChatStructuredData:
+        rng = self.rng
+        married = rng.random() < 0.6
+        children = [
+            MembroFamiliaData(nome=self._name(), parentesco="filho(a)", idade=rng.randint(0, 35))
+            for _ in range(rng.choice((0, 1, 2, 2, 3)))
+        ]
+        return ChatStructuredData(
+            imoveis=[
+                ImovelData(
+                    tipo=rng.choice(PROPERTY_TYPES),
+                    localizacao=rng.choice(CITIES),
+                    status=rng.choice(("uso próprio", "alugado", "vago")),
+                    valor_estimado_str=(valor := _money(rng, 200_000, 5_000_000)),
+                    valor_estimado=float(valor),
+                    area=f"{rng.randint(40, 600)} m²",
+                )
+                for _ in range(rng.randint(0, 4))
+            ],
+            participacoes=[
+                ParticipacaoSocietariaData(
+                    empresa=f"{rng.choice(LAST_NAMES)} {rng.choice(SEGMENTS).title()} Ltda",
+                    segmento=rng.choice(SEGMENTS),
+                    participacao=f"{rng.choice((10, 25, 33, 50, 100))}%",
+                    faturamento_anual=_money(rng, 500_000, 50_000_000),
+                )
+                for _ in range(rng.randint(0, 2))
+            ],
+            estrutura_familiar=EstruturaFamiliarData(
+                estado_civil="casado" if married else rng.choice(("solteiro", "divorciado")),
+                regime_bens="comunhão parcial" if married else None,
+                conjuge=MembroFamiliaData(nome=self._name(), parentesco="cônjuge")
+                if married
+                else None,
+                filhos=children,
+            ),
+            investimentos=[
+                InvestimentoData(
+                    tipo=rng.choice(INVESTMENT_TYPES),
+                    valor_str=(valor := _money(rng, 10_000, 2_000_000)),
+                    valor=float(valor),
+                    instituicao=f"Banco {rng.choice(LAST_NAMES)}",
+                )
+                for _ in range(rng.randint(0, 3))
+            ],
+            outros_ativos=[
+                OutroAtivoData(tipo="veículo", descricao="carro de passeio", valor_str="90000")
+            ]
+            if rng.random() < 0.3
+            else [],
+        )
+
+    def _user(self, loader: CopyLoader, index: int, flow_id: int, step_ids: list[int]) -> None:
+        rng = self.rng
+        user_id = uuid.uuid4()
+        started = self.now - timedelta(days=rng.uniform(1, 365))
+        data = self._structured_data()
+        family = data.estrutura_familiar
+        assert family is not None
+
+        loader.add(
+            User,
+            id=user_id,
+            email=f"{self.args.prefix}-{index}@example.com",
+            hashed_password=self.password_hash,
+            created_at=started,
+            updated_at=started,
+        )
+        loader.add(
+            UserProfile,
+            user_id=user_id,
+            full_name=self._name(),
+            cpf=_cpf(rng),
+            phone_number=f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            address=f"Rua {rng.choice(LAST_NAMES)}, {rng.randint(1, 2000)} - {rng.choice(CITIES)}",
+            marital_status=family.estado_civil,
+            family_structure=family.model_dump(mode="json"),
+            created_at=started,
+            updated_at=started,
+        )
+        for member in ([family.conjuge] if family.conjuge else []) + family.filhos:
+            loader.add(
+                FamilyMember,
+                user_id=user_id,
+                name=member.nome,
+                relationship=member.parentesco,
+                is_dependent=member.parentesco != "cônjuge",
+            )
+
+        # Etapas: dados pessoais e entrevista concluídas para a maioria; verificação em curso
+        interview_done = rng.random() < 0.8
+        loader.add(
+            UserOnboardingFlow,
+            id=flow_id,
+            user_id=user_id,
+            flow_id=self.steps[OnboardingStepType.LLM_CHAT].flow_id,
+            started_at=started,
+        )
+        personal_step, chat_step, verification_step = step_ids
+        for user_step_id, step_type, completed, step_data in (
+            (personal_step, OnboardingStepType.PERSONAL_DATA, True, None),
+            (chat_step, OnboardingStepType.LLM_CHAT, interview_done, data.model_dump(mode="json")),
+            (verification_step, OnboardingStepType.DATA_VERIFICATION, False, None),
+        ):
+            loader.add(
+                UserOnboardingStep,
+                id=user_step_id,
+                user_flow_id=flow_id,
+                step_id=self.steps[step_type].id,
+                is_completed=completed,
+                started_at=started,
+                completed_at=started + timedelta(days=1) if completed else None,
+                data=step_data,
+            )
+
+        self._conversation(loader, user_id, started)
+        if interview_done:
+            self._documents(loader, user_id, verification_step, data, started)
+
+    def _conversation(self, loader: CopyLoader, user_id: uuid.UUID, started: datetime) -> None:
+        rng = self.rng
+        conversation_id = uuid.uuid4()
+        loader.add(
+            Conversation,
+            id=conversation_id,
+            user_id=user_id,
+            title=f"Chat LLM - Step {self.steps[OnboardingStepType.LLM_CHAT].id}",
+            is_llm=True,
+            onboarding_step_id=self.steps[OnboardingStepType.LLM_CHAT].id,
+            created_at=started,
+            updated_at=started,
+        )
+
+        count = round(self.args.messages * rng.uniform(0.5, 1.5))
+        created_at = started
+        timestamps = []
+        for position in range(count):
+            created_at += timedelta(seconds=rng.uniform(5, 300))
+            timestamps.append(created_at)
+            values = {
+                "tipo": rng.choice(PROPERTY_TYPES),
+                "cidade": rng.choice(CITIES),
+                "anos": rng.randint(1, 30),
+                "valor": _money(rng, 1_000, 900_000),
+                "empresa": f"{rng.choice(LAST_NAMES)} Ltda",
+                "percentual": rng.choice((10, 25, 50)),
+                "nome": rng.choice(FIRST_NAMES),
+                "filhos": rng.randint(1, 4),
+                "idade": rng.randint(1, 35),
+                "investimento": rng.choice(INVESTMENT_TYPES),
+            }
+            from_user = position % 2 == 0
+            template = rng.choice(USER_TURNS if from_user else LLM_TURNS)
+            loader.add(
+                Message,
+                conversation_id=conversation_id,
+                sender_id=user_id if from_user else None,
+                sender_type=SenderType.USER if from_user else SenderType.LLM,
+                content=template.format(**values),
+                created_at=created_at,
+                updated_at=created_at,
+            )
+
+        # Memória: mensagens fora da janela já resumidas (como após os checkpoints)
+        summarized = count - settings.CHAT_MEMORY_MAX_MESSAGES
+        if summarized >= settings.CHAT_MEMORY_SUMMARY_BATCH:
+            loader.add(
+                ConversationSummary,
+                conversation_id=conversation_id,
+                content="O cliente descreveu seus imóveis, participações e a família. "
+                "Faltam detalhes de valores e documentos.",
+                covers_until=timestamps[summarized - 1],
+                message_count=summarized,
+                created_at=timestamps[-1],
+                updated_at=timestamps[-1],
+            )
+
+    def _requirement(self, loader: CopyLoader, doc_type: str, user_id: uuid.UUID) -> uuid.UUID:
+        """Requisito do step de verificação por doc_type, criado uma vez (como na rota)"""
+        if doc_type not in self.requirements:
+            requirement_id = uuid.uuid4()
+            label = doc_type.replace("_", " ")
+            loader.add(
+                DocumentRequirement,
+                id=requirement_id,
+                step_id=self.steps[OnboardingStepType.DATA_VERIFICATION].id,
+                name=f"Comprovante: {label}",
+                description=f"Documento que comprove {label}",
+                doc_type=doc_type,
+                created_by_user_id=user_id,
+                priority=1,
+            )
+            self.requirements[doc_type] = requirement_id
+        return self.requirements[doc_type]
+
+    def _documents(
+        self,
+        loader: CopyLoader,
+        user_id: uuid.UUID,
+        user_step_id: int,
+        data: ChatStructuredData,
+        started: datetime,
+    ) -> None:
+        rng = self.rng
+        doc_types = [f"imovel_{i + 1}_posse" for i in range(len(data.imoveis))]
+        doc_types += [f"participacao_{i + 1}_comprovante" for i in range(len(data.participacoes))]
+        doc_types += [f"investimento_{i + 1}_comprovante" for i in range(len(data.investimentos))]
+        family = data.estrutura_familiar
+        if family and family.conjuge:
+            doc_types.append("certidao_casamento")
+        if family:
+            doc_types += [f"certidao_nascimento_filho_{i + 1}" for i in range(len(family.filhos))]
+
+        statuses, weights = zip(*DOCUMENT_STATUSES, strict=True)
+        for doc_type in doc_types[: self.args.documents]:
+            requirement_id = self._requirement(loader, doc_type, user_id)
+            document_id = uuid.uuid4()
+            size = rng.randint(50_000, 5_000_000)
+            sha256 = hashlib.sha256(document_id.bytes).hexdigest()
+            status = rng.choices(statuses, weights)[0]
+            uploaded_at = started + timedelta(days=rng.uniform(1, 30))
+            ocr_done = status in ("pending_review", "validated", "invalid")
+            reviewed = status in ("validated", "invalid")
+            reviewer = rng.choice(self.reviewers) if reviewed and self.reviewers else None
+
+            loader.add(
+                DocumentBlob,
+                sha256=sha256,
+                storage_path=blob_key(sha256),
+                size=size,
+                ref_count=1,
+            )
+            loader.add(
+                Document,
+                id=document_id,
+                user_step_id=user_step_id,
+                requirement_id=requirement_id,
+                file_path=blob_key(sha256),
+                original_filename=f"{doc_type}.pdf",
+                file_type="application",
+                file_size=size,
+                sha256=sha256,
+                content_type="application/pdf",
+                uploaded_by_id=user_id,
+                status=status,
+                rejection_reason="Documento ilegível" if status == "invalid" else None,
+                validated_by_user_id=reviewer,
+                validated_at=uploaded_at + timedelta(days=2) if reviewer else None,
+                ocr_processed=ocr_done,
+                ocr_confidence=round(rng.uniform(0.6, 0.99), 3) if ocr_done else None,
+                ocr_processed_at=uploaded_at + timedelta(minutes=5) if ocr_done else None,
+                created_at=uploaded_at,
+                updated_at=uploaded_at,
+            )
+            if ocr_done:
+                for field_name in rng.sample(EXTRACTED_FIELDS, rng.randint(3, 6)):
+                    loader.add(
+                        DocumentExtractedData,
+                        document_id=document_id,
+                        field_name=field_name,
+                        field_value=_cpf(rng) if field_name == "cpf" else f"{field_name} {size}",
+                        confidence=round(rng.uniform(0.5, 0.99), 3),
+                        extraction_method="ocr",
+                    )
+            if reviewer:
+                loader.add(
+                    DocumentReview,
+                    document_id=document_id,
+                    reviewer_id=reviewer,
+                    status="approved" if status == "validated" else "rejected",
+                    comments=None if status == "validated" else "Reenviar com melhor qualidade",
+                )
+
+
+async def _default_flow() -> OnboardingFlow:
+    """O fluxo padrão de onboarding, criado como no cadastro se ainda não existir"""
+    async with async_session_maker() as session:
+        flow = (
+            await session.exec(
+                select(OnboardingFlow)
+                .where(OnboardingFlow.name == "Cadastro de Usuário")
+                .options(selectinload(OnboardingFlow.steps))  # type: ignore
+            )
+        ).first()
+        if flow is None:
+            flow = await create_default_onboarding_flow(session)
+            await session.commit()
+    await async_engine.dispose()
+    return flow
+
+
+def _reserve_ids(cursor: DBAPICursor, table: str, count: int) -> list[int]:
+    """Ids de colunas serial reservados na sequence (as linhas vão por COPY com id explícito)"""
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        (table, count),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=200, help="média de mensagens/usuário")
+    parser.add_argument("--documents", type=int, default=4, help="máximo de documentos/usuário")
+    parser.add_argument("--consultants", type=int, default=5, help="revisores (o 1º é admin)")
+    parser.add_argument("--chunk", type=int, default=200, help="usuários por transação")
+    parser.add_argument("--prefix", default="seed", help="prefixo dos emails gerados")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine.echo = False
+    with Session(engine) as session:
+        if session.exec(
+            select(User.id).where(User.email.startswith(f"{args.prefix}-"))  # type: ignore
+        ).first():
+            parser.error(f"já existem usuários com o prefixo '{args.prefix}'; use outro --prefix")
+
+    generator = DatasetGenerator(args, asyncio.run(_default_flow()))
+    with Session(engine) as session:
+        generator.load_requirements(session)
+
+    loader = CopyLoader()
+    started = time.perf_counter()
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        generator.reviewers_chunk(loader)
+        for first in range(0, args.users, args.chunk):
+            indexes = range(first, min(first + args.chunk, args.users))
+            flow_ids = _reserve_ids(cursor, "useronboardingflow", len(indexes))
+            step_ids = _reserve_ids(cursor, "useronboardingstep", 3 * len(indexes))
+            generator.users_chunk(loader, indexes, flow_ids, step_ids)
+            loader.flush(cursor)
+            connection.commit()
+            print(
+                f"{indexes.stop}/{args.users} usuários, "
+                f"{loader.counts.get('message', 0)} mensagens "
+                f"({time.perf_counter() - started:.0f}s)",
+                flush=True,
+            )
+
+        # Estatísticas atualizadas para os planos refletirem o volume novo
+        connection.autocommit = True  # type: ignore
+        for model in TABLES:
+            cursor.execute(f'ANALYZE "{model.__tablename__}"')
+    finally:
+        connection.close()
+
+    for table, count in loader.counts.items():
+        print(f"{table:<24} {count:>10}")
+    print(f"total: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
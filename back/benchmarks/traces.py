@@ -0,0 +1,115 @@
+"""
+Visualiza os traces amostrados gravados em TRACING_FILE (veja core/tracing.py).
+
+Cada trace vira uma árvore com a duração de cada span e o início relativo à raiz, o que
+mostra onde está o tempo de um turno do chat: bootstrap no banco, histórico, modelo (com o
+primeiro token) ou tools.
+
+    python -m benchmarks.traces traces/spans.jsonl --route llm-chat --limit 5
+    python -m benchmarks.traces traces/spans.jsonl --slowest 10
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+# Atributos mostrados ao lado do nome do span, quando presentes
+SHOWN_ATTRIBUTES = (
+    "http.response.status_code",
+    "chat.history.messages",
+    "chat.history.tokens",
+    "gen_ai.usage.input_tokens",
+    "gen_ai.usage.output_tokens",
+    "chat.response_length",
+    "chat.tool.result_length",
+)
+
+
+def _timestamp(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+
+def load_traces(path: Path) -> dict[str, list[dict]]:
+    """Spans do arquivo agrupados por trace_id"""
+    traces: dict[str, list[dict]] = defaultdict(list)
+    with path.open(encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                span = json.loads(line)
+                traces[span["context"]["trace_id"]].append(span)
+    return traces
+
+
+def _root(spans: list[dict]) -> dict:
+    ids = {span["context"]["span_id"] for span in spans}
+    # Spans cujo pai não está no arquivo (ainda no buffer do exporter) também contam como raiz
+    return min(
+        (span for span in spans if span["parent_id"] not in ids),
+        key=lambda span: span["start_time"],
+    )
+
+
+def _duration_ms(span: dict) -> float:
+    return (_timestamp(span["end_time"]) - _timestamp(span["start_time"])) * 1000
+
+
+def _describe(span: dict, origin: float, depth: int) -> str:
+    offset = (_timestamp(span["start_time"]) - origin) * 1000
+    attributes = span["attributes"]
+    details = [f"{key}={attributes[key]}" for key in SHOWN_ATTRIBUTES if key in attributes]
+    for event in span["events"]:
+        if event["name"] == "first_token":
+            details.append(f"ttft={event['attributes']['chat.time_to_first_token_ms']:.0f}ms")
+        elif event["name"] == "exception":
+            details.append(f"erro={event['attributes'].get('exception.type')}")
+    line = f"{_duration_ms(span):9.1f}ms  +{offset:8.1f}ms  {'  ' * depth}{span['name']}"
+    return f"{line}  [{', '.join(details)}]" if details else line
+
+
+def print_trace(spans: list[dict]) -> None:
+    root = _root(spans)
+    origin = _timestamp(root["start_time"])
+    children: dict[str | None, list[dict]] = defaultdict(list)
+    for span in spans:
+        children[span["parent_id"]].append(span)
+
+    def walk(span: dict, depth: int) -> None:
+        print(_describe(span, origin, depth))
+        for child in sorted(children[span["context"]["span_id"]], key=lambda s: s["start_time"]):
+            walk(child, depth + 1)
+
+    print(f"trace {root['context']['trace_id']}  {root['start_time']}")
+    walk(root, 0)
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("file", type=Path, help="arquivo TRACING_FILE")
+    parser.add_argument("--route", help="só traces cuja raiz contenha este texto no nome")
+    parser.add_argument("--limit", type=int, default=10, help="traces mais recentes a mostrar")
+    parser.add_argument("--slowest", type=int, help="mostra os N traces mais lentos")
+    args = parser.parse_args()
+
+    roots = []
+    for spans in load_traces(args.file).values():
+        root = _root(spans)
+        if args.route and args.route not in root["name"]:
+            continue
+        roots.append((root, spans))
+
+    if args.slowest:
+        roots.sort(key=lambda item: _duration_ms(item[0]), reverse=True)
+        selected = roots[: args.slowest]
+    else:
+        roots.sort(key=lambda item: item[0]["start_time"])
+        selected = roots[-args.limit :]
+
+    for _, spans in selected:
+        print_trace(spans)
+
+
+if __name__ == "__main__":
+    main()
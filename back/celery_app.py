@@ -1,18 +1,80 @@
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_ready
+from kombu import Queue
 
+from core import metrics
 from core.config import settings
 
 celery_app = Celery(
     "w1_holdings",
     broker=str(settings.CELERY_BROKER_URL),
     backend=str(settings.CELERY_RESULT_BACKEND),
-    include=["tasks"],
+    include=["tasks.document_tasks", "tasks.maintenance_tasks"],
 )
 
+# Filas nomeadas: cada grupo de workers consome só as suas (celery worker -Q ...), então
+# um backlog de OCR pesado não atrasa tasks curtas nem a manutenção
+QUEUE_OCR_HEAVY = "ocr-heavy"  # OCR por página (longo, CPU)
+QUEUE_OCR_LIGHT = "ocr-light"  # orquestração do OCR: divisão em páginas, merge, cache
+QUEUE_MAINTENANCE = "maintenance"
+
+# Prioridades no broker Redis: quanto MENOR o número, antes a task sai da fila
+PRIORITY_INTERACTIVE = 0  # ex.: reprocessamento pedido por um consultor
+PRIORITY_DEFAULT = 5
+
 celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Filas e roteamento
+    task_queues=[
+        Queue(QUEUE_OCR_HEAVY),
+        Queue(QUEUE_OCR_LIGHT),
+        Queue(QUEUE_MAINTENANCE),
+    ],
+    task_default_queue=QUEUE_OCR_LIGHT,
+    task_routes={
+        "tasks.document_tasks.ocr_page_task": {"queue": QUEUE_OCR_HEAVY},
+        "tasks.document_tasks.*": {"queue": QUEUE_OCR_LIGHT},
+        "tasks.maintenance_tasks.*": {"queue": QUEUE_MAINTENANCE},
+    },
+    # Prioridades: o Redis as emula com uma lista por faixa (priority_steps)
+    task_default_priority=PRIORITY_DEFAULT,
+    broker_transport_options={
+        "queue_order_strategy": "priority",
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        # Tasks com acks_late voltam à fila se não forem confirmadas nesse tempo;
+        # precisa ser maior que a task mais longa
+        "visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT_SECONDS,
+    },
+    # OCR é longo: cada processo reserva só a task que vai executar (sem prefetch que
+    # deixaria tasks presas atrás de um OCR lento) e só confirma ao terminar, para que a
+    # task volte à fila se o worker morrer
+    worker_prefetch_multiplier=settings.CELERY_WORKER_PREFETCH_MULTIPLIER,
+    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Resultados só são lidos pelos chords (ocr_page_task); o resto é fire-and-forget
+    task_ignore_result=True,
+    result_expires=60 * 60,
+    # Tarefas periódicas (processo `celery -A celery_app beat`)
+    beat_schedule={
+        "collect-orphan-blobs": {
+            "task": "tasks.maintenance_tasks.collect_orphan_blobs_task",
+            "schedule": settings.CELERY_ORPHAN_BLOBS_INTERVAL_SECONDS,
+        },
+    },
 )
+
+# Métricas: duração das tasks (em cada processo) e, opcionalmente, um /metrics por worker
+task_prerun.connect(metrics.on_task_prerun)
+task_postrun.connect(metrics.on_task_postrun)
+
+
+@worker_ready.connect
+def start_metrics_server(**_: object) -> None:
+    if settings.CELERY_METRICS_PORT:
+        metrics.start_worker_metrics_server(settings.CELERY_METRICS_PORT)
@@ -0,0 +1,332 @@
+"""Cache incremental do histórico das conversas do chat LLM."""
+
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import redis
+import redis.asyncio as aioredis
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    UserPromptPart,
+)
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.conversation import ConversationSummary, Message, SenderType
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HistoryEntry:
+    """Mensagem do histórico, já convertida uma única vez para o formato do PydanticAI"""
+
+    sender_type: SenderType
+    content: str
+    created_at: datetime
+    model_message: ModelMessage | None = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.model_message = to_model_message(self)
+
+    @classmethod
+    def from_message(cls, message: Message) -> "HistoryEntry":
+        return cls(message.sender_type, message.content, message.created_at)
+
+
+@dataclass
+class HistoryState:
+    """Resumo mais recente + mensagens posteriores a ele (mais antigas primeiro)"""
+
+    summary: str | None = None
+    summary_until: datetime | None = None
+    entries: list[HistoryEntry] = field(default_factory=list)
+
+
+def to_model_message(entry: HistoryEntry) -> ModelMessage | None:
+    """Converte uma mensagem do histórico para o formato do PydanticAI"""
+    if entry.sender_type == SenderType.USER:
+        return ModelRequest(
+            parts=[UserPromptPart(content=entry.content, timestamp=entry.created_at)]
+        )
+    if entry.sender_type == SenderType.LLM:
+        return ModelResponse(parts=[TextPart(content=entry.content)], timestamp=entry.created_at)
+    if entry.sender_type == SenderType.SYSTEM:
+        return ModelRequest(
+            parts=[SystemPromptPart(content=entry.content, timestamp=entry.created_at)]
+        )
+    # Ignora outros tipos como CONSULTANT por enquanto
+    return None
+
+
+# Append atômico: só estende o histórico se ele estiver no Redis; caso contrário apenas
+# avança a versão, e o próximo load reconstrói a partir do banco.
+_APPEND_LUA = """
+local max_entries = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('INCR', KEYS[3])
+    redis.call('EXPIRE', KEYS[3], ttl)
+    return 0
+end
+redis.call('RPUSH', KEYS[2], ARGV[1])
+redis.call('LTRIM', KEYS[2], -max_entries, -1)
+local version = redis.call('INCR', KEYS[3])
+redis.call('HSET', KEYS[1], 'version', version)
+redis.call('EXPIRE', KEYS[1], ttl)
+redis.call('EXPIRE', KEYS[2], ttl)
+redis.call('EXPIRE', KEYS[3], ttl)
+return version
+"""
+
+# Grava o histórico lido do banco apenas se ninguém alterou a conversa desde a leitura
+# da versão (evita sobrescrever um append concorrente com dados antigos).
+_POPULATE_LUA = """
+local version = tonumber(redis.call('GET', KEYS[3]) or '0')
+if version ~= tonumber(ARGV[1]) then
+    return 0
+end
+local ttl = tonumber(ARGV[2])
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('HSET', KEYS[1], 'version', version, 'summary', ARGV[3], 'summary_until', ARGV[4])
+for i = 5, #ARGV do
+    redis.call('RPUSH', KEYS[2], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ttl)
+redis.call('EXPIRE', KEYS[2], ttl)
+redis.call('EXPIRE', KEYS[3], ttl)
+return 1
+"""
+
+
+class ChatHistoryCache:
+    """
+    Cache em dois níveis do histórico de cada conversa, atualizado incrementalmente.
+
+    - Nível local: LRU em processo com o histórico já convertido para o PydanticAI.
+    - Nível Redis (opcional): histórico compartilhado entre workers/nós, com uma versão por
+      conversa incrementada a cada append/invalidação. Um hit local só é usado se a versão
+      local for a mesma do Redis (um GET por turno).
+
+    Sem Redis, o hit local é validado no banco por uma query O(1) (dois lookups nos índices
+    de mensagem e resumo), o que mantém vários workers coerentes sem infraestrutura extra.
+
+    Guarda no máximo `max_entries` mensagens após o resumo, o mesmo limite da query de
+    `ChatMemory.load`, para que cache e banco produzam o mesmo contexto.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_conversations: int,
+        ttl_seconds: int,
+        redis_url: str | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        # conversation_id -> (versão, histórico)
+        self._local: OrderedDict[uuid.UUID, tuple[object, HistoryState]] = OrderedDict()
+        self._redis = aioredis.from_url(redis_url) if redis_url else None
+        if self._redis is not None:
+            self._append_script = self._redis.register_script(_APPEND_LUA)
+            self._populate_script = self._redis.register_script(_POPULATE_LUA)
+
+    @staticmethod
+    def _keys(conversation_id: uuid.UUID) -> list[str]:
+        # Hash tag: as três chaves ficam no mesmo slot num Redis Cluster
+        prefix = f"{{chat:{conversation_id}}}"
+        return [f"{prefix}:meta", f"{prefix}:entries", f"{prefix}:version"]
+
+    async def load(
+        self,
+        session: AsyncSession,
+        conversation_id: uuid.UUID,
+        fetch: Callable[[], Awaitable[HistoryState]],
+    ) -> HistoryState:
+        """Retorna o histórico da conversa, usando `fetch` (query no banco) em um miss"""
+        if self._redis is None:
+            return await self._load_local(session, conversation_id, fetch)
+
+        try:
+            return await self._load_redis(conversation_id, fetch)
+        except redis.RedisError:
+            logger.warning("Histórico do chat: Redis indisponível na leitura", exc_info=True)
+            self._local.pop(conversation_id, None)
+            return await fetch()
+
+    async def append(self, conversation_id: uuid.UUID, message: Message) -> None:
+        """Acrescenta ao histórico em cache uma mensagem já persistida"""
+        entry = HistoryEntry.from_message(message)
+
+        if self._redis is None:
+            cached = self._local.get(conversation_id)
+            if cached:
+                self._set_local(conversation_id, self._token(cached[1], entry), cached[1], entry)
+            return
+
+        try:
+            version = await self._append_script(
+                keys=self._keys(conversation_id),
+                args=[_encode_entry(entry), self.max_entries, self.ttl_seconds],
+            )
+        except redis.RedisError:
+            logger.warning("Histórico do chat: Redis indisponível na escrita", exc_info=True)
+            self._local.pop(conversation_id, None)
+            return
+
+        cached = self._local.get(conversation_id)
+        if version and cached and cached[0] == version - 1:
+            self._set_local(conversation_id, version, cached[1], entry)
+        else:
+            self._local.pop(conversation_id, None)
+
+    async def invalidate(self, conversation_id: uuid.UUID) -> None:
+        """Descarta o histórico em cache (reset da conversa, novo resumo)"""
+        self._local.pop(conversation_id, None)
+
+        if self._redis is None:
+            return
+        meta_key, entries_key, version_key = self._keys(conversation_id)
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.delete(meta_key, entries_key)
+                pipe.incr(version_key)
+                pipe.expire(version_key, self.ttl_seconds)
+                await pipe.execute()
+        except redis.RedisError:
+            logger.warning(
+                "Histórico do chat: falha ao invalidar %s no Redis", conversation_id, exc_info=True
+            )
+
+    async def _load_local(
+        self,
+        session: AsyncSession,
+        conversation_id: uuid.UUID,
+        fetch: Callable[[], Awaitable[HistoryState]],
+    ) -> HistoryState:
+        cached = self._local.get(conversation_id)
+        if cached:
+            latest_message = (
+                select(func.max(Message.created_at))
+                .where(Message.conversation_id == conversation_id)
+                .scalar_subquery()
+            )
+            latest_summary = (
+                select(func.max(ConversationSummary.covers_until))
+                .where(ConversationSummary.conversation_id == conversation_id)
+                .scalar_subquery()
+            )
+            token = (await session.exec(select(latest_message, latest_summary))).one()
+            if tuple(value and _naive(value) for value in token) == cached[0]:
+                self._local.move_to_end(conversation_id)
+                return cached[1]
+
+        state = await fetch()
+        self._set_local(conversation_id, self._token(state), state)
+        return state
+
+    async def _load_redis(
+        self, conversation_id: uuid.UUID, fetch: Callable[[], Awaitable[HistoryState]]
+    ) -> HistoryState:
+        assert self._redis is not None
+        meta_key, entries_key, version_key = self._keys(conversation_id)
+
+        version = int(await self._redis.get(version_key) or 0)
+        cached = self._local.get(conversation_id)
+        if cached and cached[0] == version:
+            self._local.move_to_end(conversation_id)
+            return cached[1]
+
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(meta_key)
+            pipe.lrange(entries_key, 0, -1)
+            meta, raw_entries = await pipe.execute()
+        if meta and int(meta[b"version"]) == version:
+            state = HistoryState(
+                summary=meta[b"summary"].decode() or None,
+                summary_until=_parse_datetime(meta[b"summary_until"].decode()),
+                entries=[_decode_entry(raw) for raw in raw_entries],
+            )
+            self._set_local(conversation_id, version, state)
+            return state
+
+        state = await fetch()
+        populated = await self._populate_script(
+            keys=self._keys(conversation_id),
+            args=[
+                version,
+                self.ttl_seconds,
+                state.summary or "",
+                state.summary_until.isoformat() if state.summary_until else "",
+                *(_encode_entry(entry) for entry in state.entries),
+            ],
+        )
+        if populated:
+            self._set_local(conversation_id, version, state)
+        return state
+
+    def _set_local(
+        self,
+        conversation_id: uuid.UUID,
+        version: object,
+        state: HistoryState,
+        new_entry: HistoryEntry | None = None,
+    ) -> None:
+        if new_entry is not None:
+            # Cópia: quem recebeu o estado anterior em `load` continua vendo o mesmo histórico
+            entries = [*state.entries, new_entry][-self.max_entries :]
+            state = HistoryState(state.summary, state.summary_until, entries)
+        self._local[conversation_id] = (version, state)
+        self._local.move_to_end(conversation_id)
+        while len(self._local) > self.max_conversations:
+            self._local.popitem(last=False)
+
+    @staticmethod
+    def _token(
+        state: HistoryState, new_entry: HistoryEntry | None = None
+    ) -> tuple[datetime | None, datetime | None]:
+        """Versão sem Redis: (última mensagem, último resumo), comparada com o banco"""
+        last = new_entry or (state.entries[-1] if state.entries else None)
+        return (
+            _naive(last.created_at) if last else None,
+            _naive(state.summary_until) if state.summary_until else None,
+        )
+
+
+def _encode_entry(entry: HistoryEntry) -> str:
+    return json.dumps([entry.sender_type.value, entry.content, entry.created_at.isoformat()])
+
+
+def _decode_entry(raw: bytes) -> HistoryEntry:
+    sender_type, content, created_at = json.loads(raw)
+    return HistoryEntry(SenderType(sender_type), content, datetime.fromisoformat(created_at))
+
+
+def _naive(value: datetime) -> datetime:
+    # Entradas gravadas no cache antes de models.base.utcnow ainda podem ter tzinfo=UTC
+    return value.replace(tzinfo=None)
+
+
+def _parse_datetime(value: str) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+chat_history_cache = ChatHistoryCache(
+    max_entries=settings.CHAT_MEMORY_MAX_MESSAGES + settings.CHAT_MEMORY_SUMMARY_BATCH,
+    max_conversations=settings.CHAT_HISTORY_CACHE_MAX_CONVERSATIONS,
+    ttl_seconds=settings.CHAT_HISTORY_CACHE_TTL_SECONDS,
+    redis_url=str(settings.CHAT_HISTORY_CACHE_REDIS_URL)
+    if settings.CHAT_HISTORY_CACHE_REDIS_URL
+    else None,
+)
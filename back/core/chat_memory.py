@@ -0,0 +1,231 @@
+"""
+Memória das conversas do chat LLM.
+
+O contexto de cada turno é o resumo acumulado das mensagens antigas (checkpoint) mais as
+últimas mensagens na íntegra, limitadas por quantidade e por um orçamento de tokens. Assim o
+custo e a latência do prompt ficam estáveis mesmo em entrevistas longas.
+"""
+
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelMessage, ModelRequest, SystemPromptPart
+from sqlalchemy import true
+from sqlmodel import delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.chat_history_cache import (
+    ChatHistoryCache,
+    HistoryEntry,
+    HistoryState,
+    chat_history_cache,
+)
+from core.config import settings
+from core.database import async_session_maker
+from models.conversation import ConversationSummary, Message, SenderType
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token)"""
+    return len(text) // 4
+
+
+SUMMARY_PROMPT = """
+Você resume entrevistas de estruturação patrimonial entre um assistente e um cliente.
+
+Atualize o resumo existente com as novas mensagens. Preserve todos os fatos concretos
+(imóveis, empresas, participações, familiares, investimentos, valores, datas, documentos) e
+as dúvidas ainda em aberto. Escreva em português, em tópicos curtos, sem inventar nada.
+"""
+
+_SENDER_LABELS = {
+    SenderType.USER: "Cliente",
+    SenderType.LLM: "Assistente",
+    SenderType.SYSTEM: "Sistema",
+    SenderType.CONSULTANT: "Consultor",
+}
+
+
+@dataclass
+class ConversationMemory:
+    """Contexto de um turno montado a partir do histórico"""
+
+    messages: list[ModelMessage] = field(default_factory=list)
+    # Mensagens fora da janela ainda sem resumo; a partir de CHAT_MEMORY_SUMMARY_BATCH, um
+    # checkpoint resume tudo que for anterior a `window_start`
+    unsummarized: int = 0
+    window_start: datetime | None = None
+    tokens: int = 0
+
+
+class ChatMemory:
+    """Janela deslizante de mensagens com checkpoints de resumo"""
+
+    def __init__(
+        self,
+        max_messages: int,
+        token_budget: int,
+        summary_batch: int,
+        cache: ChatHistoryCache,
+    ) -> None:
+        self.max_messages = max_messages
+        self.token_budget = token_budget
+        self.summary_batch = summary_batch
+        self.cache = cache
+        self.summarizer = Agent("openai:gpt-4o-mini", instructions=SUMMARY_PROMPT)
+        self._checkpoints: dict[uuid.UUID, asyncio.Task[None]] = {}
+
+    async def load(self, session: AsyncSession, conversation_id: uuid.UUID) -> ConversationMemory:
+        """Monta o contexto do turno a partir do histórico em cache (ou do banco, num miss)"""
+        state = await self.cache.load(
+            session, conversation_id, lambda: self._fetch(session, conversation_id)
+        )
+
+        memory = ConversationMemory()
+        window: list[HistoryEntry] = []
+        for entry in reversed(state.entries):
+            tokens = estimate_tokens(entry.content)
+            if len(window) >= self.max_messages or (
+                window and memory.tokens + tokens > self.token_budget
+            ):
+                break
+            window.append(entry)
+            memory.tokens += tokens
+
+        if state.summary:
+            memory.messages.append(
+                ModelRequest(
+                    parts=[
+                        SystemPromptPart(content=f"Resumo da conversa até aqui:\n{state.summary}")
+                    ]
+                )
+            )
+        memory.messages.extend(
+            entry.model_message for entry in reversed(window) if entry.model_message is not None
+        )
+        memory.unsummarized = len(state.entries) - len(window)
+        memory.window_start = window[-1].created_at if window else None
+        return memory
+
+    async def append(self, conversation_id: uuid.UUID, message: Message) -> None:
+        """Registra no histórico em cache uma mensagem já commitada"""
+        await self.cache.append(conversation_id, message)
+
+    async def _fetch(self, session: AsyncSession, conversation_id: uuid.UUID) -> HistoryState:
+        """
+        Lê o histórico do banco em uma única query indexada.
+
+        O resumo mais recente vem junto de cada mensagem por um LEFT JOIN com uma subquery de
+        no máximo uma linha; só são lidas mensagens posteriores ao resumo, limitadas à janela
+        mais um lote de checkpoint.
+        """
+        latest_summary = (
+            select(ConversationSummary.content, ConversationSummary.covers_until)
+            .where(ConversationSummary.conversation_id == conversation_id)
+            .order_by(ConversationSummary.covers_until.desc())  # type: ignore
+            .limit(1)
+            .subquery()
+        )
+        stmt = (
+            select(Message, latest_summary.c.content, latest_summary.c.covers_until)
+            .outerjoin(latest_summary, true())
+            .where(
+                Message.conversation_id == conversation_id,
+                (latest_summary.c.covers_until.is_(None))
+                | (Message.created_at > latest_summary.c.covers_until),  # type: ignore
+            )
+            .order_by(Message.created_at.desc())  # type: ignore
+            .limit(self.cache.max_entries)
+        )
+        rows = (await session.exec(stmt)).all()  # type: ignore
+        if not rows:
+            return HistoryState()
+
+        _, summary, summary_until = rows[0]
+        return HistoryState(
+            summary=summary,
+            summary_until=summary_until,
+            entries=[HistoryEntry.from_message(message) for message, _, _ in reversed(rows)],
+        )
+
+    def schedule_checkpoint(self, conversation_id: uuid.UUID, memory: ConversationMemory) -> None:
+        """Dispara, em background, o resumo das mensagens que saíram da janela (se preciso)"""
+        if memory.unsummarized < self.summary_batch or memory.window_start is None:
+            return
+        if conversation_id in self._checkpoints:
+            return
+        task = asyncio.create_task(self.checkpoint(conversation_id, memory.window_start))
+        self._checkpoints[conversation_id] = task
+        task.add_done_callback(lambda _: self._checkpoints.pop(conversation_id, None))
+
+    async def checkpoint(self, conversation_id: uuid.UUID, before: datetime) -> None:
+        """Resume o resumo anterior + as mensagens sem resumo anteriores a `before`"""
+        try:
+            async with async_session_maker() as session:
+                previous = (
+                    await session.exec(
+                        select(ConversationSummary)
+                        .where(ConversationSummary.conversation_id == conversation_id)
+                        .order_by(ConversationSummary.covers_until.desc())  # type: ignore
+                        .limit(1)
+                    )
+                ).first()
+                stmt = select(Message).where(
+                    Message.conversation_id == conversation_id,
+                    Message.created_at < before,
+                )
+                if previous:
+                    stmt = stmt.where(Message.created_at > previous.covers_until)
+                messages = (await session.exec(stmt.order_by(Message.created_at))).all()  # type: ignore
+                if not messages:
+                    return
+                # Não segura a conexão durante a chamada ao modelo
+                await session.commit()
+
+                transcript = "\n".join(
+                    f"{_SENDER_LABELS[message.sender_type]}: {message.content}"
+                    for message in messages
+                )
+                result = await self.summarizer.run(
+                    f"Resumo atual:\n{previous.content if previous else '(vazio)'}\n\n"
+                    f"Novas mensagens:\n{transcript}"
+                )
+
+                session.add(
+                    ConversationSummary(
+                        conversation_id=conversation_id,
+                        content=result.output,
+                        covers_until=messages[-1].created_at,
+                        message_count=(previous.message_count if previous else 0) + len(messages),
+                    )
+                )
+                await session.commit()
+            await self.cache.invalidate(conversation_id)
+        except Exception:
+            logger.exception("Falha ao resumir a conversa %s", conversation_id)
+
+    async def clear(self, session: AsyncSession, conversation_id: uuid.UUID) -> None:
+        """Remove os resumos da conversa (o commit e o `invalidate` ficam com o chamador)"""
+        await session.exec(
+            delete(ConversationSummary).where(
+                ConversationSummary.conversation_id == conversation_id  # type: ignore
+            )
+        )
+
+    async def invalidate(self, conversation_id: uuid.UUID) -> None:
+        """Descarta o histórico em cache da conversa"""
+        await self.cache.invalidate(conversation_id)
+
+
+chat_memory = ChatMemory(
+    max_messages=settings.CHAT_MEMORY_MAX_MESSAGES,
+    token_budget=settings.CHAT_MEMORY_TOKEN_BUDGET,
+    summary_batch=settings.CHAT_MEMORY_SUMMARY_BATCH,
+    cache=chat_history_cache,
+)
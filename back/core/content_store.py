@@ -0,0 +1,195 @@
+"""
+Armazenamento endereçado por conteúdo dos documentos enviados.
+
+Cada conteúdo é gravado uma única vez no storage, na chave `blobs/ab/cd/<sha256>`, e registrado
+em `DocumentBlob`, cujo `ref_count` conta quantos `Document` apontam para ele. Reenvios do
+mesmo arquivo (outra exigência, retry após erro) só incrementam a contagem.
+"""
+
+import logging
+import os
+import tempfile
+from typing import BinaryIO
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapper, SessionTransaction, selectinload
+from sqlmodel import Session, select, update
+
+from core.ocr.engine import FieldCandidate
+from core.ocr.pipeline import STATUS_PENDING_REVIEW, STATUS_UPLOADED
+from core.ocr.writer import write_extracted_fields
+from core.storage import storage
+from core.uploads import stage_upload
+from models.base import utcnow
+from models.document import Document, DocumentBlob
+
+logger = logging.getLogger(__name__)
+
+# session.info: conteúdos enviados ao storage na transação atual, ainda sem commit
+_PENDING_BLOBS = "content_store_pending_blobs"
+
+
+def blob_key(sha256: str) -> str:
+    """Chave do conteúdo no storage (dois níveis de prefixo para não lotar um diretório só)"""
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def store_document_content(
+    session: Session,
+    source: BinaryIO,
+    max_size: int,
+    content_type: str | None = None,
+) -> DocumentBlob:
+    """
+    Grava `source` no store e registra uma nova referência ao conteúdo.
+
+    O upload é copiado em blocos para um arquivo temporário local enquanto o hash é
+    calculado, e só é enviado ao storage se o conteúdo ainda não existe lá. O incremento do
+    `ref_count` é um upsert atômico, seguro com uploads concorrentes do mesmo arquivo. A
+    referência só vale após o commit da sessão, junto com o `Document` que a usa; se a
+    transação não for confirmada, o conteúdo enviado aqui fica para o collect_orphan_blobs.
+
+    Raises:
+        UploadTooLargeError: se o conteúdo passar de `max_size` bytes.
+    """
+    staged = stage_upload(source, tempfile.gettempdir(), max_size)
+    try:
+        now = utcnow()
+        stmt = insert(DocumentBlob).values(
+            sha256=staged.sha256,
+            storage_path=blob_key(staged.sha256),
+            size=staged.size,
+            ref_count=1,
+            created_at=now,
+            updated_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DocumentBlob.sha256],
+            set_={"ref_count": DocumentBlob.ref_count + 1, "updated_at": now},
+        )
+        session.exec(stmt)  # type: ignore
+
+        blob = session.get(DocumentBlob, staged.sha256, populate_existing=True)
+        assert blob is not None
+
+        # O upsert trava a linha até o commit, então o collect_orphan_blobs não apaga o
+        # conteúdo daqui em diante
+        if not storage.exists(blob.storage_path):
+            with open(staged.path, "rb") as staged_file:
+                storage.put(blob.storage_path, staged_file, content_type)
+            session.info.setdefault(_PENDING_BLOBS, {})[blob.sha256] = {
+                "storage_path": blob.storage_path,
+                "size": blob.size,
+            }
+    finally:
+        os.remove(staged.path)
+
+    return blob
+
+
+def reuse_extracted_data(session: Session, document: Document) -> bool:
+    """
+    Copia o resultado de OCR de outro documento com o mesmo conteúdo, se houver.
+
+    Retorna True se o documento já ficou processado (e o OCR pode ser pulado).
+    """
+    if not document.sha256:
+        return False
+
+    source = session.exec(
+        select(Document)
+        .where(
+            Document.sha256 == document.sha256,
+            Document.id != document.id,
+            Document.ocr_processed == True,  # noqa: E712
+        )
+        .options(selectinload(Document.extracted_data))  # type: ignore
+        .order_by(Document.ocr_processed_at.desc())  # type: ignore
+        .limit(1)
+    ).first()
+    if not source:
+        return False
+
+    by_method: dict[str, list[FieldCandidate]] = {}
+    for data in source.extracted_data:
+        by_method.setdefault(data.extraction_method, []).append(
+            FieldCandidate(
+                field_name=data.field_name,
+                value=data.field_value,
+                confidence=data.confidence,
+                page_number=0,
+            )
+        )
+    for extraction_method, fields in by_method.items():
+        write_extracted_fields(session, document.id, fields, extraction_method)
+    document.ocr_processed = True
+    document.ocr_confidence = source.ocr_confidence
+    document.ocr_processed_at = source.ocr_processed_at
+    if document.status == STATUS_UPLOADED:
+        document.status = STATUS_PENDING_REVIEW
+    session.add(document)
+    return True
+
+
+def collect_orphan_blobs(session: Session) -> int:
+    """Remove do disco e do banco os conteúdos sem nenhuma referência; retorna quantos"""
+    # Linhas travadas por um upload em andamento (que vai reaproveitá-las) são puladas
+    orphans = session.exec(
+        select(DocumentBlob).where(DocumentBlob.ref_count <= 0).with_for_update(skip_locked=True)
+    ).all()
+    for blob in orphans:
+        storage.delete(blob.storage_path)
+        session.delete(blob)
+    session.commit()
+    return len(orphans)
+
+
+@event.listens_for(Document, "after_delete")
+def _release_blob_on_delete(mapper: Mapper, connection: Connection, target: Document) -> None:
+    """Documento apagado: libera a referência (o arquivo sai no próximo collect_orphan_blobs)"""
+    if target.sha256:
+        connection.execute(
+            update(DocumentBlob)
+            .where(DocumentBlob.sha256 == target.sha256)  # type: ignore
+            .values(ref_count=DocumentBlob.ref_count - 1)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_blobs(session: Session) -> None:
+    session.info.pop(_PENDING_BLOBS, None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_uncommitted_blobs(session: Session, transaction: SessionTransaction) -> None:
+    """
+    Rollback (ou sessão fechada sem commit) após enviar conteúdo ao storage.
+
+    O arquivo não é apagado aqui: outro upload do mesmo conteúdo pode já estar usando-o. Em
+    vez disso, a linha do blob volta como órfã (ref_count 0, se ninguém a criou nesse meio
+    tempo) e o collect_orphan_blobs a remove com o mesmo controle de concorrência de sempre.
+    """
+    if transaction.parent is not None:
+        return
+    pending = session.info.pop(_PENDING_BLOBS, None)
+    if not pending:
+        return
+
+    now = utcnow()
+    stmt = (
+        insert(DocumentBlob)
+        .values(
+            [
+                {"sha256": sha256, **blob, "ref_count": 0, "created_at": now, "updated_at": now}
+                for sha256, blob in pending.items()
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=[DocumentBlob.sha256])
+    )
+    try:
+        with session.get_bind().begin() as connection:
+            connection.execute(stmt)
+    except Exception:
+        logger.exception("Falha ao registrar conteúdos órfãos: %s", list(pending))
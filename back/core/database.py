@@ -1,19 +1,40 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core.config import settings
+from core.db_instrumentation import instrument_engine
+from core.metrics import instrument_pool
 
 engine = create_engine(
     str(settings.DATABASE_URL),
-    echo=True,
+    echo=settings.DB_ECHO,
     pool_pre_ping=True,
     poolclass=QueuePool,
     pool_size=10,
     max_overflow=20,
 )
 
+async_engine: AsyncEngine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    echo=settings.DB_ECHO,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+instrument_pool(engine, "sync")
+instrument_pool(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: em sessões assíncronas não há lazy load implícito, então os
+# objetos precisam continuar legíveis depois do commit sem um novo round-trip.
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 
 def create_db_and_tables() -> None:
     """Creates all tables in the database"""
@@ -24,3 +45,9 @@ def get_session() -> Generator[Session]:
     """Dependency to get a DB session"""
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession]:
+    """Dependency to get an async DB session (asyncpg)"""
+    async with async_session_maker() as session:
+        yield session
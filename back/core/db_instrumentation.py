@@ -0,0 +1,126 @@
+"""Tempo de cada query SQL, log de queries lentas e totais por request (Server-Timing)."""
+
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import Connection, ExceptionContext, ExecutionContext
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class QueryStats:
+    """Queries executadas durante uma request"""
+
+    count: int = 0
+    total_seconds: float = 0.0
+
+
+# Stats da request atual; None fora de uma request (Celery, scripts)
+_request_stats: ContextVar[QueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def normalize_sql(statement: str, max_length: int = 1000) -> str:
+    """SQL em uma linha (os valores já vêm como placeholders), truncado para o log"""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    return sql if len(sql) <= max_length else f"{sql[:max_length]}..."
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: ExecutionContext,
+    executemany: bool,
+) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: ExecutionContext,
+    executemany: bool,
+) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_seconds += elapsed
+
+    if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        logger.warning("Query lenta (%.1f ms): %s", elapsed * 1000, normalize_sql(statement))
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    # A query falhou: descarta o início registrado para não desalinhar a pilha
+    conn = context.connection
+    if conn is not None and conn.info.get("query_started_at"):
+        conn.info["query_started_at"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra os listeners de tempo no engine (para AsyncEngine, use `.sync_engine`)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class SQLTimingMiddleware:
+    """
+    Conta as queries e o tempo de banco de cada request e os devolve no header
+    `Server-Timing` (ex.: `db;dur=12.3;desc="5 queries"`), visível no DevTools do navegador.
+
+    Middleware ASGI puro (não BaseHTTPMiddleware) para não bufferizar respostas em
+    streaming. Nelas o header sai antes do corpo, então cobre só o trabalho anterior ao
+    primeiro byte; o total da request vai para o log se passar do orçamento
+    DB_REQUEST_QUERY_BUDGET.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.total_seconds * 1000:.1f};desc="{stats.count} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            if stats.count > settings.DB_REQUEST_QUERY_BUDGET:
+                logger.warning(
+                    "%s %s executou %d queries (%.1f ms), acima do orçamento de %d",
+                    scope["method"],
+                    scope["path"],
+                    stats.count,
+                    stats.total_seconds * 1000,
+                    settings.DB_REQUEST_QUERY_BUDGET,
+                )
@@ -1,16 +1,14 @@
+import asyncio
+import time
 import uuid
 from collections.abc import AsyncGenerator
+from dataclasses import dataclass
 
+from opentelemetry.trace import Span
 from pydantic_ai import Agent, RunContext
-from pydantic_ai.messages import (
-    ModelMessage,
-    ModelRequest,
-    ModelResponse,
-    SystemPromptPart,
-    TextPart,
-    UserPromptPart,
-)
-from sqlmodel import Session, asc, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from api.schemas.llm_chat import (
     ChatStructuredData,
@@ -21,16 +19,52 @@ from api.schemas.llm_chat import (
     ParticipacaoSocietariaData,
     StreamMessageChunk,
 )
+from core.chat_memory import chat_memory, estimate_tokens
+from core.database import async_session_maker
+from core.metrics import LLM_TIME_TO_FIRST_TOKEN, observe_llm_run
+from core.tracing import traced_tool, tracer
 from models.conversation import Conversation, Message, SenderType
 from models.onboarding import OnboardingStepType, UserOnboardingStep
 from models.user import User
 
 
+@dataclass
+class GenerationStats:
+    """Contadores de gerações do LLM (por processo)"""
+
+    completed: int = 0
+    cancelled: int = 0
+    completion_tokens: int = 0
+    # Tokens que deixaram de ser gerados por cancelamento, estimados pela média das
+    # respostas completas
+    tokens_saved: int = 0
+    # Tempo entre o início do turno no service e o primeiro chunk do modelo
+    first_tokens: int = 0
+    time_to_first_token_seconds: float = 0.0
+
+    def record_first_token(self, seconds: float) -> None:
+        self.first_tokens += 1
+        self.time_to_first_token_seconds += seconds
+        LLM_TIME_TO_FIRST_TOKEN.observe(seconds)
+
+    def record_completed(self, tokens: int) -> None:
+        self.completed += 1
+        self.completion_tokens += tokens
+
+    def record_cancelled(self, tokens_generated: int) -> None:
+        self.cancelled += 1
+        if self.completed:
+            average = self.completion_tokens // self.completed
+            self.tokens_saved += max(average - tokens_generated, 0)
+
+
 class LLMChatService:
     """Service para gerenciar chat com LLM no onboarding"""
 
     def __init__(self) -> None:
         self.agent = self._create_agent()
+        self.generation_stats = GenerationStats()
+        self.memory = chat_memory
 
     def _create_agent(self) -> Agent[ChatStructuredData, str]:
         """Cria o agente LLM com as tools necessárias"""
@@ -38,7 +72,9 @@ class LLMChatService:
         agent = Agent(
             "openai:gpt-4o-mini",
             deps_type=ChatStructuredData,
-            system_prompt="""
+            # `instructions` (e não `system_prompt`) para que o prompt seja reenviado mesmo
+            # quando há histórico
+            instructions="""
             Você é um assistente especializado em estruturação patrimonial para criação de holdings.
 
             Sua função é conversar naturalmente com o usuário e extrair informações sobre:
@@ -65,6 +101,7 @@ class LLMChatService:
         # === TOOLS PARA IMÓVEIS ===
 
         @agent.tool
+        @traced_tool
         async def adicionar_imovel(
             ctx: RunContext[ChatStructuredData],
             tipo: str,
@@ -95,6 +132,7 @@ class LLMChatService:
             return f"Imóvel adicionado: {tipo} em {localizacao}"
 
         @agent.tool
+        @traced_tool
         async def atualizar_imovel(
             ctx: RunContext[ChatStructuredData], indice: int, **kwargs
         ) -> str:
@@ -111,6 +149,7 @@ class LLMChatService:
         # === TOOLS PARA PARTICIPAÇÕES SOCIETÁRIAS ===
 
         @agent.tool
+        @traced_tool
         async def adicionar_participacao(
             ctx: RunContext[ChatStructuredData],
             empresa: str,
@@ -141,6 +180,7 @@ class LLMChatService:
         # === TOOLS PARA ESTRUTURA FAMILIAR ===
 
         @agent.tool
+        @traced_tool
         async def atualizar_estrutura_familiar(
             ctx: RunContext[ChatStructuredData],
             estado_civil: str | None = None,
@@ -159,6 +199,7 @@ class LLMChatService:
             return "Estrutura familiar atualizada"
 
         @agent.tool
+        @traced_tool
         async def adicionar_conjuge(
             ctx: RunContext[ChatStructuredData],
             nome: str,
@@ -183,6 +224,7 @@ class LLMChatService:
             return f"Cônjuge adicionado: {nome}"
 
         @agent.tool
+        @traced_tool
         async def adicionar_filho(
             ctx: RunContext[ChatStructuredData],
             nome: str,
@@ -207,6 +249,7 @@ class LLMChatService:
             return f"Filho adicionado: {nome}"
 
         @agent.tool
+        @traced_tool
         async def adicionar_dependente(
             ctx: RunContext[ChatStructuredData],
             nome: str,
@@ -234,6 +277,7 @@ class LLMChatService:
         # === TOOLS PARA INVESTIMENTOS ===
 
         @agent.tool
+        @traced_tool
         async def adicionar_investimento(
             ctx: RunContext[ChatStructuredData],
             tipo: str,
@@ -261,6 +305,7 @@ class LLMChatService:
         # === TOOLS PARA OUTROS ATIVOS ===
 
         @agent.tool
+        @traced_tool
         async def adicionar_outro_ativo(
             ctx: RunContext[ChatStructuredData],
             tipo: str,
@@ -284,6 +329,7 @@ class LLMChatService:
         # === TOOL PARA OBTER RESUMO ===
 
         @agent.tool
+        @traced_tool
         async def obter_resumo_dados(ctx: RunContext[ChatStructuredData]) -> str:
             """Retorna um resumo dos dados coletados até agora."""
 
@@ -304,35 +350,42 @@ class LLMChatService:
     # === MÉTODOS DO SERVICE ===
 
     async def get_or_create_conversation(
-        self, session: Session, user_id: uuid.UUID, step_id: int
+        self, session: AsyncSession, user_id: uuid.UUID, step_id: int
     ) -> Conversation:
-        """Obtém ou cria uma conversa para o step LLM"""
-
-        # Busca conversa existente para este step
+        """
+        Obtém ou cria a conversa do step LLM sem corrida entre requests concorrentes.
+
+        INSERT ... ON CONFLICT DO NOTHING RETURNING no índice único parcial
+        (user_id, onboarding_step_id) WHERE is_llm: cria e devolve a conversa em uma ida ao
+        banco; se ela já existia, o RETURNING vem vazio e a existente é lida em seguida.
+        """
+
+        conversation = Conversation(
+            user_id=user_id,
+            title=f"Chat LLM - Step {step_id}",
+            is_llm=True,
+            onboarding_step_id=step_id,
+        )
         stmt = (
-            select(Conversation)
-            .where(
-                Conversation.user_id == user_id,
-                Conversation.is_llm == True,  # noqa: E712
-                Conversation.onboarding_step_id == step_id,
+            insert(Conversation)
+            .values(**conversation.model_dump())
+            .on_conflict_do_nothing(
+                index_elements=["user_id", "onboarding_step_id"],
+                index_where=Conversation.is_llm,  # type: ignore
             )
-            .limit(1)
+            .returning(Conversation)
         )
-
-        conversation = session.exec(stmt).first()
-
-        if not conversation:
-            conversation = Conversation(
-                user_id=user_id,
-                title=f"Chat LLM - Step {step_id}",
-                is_llm=True,
-                onboarding_step_id=step_id,
-            )
-            session.add(conversation)
-            session.commit()
-            session.refresh(conversation)
-
-        return conversation
+        created = (await session.exec(stmt)).scalar_one_or_none()  # type: ignore
+        await session.commit()
+        if created is not None:
+            return created
+
+        stmt = select(Conversation).where(
+            Conversation.user_id == user_id,
+            Conversation.is_llm == True,  # noqa: E712
+            Conversation.onboarding_step_id == step_id,
+        )
+        return (await session.exec(stmt)).one()
 
     def get_structured_data_from_step(self, user_step: UserOnboardingStep) -> ChatStructuredData:
         """Extrai dados estruturados do step"""
@@ -342,8 +395,11 @@ class LLMChatService:
 
         return ChatStructuredData()
 
-    def save_structured_data_to_step(
-        self, session: Session, user_step: UserOnboardingStep, structured_data: ChatStructuredData
+    async def save_structured_data_to_step(
+        self,
+        session: AsyncSession,
+        user_step: UserOnboardingStep,
+        structured_data: ChatStructuredData,
     ) -> None:
         """Salva dados estruturados no step"""
 
@@ -353,126 +409,162 @@ class LLMChatService:
         user_step.data = structured_data.model_dump()
 
         session.add(user_step)
-        session.commit()
-        session.refresh(user_step)
+        await session.commit()
 
     async def process_message_stream(
-        self, session: Session, user: User, user_step: UserOnboardingStep, message_content: str
+        self,
+        session: AsyncSession,
+        user: User,
+        user_step: UserOnboardingStep,
+        message_content: str,
+        delta: bool = False,
+        conversation_id: uuid.UUID | None = None,
     ) -> AsyncGenerator[StreamMessageChunk]:
-        """Processa mensagem com streaming da resposta"""
+        """
+        Processa mensagem com streaming da resposta.
+
+        Com `delta=True` cada chunk traz só o texto novo (type="delta", com `seq`); caso
+        contrário cada chunk traz o texto acumulado (type="message").
+
+        `conversation_id` já resolvido (ex.: por `get_llm_chat_context`) evita a busca da
+        conversa; sem ele a conversa é buscada ou criada.
+        """
+        started_at = time.perf_counter()
 
         if user_step.step.type != OnboardingStepType.LLM_CHAT:
             yield StreamMessageChunk(type="complete", content="Este step não é de chat LLM")
             return
 
-        conversation = await self.get_or_create_conversation(session, user.id, user_step.step_id)
-
-        user_message = Message(
-            conversation_id=conversation.id,
-            sender_id=user.id,
-            sender_type=SenderType.USER,
-            content=message_content,
-        )
-        session.add(user_message)
-        session.commit()
+        if conversation_id is None:
+            with tracer.start_as_current_span("chat.get_conversation"):
+                conversation = await self.get_or_create_conversation(
+                    session, user.id, user_step.step_id
+                )
+            conversation_id = conversation.id
+
+        # Carregada antes de salvar a mensagem atual, que vai como prompt (não como histórico)
+        with tracer.start_as_current_span("chat.load_history") as span:
+            memory = await self.memory.load(session, conversation_id)
+            span.set_attributes(
+                {
+                    "chat.conversation_id": str(conversation_id),
+                    "chat.history.messages": len(memory.messages),
+                    "chat.history.tokens": memory.tokens,
+                }
+            )
 
-        structured_data = self.get_structured_data_from_step(user_step)
+        with tracer.start_as_current_span("chat.save_user_message"):
+            user_message = Message(
+                conversation_id=conversation_id,
+                sender_id=user.id,
+                sender_type=SenderType.USER,
+                content=message_content,
+            )
+            session.add(user_message)
+            await session.commit()
+            await self.memory.append(conversation_id, user_message)
 
-        message_history = self._get_message_history(session, conversation.id)
+        with tracer.start_as_current_span("chat.build_prompt"):
+            structured_data = self.get_structured_data_from_step(user_step)
 
+        full_response = ""
         try:
-            full_response = ""
-            async with self.agent.run_stream(
-                message_content, deps=structured_data, message_history=message_history
-            ) as result:
-                async for chunk in result.stream_text(debounce_by=0.01):
-                    full_response = chunk
-                    yield StreamMessageChunk(type="message", content=chunk)
+            with tracer.start_as_current_span("chat.model_stream") as span:
+                async with self.agent.run_stream(
+                    message_content, deps=structured_data, message_history=memory.messages
+                ) as result:
+                    if delta:
+                        seq = 0
+                        async for chunk in result.stream_text(delta=True, debounce_by=0.01):
+                            if not seq:
+                                self._record_first_token(span, started_at)
+                            seq += 1
+                            full_response += chunk
+                            yield StreamMessageChunk(type="delta", content=chunk, seq=seq)
+                    else:
+                        async for chunk in result.stream_text(debounce_by=0.01):
+                            if not full_response:
+                                self._record_first_token(span, started_at)
+                            full_response = chunk
+                            yield StreamMessageChunk(type="message", content=chunk)
+
+                    usage = result.usage()
+                    span.set_attributes(usage.opentelemetry_attributes())
+                    span.set_attribute("chat.response_length", len(full_response))
+                    self.generation_stats.record_completed(
+                        usage.response_tokens or estimate_tokens(full_response)
+                    )
+                    observe_llm_run(usage, result.new_messages())
 
+            with tracer.start_as_current_span("chat.save_response"):
                 llm_message = Message(
-                    conversation_id=conversation.id,
+                    conversation_id=conversation_id,
                     sender_type=SenderType.LLM,
                     content=full_response,
                 )
                 session.add(llm_message)
-                session.commit()
+                await session.commit()
+                await self.memory.append(conversation_id, llm_message)
+
+                self.memory.schedule_checkpoint(conversation_id, memory)
 
-                self.save_structured_data_to_step(session, user_step, structured_data)
+                await self.save_structured_data_to_step(session, user_step, structured_data)
 
-                yield StreamMessageChunk(type="structured_data", data=structured_data.model_dump())
+            yield StreamMessageChunk(type="structured_data", data=structured_data.model_dump())
 
-                yield StreamMessageChunk(type="complete")
+            yield StreamMessageChunk(type="complete")
+
+        except (asyncio.CancelledError, GeneratorExit):
+            # Cliente desconectou: o run_stream já foi abortado ao sair do contexto
+            self.generation_stats.record_cancelled(estimate_tokens(full_response))
+            # shield: a task segue até o fim mesmo que o cancelamento se repita aqui
+            await asyncio.shield(
+                asyncio.ensure_future(
+                    self._save_truncated_response(session, conversation_id, full_response)
+                )
+            )
+            raise
 
         except Exception as e:
             error_message = Message(
-                conversation_id=conversation.id,
+                conversation_id=conversation_id,
                 sender_type=SenderType.LLM,
                 content=f"Desculpe, ocorreu um erro: {e!s}",
             )
             session.add(error_message)
-            session.commit()
+            await session.commit()
+            await self.memory.append(conversation_id, error_message)
 
             yield StreamMessageChunk(type="complete", content=f"Erro: {e!s}")
 
-    def _get_message_history(
-        self, session: Session, conversation_id: uuid.UUID
-    ) -> list[ModelMessage]:
-        """Obtém histórico de mensagens para contexto do LLM"""
+    def _record_first_token(self, span: Span, started_at: float) -> None:
+        seconds = time.perf_counter() - started_at
+        self.generation_stats.record_first_token(seconds)
+        span.add_event("first_token", {"chat.time_to_first_token_ms": seconds * 1000})
 
-        stmt = (
-            select(Message)
-            .where(Message.conversation_id == conversation_id)
-            .order_by(asc(Message.created_at))
-            .limit(30)
-        )
+    async def _save_truncated_response(
+        self, session: AsyncSession, conversation_id: uuid.UUID, partial_response: str
+    ) -> None:
+        """Persiste a resposta parcial marcada como truncada e libera a sessão da request"""
 
-        messages = session.exec(stmt).all()
-
-        # Converte para formato do PydanticAI
-        model_messages = []
-
-        for msg in messages:
-            if msg.sender_type == SenderType.USER:
-                # Mensagem do usuário vira ModelRequest com UserPromptPart
-                model_messages.append(
-                    ModelRequest(
-                        parts=[
-                            UserPromptPart(
-                                content=msg.content,
-                                timestamp=msg.created_at,
-                            )
-                        ]
-                    )
-                )
-            elif msg.sender_type == SenderType.LLM:
-                # Mensagem do LLM vira ModelResponse com TextPart
-                model_messages.append(
-                    ModelResponse(
-                        parts=[
-                            TextPart(
-                                content=msg.content,
-                            )
-                        ],
-                        timestamp=msg.created_at,
-                    )
-                )
-            elif msg.sender_type == SenderType.SYSTEM:
-                model_messages.append(
-                    ModelRequest(
-                        parts=[
-                            SystemPromptPart(
-                                content=msg.content,
-                                timestamp=msg.created_at,
-                            )
-                        ]
-                    )
-                )
-            # Ignora outros tipos como CONSULTANT por enquanto
+        await session.close()
 
-        return model_messages
+        if not partial_response:
+            return
+
+        truncated_message = Message(
+            conversation_id=conversation_id,
+            sender_type=SenderType.LLM,
+            content=partial_response,
+            truncated=True,
+        )
+        async with async_session_maker() as cleanup_session:
+            cleanup_session.add(truncated_message)
+            await cleanup_session.commit()
+        await self.memory.append(conversation_id, truncated_message)
 
     async def reset_conversation(
-        self, session: Session, user: User, user_step: UserOnboardingStep
+        self, session: AsyncSession, user: User, user_step: UserOnboardingStep
     ) -> bool:
         """Reseta a conversa e dados estruturados"""
 
@@ -483,11 +575,10 @@ class LLMChatService:
             )
 
             # Remove todas as mensagens
-            stmt = select(Message).where(Message.conversation_id == conversation.id)
-            messages = session.exec(stmt).all()
-
-            for message in messages:
-                session.delete(message)
+            await session.exec(
+                delete(Message).where(Message.conversation_id == conversation.id)  # type: ignore
+            )
+            await self.memory.clear(session, conversation.id)
 
             # Reseta dados estruturados
             if user_step.data:
@@ -497,11 +588,12 @@ class LLMChatService:
             user_step.is_completed = False
             user_step.completed_at = None
 
-            session.commit()
+            await session.commit()
+            await self.memory.invalidate(conversation.id)
             return True
 
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             raise e
 
 
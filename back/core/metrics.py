@@ -0,0 +1,238 @@
+"""
+Métricas Prometheus da API e dos workers Celery.
+
+Com vários processos (uvicorn --workers, prefork do Celery), defina PROMETHEUS_MULTIPROC_DIR
+com um diretório vazio e gravável antes de iniciar: cada processo grava suas métricas ali e o
+/metrics agrega todos (modo multiprocess do prometheus_client).
+"""
+
+import atexit
+import logging
+import os
+import time
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+import redis
+from celery import Task
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from pydantic_ai.messages import ModelMessage, ToolCallPart
+from pydantic_ai.usage import Usage
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+if MULTIPROCESS:
+    # Remove as métricas "live" deste processo quando ele termina
+    atexit.register(multiprocess.mark_process_dead, os.getpid())
+
+# === HTTP ===
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Duração das requests HTTP (streaming: até o fim do corpo)",
+    ["method", "route", "status"],
+)
+
+# === Banco ===
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Conexões do pool em uso",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Conexões abertas além de pool_size (max_overflow)",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+# === LLM / chat ===
+
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Tempo entre o início do turno e o primeiro chunk do modelo",
+    buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 8, 13),
+)
+LLM_TOKENS = Counter("llm_tokens", "Tokens consumidos pelo chat LLM", ["direction"])
+LLM_TOOL_CALLS = Counter("llm_tool_calls", "Chamadas de tools pelo chat LLM", ["tool"])
+CHAT_ACTIVE_STREAMS = Gauge(
+    "chat_active_streams",
+    "Streams de resposta do chat abertos",
+    ["mode"],
+    multiprocess_mode="livesum",
+)
+
+# === Uploads ===
+
+UPLOAD_BYTES = Counter("upload_bytes", "Bytes recebidos em uploads de documentos")
+UPLOAD_DURATION = Histogram(
+    "upload_duration_seconds",
+    "Tempo para armazenar um upload (hash, deduplicação e escrita)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+# === Celery ===
+
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Duração das tasks Celery",
+    ["task", "state"],
+    buckets=(0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+
+def observe_llm_run(usage: Usage, messages: Iterable[ModelMessage]) -> None:
+    """Registra tokens e tool calls de uma execução do agente"""
+    LLM_TOKENS.labels(direction="input").inc(usage.request_tokens or 0)
+    LLM_TOKENS.labels(direction="output").inc(usage.response_tokens or 0)
+    for message in messages:
+        for part in message.parts:
+            if isinstance(part, ToolCallPart):
+                LLM_TOOL_CALLS.labels(tool=part.tool_name).inc()
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    """Atualiza os gauges do pool a cada checkout/checkin (para AsyncEngine, `.sync_engine`)"""
+    pool: Any = engine.pool
+
+    def update(*_: object) -> None:
+        DB_POOL_CHECKED_OUT.labels(engine=name).set(pool.checkedout())
+        # overflow() começa em -pool_size: negativo = ainda dentro do pool_size
+        DB_POOL_OVERFLOW.labels(engine=name).set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", update)
+    event.listen(pool, "checkin", update)
+
+
+class CeleryQueueCollector(Collector):
+    """
+    Profundidade das filas Celery lida do broker Redis na hora do scrape.
+
+    Com prioridades, o kombu guarda cada fila em uma lista por faixa (`fila`, `fila:1`, ...,
+    conforme priority_steps/sep); a profundidade é a soma delas.
+    """
+
+    def __init__(self, broker_url: str) -> None:
+        self.broker_url = broker_url
+        self._client: redis.Redis | None = None
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        from celery_app import celery_app  # import tardio: celery_app importa este módulo
+
+        options = celery_app.conf.broker_transport_options
+        sep = options.get("sep", ":")
+        steps = options.get("priority_steps", [0])
+        queues = [queue.name for queue in celery_app.conf.task_queues]
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.broker_url, socket_timeout=1)
+        try:
+            with self._client.pipeline(transaction=False) as pipe:
+                for queue in queues:
+                    for step in steps:
+                        pipe.llen(f"{queue}{sep}{step}" if step else queue)
+                lengths = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Métricas: broker indisponível para ler as filas: %s", e)
+            return
+
+        family = GaugeMetricFamily(
+            "celery_queue_depth", "Mensagens aguardando nas filas Celery", labels=["queue"]
+        )
+        for index, queue in enumerate(queues):
+            family.add_metric([queue], sum(lengths[index * len(steps) : (index + 1) * len(steps)]))
+        yield family
+
+
+_queue_registry = CollectorRegistry()
+_queue_registry.register(CeleryQueueCollector(str(settings.CELERY_BROKER_URL)))
+
+
+def _process_registry() -> CollectorRegistry:
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+_task_started_at: dict[str, float] = {}
+
+
+def on_task_prerun(task_id: str, **_: object) -> None:
+    _task_started_at[task_id] = time.perf_counter()
+
+
+def on_task_postrun(task_id: str, task: Task, state: str | None = None, **_: object) -> None:
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is not None:
+        CELERY_TASK_DURATION.labels(task=task.name, state=state or "UNKNOWN").observe(
+            time.perf_counter() - started_at
+        )
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """Corpo e content type do /metrics (métricas dos processos + filas do broker)"""
+    return (
+        generate_latest(_process_registry()) + generate_latest(_queue_registry),
+        CONTENT_TYPE_LATEST,
+    )
+
+
+def start_worker_metrics_server(port: int) -> None:
+    """Servidor /metrics de um worker Celery (agrega os processos filhos no modo multiprocess)"""
+    start_http_server(port, registry=_process_registry())
+
+
+class MetricsMiddleware:
+    """
+    Latência por request, rotulada pelo template da rota (ex.: `/api/documents/{id}`) para
+    não explodir a cardinalidade com ids. Requests sem rota casada viram `unmatched`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code,
+            ).observe(time.perf_counter() - started_at)
@@ -0,0 +1,35 @@
+"""
+OCR de documentos com motor plugável.
+
+O motor é escolhido por OCR_ENGINE entre os registrados em OCR_ENGINES; "stub" é o substituto
+local e determinístico (sem serviços externos).
+"""
+
+from collections.abc import Callable
+
+from core.config import settings
+from core.ocr.engine import FieldCandidate, OCREngine, PageResult
+from core.ocr.stub import StubOCREngine
+
+OCR_ENGINES: dict[str, Callable[[], OCREngine]] = {
+    "stub": lambda: StubOCREngine(page_latency=settings.OCR_STUB_PAGE_LATENCY_SECONDS),
+}
+
+
+def get_ocr_engine() -> OCREngine:
+    """Cria o motor de OCR configurado"""
+    try:
+        factory = OCR_ENGINES[settings.OCR_ENGINE]
+    except KeyError:
+        raise RuntimeError(f"Motor de OCR desconhecido: {settings.OCR_ENGINE}") from None
+    return factory()
+
+
+__all__ = [
+    "OCR_ENGINES",
+    "FieldCandidate",
+    "OCREngine",
+    "PageResult",
+    "StubOCREngine",
+    "get_ocr_engine",
+]
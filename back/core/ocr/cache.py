@@ -0,0 +1,185 @@
+"""Cache de resultados de OCR por conteúdo, motor e parâmetros de pré-processamento."""
+
+import hashlib
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import asdict
+
+import redis
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, delete, update
+
+from core.config import settings
+from core.ocr.engine import OCREngine, PageResult
+from models.base import utcnow
+from models.document import OCRCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_STATS_KEY = "ocr:cache:stats"
+_LRU_KEY = "ocr:cache:lru"
+
+
+class OCRCache:
+    """
+    Cache em dois níveis do OCR por página, chaveado por (SHA-256 do arquivo, motor, versão
+    do motor, parâmetros de pré-processamento).
+
+    - Nível Redis (opcional): resultados recentes, com TTL renovado a cada acesso e no máximo
+      `max_entries` chaves (as menos usadas recentemente saem primeiro).
+    - Nível Postgres (OCRCacheEntry): reaproveitamento de longo prazo, sem expiração.
+
+    Hits e misses são contados por nível; com Redis, as contagens são compartilhadas por
+    todos os workers.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, redis_url: str | None = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+        self._local_stats: Counter[str] = Counter()
+
+    @staticmethod
+    def key(sha256: str, engine: OCREngine) -> str:
+        params = json.dumps(engine.params, sort_keys=True).encode()
+        params_hash = hashlib.sha256(params).hexdigest()[:16]
+        return f"{sha256}:{engine.engine_id}:{engine.version}:{params_hash}"
+
+    def get(
+        self, session: Session, sha256: str | None, engine: OCREngine
+    ) -> list[PageResult] | None:
+        """
+        Retorna as páginas em cache ou None.
+
+        Um hit no Postgres é promovido ao Redis; a atualização de uso da entrada fica na
+        transação de `session` (o commit é do chamador).
+        """
+        if not sha256:
+            return None
+        key = self.key(sha256, engine)
+
+        pages = self._redis_get(key)
+        if pages is not None:
+            self._record("redis_hits")
+            return [PageResult(**page) for page in pages]
+
+        entry = session.get(OCRCacheEntry, key)
+        if entry is None:
+            self._record("misses")
+            return None
+
+        session.exec(
+            update(OCRCacheEntry)
+            .where(OCRCacheEntry.cache_key == key)  # type: ignore
+            .values(hit_count=OCRCacheEntry.hit_count + 1, last_used_at=utcnow())
+        )
+        self._redis_set(key, entry.pages)
+        self._record("db_hits")
+        return [PageResult(**page) for page in entry.pages]
+
+    def set(
+        self, session: Session, sha256: str | None, engine: OCREngine, pages: list[PageResult]
+    ) -> None:
+        """Guarda o resultado nos dois níveis (no Postgres, junto com o commit do chamador)"""
+        if not sha256:
+            return
+        key = self.key(sha256, engine)
+        data = [asdict(page) for page in pages]
+
+        now = utcnow()
+        stmt = insert(OCRCacheEntry).values(
+            cache_key=key,
+            sha256=sha256,
+            engine_id=engine.engine_id,
+            engine_version=engine.version,
+            params_hash=key.rsplit(":", 1)[1],
+            pages=data,
+            hit_count=0,
+            created_at=now,
+            updated_at=now,
+        )
+        session.exec(stmt.on_conflict_do_nothing(index_elements=[OCRCacheEntry.cache_key]))  # type: ignore
+        self._redis_set(key, data)
+
+    def evict(self, session: Session, sha256: str | None, engine: OCREngine) -> None:
+        """
+        Remove o resultado dos dois níveis (OCR forçado por um consultor).
+
+        No Postgres, a remoção vale com o commit do chamador.
+        """
+        if not sha256:
+            return
+        key = self.key(sha256, engine)
+        session.exec(delete(OCRCacheEntry).where(OCRCacheEntry.cache_key == key))  # type: ignore
+        if self._redis is None:
+            return
+        try:
+            pipe = self._redis.pipeline()
+            pipe.delete(self._redis_key(key))
+            pipe.zrem(_LRU_KEY, key)
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning("OCR cache: Redis indisponível na remoção", exc_info=True)
+
+    def stats(self) -> dict[str, int]:
+        """Contagens de redis_hits, db_hits e misses"""
+        if self._redis is not None:
+            try:
+                raw = self._redis.hgetall(_STATS_KEY)
+                return {name.decode(): int(count) for name, count in raw.items()}  # type: ignore
+            except redis.RedisError:
+                logger.warning("OCR cache: Redis indisponível nas estatísticas", exc_info=True)
+        return dict(self._local_stats)
+
+    def _record(self, event: str) -> None:
+        self._local_stats[event] += 1
+        if self._redis is None:
+            return
+        try:
+            self._redis.hincrby(_STATS_KEY, event, 1)
+        except redis.RedisError:
+            logger.warning("OCR cache: Redis indisponível nas estatísticas", exc_info=True)
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"ocr:result:{key}"
+
+    def _redis_get(self, key: str) -> list[dict] | None:
+        if self._redis is None:
+            return None
+        try:
+            pipe = self._redis.pipeline()
+            pipe.get(self._redis_key(key))
+            pipe.expire(self._redis_key(key), self.ttl_seconds)
+            pipe.zadd(_LRU_KEY, {key: time.time()}, xx=True)
+            raw, _, _ = pipe.execute()
+        except redis.RedisError:
+            logger.warning("OCR cache: Redis indisponível na leitura", exc_info=True)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def _redis_set(self, key: str, pages: list[dict]) -> None:
+        if self._redis is None:
+            return
+        try:
+            pipe = self._redis.pipeline()
+            pipe.set(self._redis_key(key), json.dumps(pages), ex=self.ttl_seconds)
+            pipe.zadd(_LRU_KEY, {key: time.time()})
+            pipe.zcard(_LRU_KEY)
+            size = pipe.execute()[-1]
+            if size > self.max_entries:
+                # Descarta as entradas usadas há mais tempo
+                evicted = self._redis.zpopmin(_LRU_KEY, size - self.max_entries)
+                if evicted:
+                    self._redis.delete(*(self._redis_key(k.decode()) for k, _ in evicted))
+        except redis.RedisError:
+            logger.warning("OCR cache: Redis indisponível na escrita", exc_info=True)
+
+
+ocr_cache = OCRCache(
+    ttl_seconds=settings.OCR_CACHE_TTL_SECONDS,
+    max_entries=settings.OCR_CACHE_REDIS_MAX_ENTRIES,
+    redis_url=str(settings.OCR_CACHE_REDIS_URL) if settings.OCR_CACHE_REDIS_URL else None,
+)
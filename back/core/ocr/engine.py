@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+
+@dataclass
+class PageResult:
+    """Texto reconhecido em uma página (numeradas a partir de 1)"""
+
+    page_number: int
+    text: str
+    confidence: float
+
+
+@dataclass
+class FieldCandidate:
+    """Valor de um campo encontrado no texto de uma página"""
+
+    field_name: str
+    value: str
+    confidence: float
+    page_number: int
+
+
+class OCREngine(Protocol):
+    """
+    Contrato dos motores de OCR.
+
+    `engine_id`, `version` e `params` (parâmetros de pré-processamento) compõem a chave do
+    cache de OCR: mudar qualquer um deles invalida os resultados anteriores.
+    """
+
+    engine_id: str
+    version: str
+
+    @property
+    def params(self) -> dict[str, Any]: ...
+
+    def split_pages(self, data: bytes, content_type: str) -> list[bytes]:
+        """Divide o arquivo em páginas (imagens e documentos simples têm uma só)"""
+        ...
+
+    def preprocess(self, page: bytes) -> bytes:
+        """Normaliza a página antes do reconhecimento (orientação, contraste, encoding...)"""
+        ...
+
+    def recognize(self, page: bytes, page_number: int) -> PageResult: ...
@@ -0,0 +1,71 @@
+"""Extração de campos estruturados (CPF, RG, datas...) do texto reconhecido."""
+
+import re
+
+from core.ocr.engine import FieldCandidate, PageResult
+
+# field_name -> regex; o grupo 1 (ou o match inteiro) é o valor
+FIELD_PATTERNS: dict[str, re.Pattern[str]] = {
+    "cpf": re.compile(r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b"),
+    "cnpj": re.compile(r"\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b"),
+    "rg": re.compile(r"\bRG[:\s]+([\dXx.\-]{5,14})\b"),
+    "nome": re.compile(r"\bNome[:\s]+([^\n]{3,80})", re.IGNORECASE),
+    "data": re.compile(r"\b\d{2}/\d{2}/\d{4}\b"),
+    "valor": re.compile(r"R\$\s?\d{1,3}(?:\.\d{3})*,\d{2}"),
+}
+
+
+def extract_fields(pages: list[PageResult]) -> list[FieldCandidate]:
+    """Todas as ocorrências de cada campo, com a confiança da página onde apareceram"""
+    candidates = []
+    for page in pages:
+        for field_name, pattern in FIELD_PATTERNS.items():
+            for match in pattern.finditer(page.text):
+                value = (match.group(1) if pattern.groups else match.group()).strip()
+                candidates.append(
+                    FieldCandidate(
+                        field_name=field_name,
+                        value=value,
+                        confidence=page.confidence,
+                        page_number=page.page_number,
+                    )
+                )
+    return candidates
+
+
+def _normalize(value: str) -> str:
+    return " ".join(value.casefold().split())
+
+
+def merge_fields(candidates: list[FieldCandidate]) -> list[FieldCandidate]:
+    """
+    Reconcilia os candidatos de todas as páginas em um valor por campo.
+
+    Candidatos com o mesmo valor (ignorando caixa e espaços) somam suas confianças; vence o
+    valor de maior soma. A confiança final é a concordância (fração do peso total do campo
+    que apoia o valor) vezes a confiança média das ocorrências do valor, de modo que um
+    valor lido com segurança em várias páginas supera uma leitura isolada, e valores em
+    conflito reduzem a confiança do campo.
+    """
+    # field_name -> valor normalizado -> ocorrências
+    groups: dict[str, dict[str, list[FieldCandidate]]] = {}
+    for candidate in candidates:
+        values = groups.setdefault(candidate.field_name, {})
+        values.setdefault(_normalize(candidate.value), []).append(candidate)
+
+    merged = []
+    for field_name, values in groups.items():
+        total = sum(c.confidence for occurrences in values.values() for c in occurrences)
+        # max() mantém o primeiro em caso de empate, ou seja, o valor visto primeiro
+        occurrences = max(values.values(), key=lambda occ: sum(c.confidence for c in occ))
+        support = sum(c.confidence for c in occurrences)
+        agreement = support / total if total else 0.0
+        merged.append(
+            FieldCandidate(
+                field_name=field_name,
+                value=occurrences[0].value,
+                confidence=round(agreement * support / len(occurrences), 4),
+                page_number=occurrences[0].page_number,
+            )
+        )
+    return merged
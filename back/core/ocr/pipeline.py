@@ -0,0 +1,122 @@
+"""
+Etapas do processamento de OCR de um documento.
+
+upload → fila → divisão em páginas → OCR por página (normalização + reconhecimento, em
+paralelo) → extração e reconciliação de campos → inserção em lote em DocumentExtractedData →
+status do Document. Cada etapa pode ser
+repetida sem efeito colateral (reentrega de task, retry), para que o pipeline seja idempotente.
+"""
+
+import io
+import uuid
+
+from sqlmodel import Session, update
+
+from core.ocr.engine import FieldCandidate, OCREngine, PageResult
+from core.ocr.writer import write_extracted_fields
+from core.storage import storage
+from models.base import utcnow
+from models.document import Document
+
+OCR_EXTRACTION_METHOD = "ocr"
+
+# Status do Document ao longo do pipeline; os demais (validated, invalid...) são decisões
+# de um consultor e não são sobrescritos pelo OCR
+STATUS_UPLOADED = "uploaded"
+STATUS_PROCESSING = "processing"
+STATUS_PENDING_REVIEW = "pending_review"
+STATUS_OCR_FAILED = "ocr_failed"
+OCR_STATUSES = (STATUS_UPLOADED, STATUS_PROCESSING, STATUS_OCR_FAILED)
+
+
+def claim_document(session: Session, document_id: uuid.UUID) -> Document | None:
+    """
+    Marca o documento como em processamento.
+
+    Retorna None se ele não existe ou já foi processado (task repetida).
+    """
+    document = session.get(Document, document_id)
+    if not document or document.ocr_processed:
+        return None
+    if document.status in OCR_STATUSES:
+        document.status = STATUS_PROCESSING
+        session.add(document)
+        session.commit()
+    return document
+
+
+def split_pages(engine: OCREngine, document: Document) -> list[bytes]:
+    """Lê o arquivo do storage e divide em páginas"""
+    data = b"".join(storage.iter_chunks(document.file_path))
+    return engine.split_pages(data, document.content_type)
+
+
+def recognize_page(engine: OCREngine, page: bytes, page_number: int) -> PageResult:
+    """Normaliza e reconhece uma página"""
+    return engine.recognize(engine.preprocess(page), page_number)
+
+
+def recognize_pages(engine: OCREngine, pages: list[bytes]) -> list[PageResult]:
+    return [recognize_page(engine, page, page_number) for page_number, page in enumerate(pages, 1)]
+
+
+def stage_pages(document_id: uuid.UUID, pages: list[bytes]) -> list[str]:
+    """
+    Grava as páginas no storage para as tasks de OCR por página; retorna as chaves.
+
+    As páginas trafegam pelo storage, e não pelo broker, para não passar arquivos grandes
+    pela fila.
+    """
+    keys = []
+    for page_number, page in enumerate(pages, 1):
+        key = f"ocr-pages/{document_id}/{page_number}"
+        storage.put(key, io.BytesIO(page))
+        keys.append(key)
+    return keys
+
+
+def load_page(key: str) -> bytes:
+    return b"".join(storage.iter_chunks(key))
+
+
+def discard_pages(keys: list[str]) -> None:
+    for key in keys:
+        storage.delete(key)
+
+
+def save_ocr_result(
+    session: Session,
+    document: Document,
+    pages: list[PageResult],
+    fields: list[FieldCandidate],
+) -> None:
+    """
+    Grava os campos extraídos e conclui o OCR do documento, numa única transação.
+
+    Campos de uma execução anterior do OCR são substituídos por upsert (os de outros
+    métodos, como 'manual', são mantidos).
+    """
+    write_extracted_fields(session, document.id, fields, OCR_EXTRACTION_METHOD)
+
+    document.ocr_processed = True
+    document.ocr_confidence = (
+        round(sum(page.confidence for page in pages) / len(pages), 4) if pages else None
+    )
+    document.ocr_processed_at = utcnow()
+    if document.status in OCR_STATUSES:
+        document.status = STATUS_PENDING_REVIEW
+    session.add(document)
+    session.commit()
+
+
+def mark_ocr_failed(session: Session, document_id: uuid.UUID) -> None:
+    session.rollback()
+    session.exec(
+        update(Document)
+        .where(
+            Document.id == document_id,  # type: ignore
+            Document.status == STATUS_PROCESSING,  # type: ignore
+        )
+        .values(status=STATUS_OCR_FAILED)
+    )
+    session.commit()
@@ -0,0 +1,54 @@
+import re
+import time
+import unicodedata
+from typing import Any, Literal
+
+from core.ocr.engine import PageResult
+
+# Separador de páginas na saída textual de PDFs (ex.: pdftotext)
+PAGE_SEPARATOR = b"\f"
+
+_CONTROL_CHARS = re.compile(r"[^\S\n]+|[\x00-\x08\x0b-\x1f\x7f]")
+
+
+class StubOCREngine:
+    """
+    Motor de OCR local e determinístico, para desenvolvimento e medição de throughput.
+
+    Não reconhece imagens: trata o conteúdo como texto (páginas separadas por form feed) e
+    calcula a confiança pela proporção de caracteres legíveis. `page_latency` simula o
+    tempo de um OCR real por página.
+    """
+
+    engine_id = "stub"
+    version = "1"
+
+    def __init__(
+        self,
+        page_latency: float = 0.0,
+        unicode_form: Literal["NFC", "NFKC"] = "NFC",
+    ) -> None:
+        self.page_latency = page_latency
+        self.unicode_form = unicode_form
+
+    @property
+    def params(self) -> dict[str, Any]:
+        return {"unicode_form": self.unicode_form}
+
+    def split_pages(self, data: bytes, content_type: str) -> list[bytes]:
+        if content_type == "application/pdf":
+            return data.split(PAGE_SEPARATOR)
+        return [data]
+
+    def preprocess(self, page: bytes) -> bytes:
+        text = unicodedata.normalize(self.unicode_form, page.decode("utf-8", errors="replace"))
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return _CONTROL_CHARS.sub(" ", text).strip().encode()
+
+    def recognize(self, page: bytes, page_number: int) -> PageResult:
+        if self.page_latency:
+            time.sleep(self.page_latency)
+        text = page.decode()
+        readable = sum(1 for char in text if char.isalnum() or char.isspace() or char in ".,:/-$")
+        confidence = round(readable / len(text), 4) if text else 0.0
+        return PageResult(page_number=page_number, text=text, confidence=confidence)
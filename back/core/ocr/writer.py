@@ -0,0 +1,125 @@
+"""Gravação em lote dos campos extraídos (DocumentExtractedData)."""
+
+import csv
+import io
+import uuid
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import case, column, table, text
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlmodel import Session, delete, select
+
+from core.ocr.engine import FieldCandidate
+from models.base import utcnow
+from models.document import DocumentExtractedData
+
+# Acima disso (no Postgres), as linhas vão por COPY para uma tabela temporária
+COPY_THRESHOLD = 1000
+
+_COLUMNS = (
+    "id",
+    "created_at",
+    "updated_at",
+    "document_id",
+    "field_name",
+    "field_value",
+    "confidence",
+    "extraction_method",
+    "verified",
+)
+_STAGE_TABLE = "_extracted_data_stage"
+
+
+def write_extracted_fields(
+    session: Session,
+    document_id: uuid.UUID,
+    fields: Iterable[FieldCandidate],
+    extraction_method: str,
+) -> None:
+    """
+    Substitui os campos de `extraction_method` do documento por `fields`, em lote.
+
+    Upsert em (document_id, field_name, extraction_method): reprocessar o documento atualiza
+    as linhas em vez de duplicá-las, e campos que não aparecem mais são removidos. Uma
+    verificação manual é mantida se o valor não mudou. O commit fica com o chamador.
+    """
+    # Um valor por campo (o último); o upsert não aceita a mesma chave duas vezes
+    by_name = {field.field_name: field for field in fields}
+    now = utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "created_at": now,
+            "updated_at": now,
+            "document_id": document_id,
+            "field_name": field.field_name,
+            "field_value": field.value,
+            "confidence": field.confidence,
+            "extraction_method": extraction_method,
+            "verified": False,
+        }
+        for field in by_name.values()
+    ]
+
+    session.exec(
+        delete(DocumentExtractedData).where(
+            DocumentExtractedData.document_id == document_id,  # type: ignore
+            DocumentExtractedData.extraction_method == extraction_method,  # type: ignore
+            DocumentExtractedData.field_name.not_in(by_name),  # type: ignore
+        )
+    )
+    if not rows:
+        return
+
+    if len(rows) >= COPY_THRESHOLD and session.get_bind().dialect.name == "postgresql":
+        _copy_upsert(session, rows)
+        return
+    # executemany de um statement fixo: o SQLAlchemy agrupa as linhas em INSERTs de vários
+    # VALUES (insertmanyvalues) e o statement compilado vai para o cache
+    session.exec(_on_conflict_update(insert(DocumentExtractedData)), params=rows)  # type: ignore
+
+
+def _on_conflict_update(stmt: Insert) -> Insert:
+    excluded = stmt.excluded
+    unchanged = DocumentExtractedData.field_value == excluded.field_value
+    return stmt.on_conflict_do_update(
+        index_elements=["document_id", "field_name", "extraction_method"],
+        set_={
+            "field_value": excluded.field_value,
+            "confidence": excluded.confidence,
+            "updated_at": excluded.updated_at,
+            "verified": case((unchanged, DocumentExtractedData.verified), else_=False),
+            "verified_by_user_id": case(
+                (unchanged, DocumentExtractedData.verified_by_user_id), else_=None
+            ),
+            "verified_at": case((unchanged, DocumentExtractedData.verified_at), else_=None),
+        },
+    )
+
+
+def _copy_upsert(session: Session, rows: list[dict[str, Any]]) -> None:
+    """COPY das linhas para uma tabela temporária e um único upsert a partir dela"""
+    session.exec(
+        text(
+            f"CREATE TEMP TABLE IF NOT EXISTS {_STAGE_TABLE} "
+            "(LIKE documentextracteddata INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([row[name] for name in _COLUMNS] for row in rows)
+    buffer.seek(0)
+
+    dbapi_connection = session.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:  # type: ignore
+        cursor.copy_expert(
+            f"COPY {_STAGE_TABLE} ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+
+    stage = table(_STAGE_TABLE, *(column(name) for name in _COLUMNS))
+    stmt = insert(DocumentExtractedData).from_select(
+        list(_COLUMNS), select(*(stage.c[name] for name in _COLUMNS))
+    )
+    session.exec(_on_conflict_update(stmt))  # type: ignore
+    session.exec(text(f"TRUNCATE {_STAGE_TABLE}"))
@@ -0,0 +1,251 @@
+"""Cache do usuário autenticado (principal) usado por get_current_user."""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, SessionTransaction, UOWTransaction
+
+from core.config import settings
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Campos que, ao mudar, alteram o que o principal pode fazer
+_PRIVILEGE_FIELDS = ("is_active", "is_consultant", "is_admin")
+
+
+# Grava o snapshot lido do banco apenas se o usuário não foi invalidado desde a leitura da
+# versão (evita recolocar no cache um snapshot anterior a um commit concorrente).
+_POPULATE_LUA = """
+local version = tonumber(redis.call('GET', KEYS[2]) or '0')
+if version ~= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[3], 'EX', tonumber(ARGV[2]))
+return 1
+"""
+
+# Chave em Session.info com os ids a invalidar quando a transação fizer commit
+_PENDING_INVALIDATIONS = "principal_cache_invalidations"
+
+
+class PrincipalCache:
+    """
+    Cache em dois níveis do usuário autenticado, indexado pelo user id.
+
+    - Nível local: LRU em processo, limitado por tamanho e por um TTL curto (segundos), sem
+      round-trip por request. É o atraso máximo com que outro worker vê uma mudança.
+    - Nível Redis (opcional): compartilhado entre workers/nós, com TTL e uma versão por
+      usuário incrementada a cada invalidação.
+
+    A invalidação acontece depois do commit que alterou o usuário (veja os eventos de
+    Session abaixo); um snapshot lido antes desse commit não volta ao cache.
+
+    Guarda apenas um snapshot das colunas do usuário (sem o hash da senha). Em um hit o
+    usuário é reconstruído como instância desanexada de sessão: serve para ler id e flags,
+    não para lazy load de relacionamentos.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        local_ttl_seconds: int,
+        max_size: int,
+        redis_url: str | None = None,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = min(local_ttl_seconds, ttl_seconds)
+        self.max_size = max_size
+        self._local: OrderedDict[uuid.UUID, tuple[float, dict[str, Any]]] = OrderedDict()
+        # Incrementado a cada invalidação: um load concorrente não repopula o nível local
+        self._generation = 0
+        # Usuários com a invalidação no Redis ainda em andamento: sempre lidos do banco
+        self._pending: set[uuid.UUID] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._redis = aioredis.from_url(redis_url) if redis_url else None
+        self._sync_redis = redis.Redis.from_url(redis_url) if redis_url else None
+        if self._redis is not None:
+            self._populate_script = self._redis.register_script(_POPULATE_LUA)
+
+    @staticmethod
+    def _keys(user_id: uuid.UUID) -> list[str]:
+        # Hash tag: as duas chaves ficam no mesmo slot num Redis Cluster
+        prefix = f"{{principal:{user_id}}}"
+        return [f"{prefix}:data", f"{prefix}:version"]
+
+    async def load(
+        self, user_id: uuid.UUID, fetch: Callable[[], Awaitable[User | None]]
+    ) -> User | None:
+        """Retorna o usuário, usando `fetch` (query no banco) em um miss"""
+        if self.ttl_seconds <= 0 or user_id in self._pending:
+            return await fetch()
+
+        entry = self._local.get(user_id)
+        if entry:
+            expires_at, data = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(user_id)
+                return self._to_user(data)
+            self._local.pop(user_id, None)
+
+        generation = self._generation
+        if self._redis is None:
+            user = await fetch()
+            if user is not None and generation == self._generation:
+                self._set_local(user_id, self._snapshot(user))
+            return user
+
+        try:
+            return await self._load_redis(user_id, fetch, generation)
+        except redis.RedisError:
+            logger.warning("Principal cache: Redis indisponível na leitura", exc_info=True)
+            return await fetch()
+
+    async def _load_redis(
+        self,
+        user_id: uuid.UUID,
+        fetch: Callable[[], Awaitable[User | None]],
+        generation: int,
+    ) -> User | None:
+        assert self._redis is not None
+        data_key, version_key = self._keys(user_id)
+
+        raw, version = await self._redis.mget(data_key, version_key)
+        if raw is not None:
+            data = json.loads(raw)
+            if generation == self._generation:
+                self._set_local(user_id, data)
+            return self._to_user(data)
+
+        user = await fetch()
+        if user is None:
+            return None
+        data = self._snapshot(user)
+        populated = await self._populate_script(
+            keys=self._keys(user_id),
+            args=[int(version or 0), self.ttl_seconds, json.dumps(data)],
+        )
+        if populated and generation == self._generation:
+            self._set_local(user_id, data)
+        return user
+
+    def invalidate(self, user_ids: set[uuid.UUID]) -> None:
+        """
+        Remove os usuários do cache (chamado após o commit que alterou flags de acesso).
+
+        O nível local é limpo na hora. No Redis a invalidação roda em background quando há
+        um event loop (sessões assíncronas) e de forma síncrona caso contrário (sessões
+        síncronas, em threads ou no Celery).
+        """
+        self._generation += 1
+        for user_id in user_ids:
+            self._local.pop(user_id, None)
+
+        if self._redis is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._invalidate_redis_sync(user_ids)
+            return
+
+        self._pending.update(user_ids)
+        task = loop.create_task(self._invalidate_redis(user_ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _invalidate_redis(self, user_ids: set[uuid.UUID]) -> None:
+        assert self._redis is not None
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    self._queue_invalidation(pipe, user_id)
+                await pipe.execute()
+        except redis.RedisError:
+            logger.warning("Principal cache: falha ao invalidar %s no Redis", user_ids)
+        finally:
+            self._pending.difference_update(user_ids)
+
+    def _invalidate_redis_sync(self, user_ids: set[uuid.UUID]) -> None:
+        assert self._sync_redis is not None
+        try:
+            with self._sync_redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    self._queue_invalidation(pipe, user_id)
+                pipe.execute()
+        except redis.RedisError:
+            logger.warning("Principal cache: falha ao invalidar %s no Redis", user_ids)
+
+    def _queue_invalidation(
+        self, pipe: redis.client.Pipeline | aioredis.client.Pipeline, user_id: uuid.UUID
+    ) -> None:
+        data_key, version_key = self._keys(user_id)
+        pipe.delete(data_key)
+        pipe.incr(version_key)
+        pipe.expire(version_key, self.ttl_seconds)
+
+    def clear(self) -> None:
+        """Limpa o nível local"""
+        self._local.clear()
+
+    def _set_local(self, user_id: uuid.UUID, data: dict[str, Any]) -> None:
+        self._local[user_id] = (time.monotonic() + self.local_ttl_seconds, data)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    @staticmethod
+    def _snapshot(user: User) -> dict[str, Any]:
+        return user.model_dump(mode="json", exclude={"hashed_password"})
+
+    @staticmethod
+    def _to_user(data: dict[str, Any]) -> User:
+        return User.model_validate(data, update={"hashed_password": ""})
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    local_ttl_seconds=settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    redis_url=str(settings.PRINCIPAL_CACHE_REDIS_URL)
+    if settings.PRINCIPAL_CACHE_REDIS_URL
+    else None,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session: Session, flush_context: UOWTransaction) -> None:
+    """Anota os usuários cujas flags de acesso mudaram (ou foram removidos) neste flush"""
+    changed = {
+        user.id
+        for user in session.dirty
+        if isinstance(user, User)
+        and any(inspect(user).attrs[name].history.has_changes() for name in _PRIVILEGE_FIELDS)
+    }
+    changed.update(user.id for user in session.deleted if isinstance(user, User))
+    if changed:
+        session.info.setdefault(_PENDING_INVALIDATIONS, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals_after_commit(session: Session) -> None:
+    """Invalida o cache só depois do commit: antes dele, outra request ainda lê a linha antiga"""
+    user_ids = session.info.pop(_PENDING_INVALIDATIONS, None)
+    if user_ids:
+        principal_cache.invalidate(user_ids)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_principal_changes(session: Session, transaction: SessionTransaction) -> None:
+    """Rollback ou sessão fechada sem commit: as mudanças anotadas não foram gravadas"""
+    if transaction.parent is None:
+        session.info.pop(_PENDING_INVALIDATIONS, None)
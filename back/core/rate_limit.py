@@ -0,0 +1,189 @@
+"""Rate limiting por usuário com backend plugável (Redis compartilhado ou memória local)."""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+import redis
+import redis.asyncio as aioredis
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    retry_after: float = 0.0  # segundos até caber uma nova requisição (se negada)
+
+
+class RateLimitBackend(Protocol):
+    """Contrato dos backends: registra uma requisição e diz se ela cabe no limite"""
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult: ...
+
+
+def retry_after(previous: int, current: int, elapsed: float, limit: int, window: int) -> float:
+    """
+    Segundos até o contador ponderado ficar abaixo de `limit`, sem novas requisições.
+
+    Na janela atual o peso da anterior cai linearmente; se a atual sozinha já atingiu o
+    limite, é preciso esperar a próxima janela, em que ela passa a ser a anterior.
+    """
+    remaining = window - elapsed
+    if current < limit:
+        return max(0.0, remaining - (limit - current) * window / previous)
+    return remaining + window * (1 - limit / current)
+
+
+class InMemoryRateLimitBackend:
+    """
+    Janela deslizante aproximada (contador da janela atual + anterior ponderado), O(1) por
+    requisição. Vale só para o processo atual; chaves ociosas são descartadas em ordem LRU
+    quando `max_keys` é atingido.
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        # key -> (índice da janela atual, contagem atual, contagem da janela anterior)
+        self._windows: OrderedDict[str, tuple[int, int, int]] = OrderedDict()
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult:
+        now = time.time()
+        window = int(now // window_seconds)
+        elapsed = now - window * window_seconds
+
+        current_window, current, previous = self._windows.get(key, (window, 0, 0))
+        if current_window != window:
+            # Avançou uma janela: a atual vira anterior; mais de uma, tudo zera
+            previous = current if current_window == window - 1 else 0
+            current = 0
+
+        weighted = previous * (window_seconds - elapsed) / window_seconds + current
+        allowed = weighted < limit
+        if allowed:
+            current += 1
+
+        self._windows[key] = (window, current, previous)
+        self._windows.move_to_end(key)
+        while len(self._windows) > self.max_keys:
+            self._windows.popitem(last=False)
+
+        if allowed:
+            return RateLimitResult(allowed=True)
+        return RateLimitResult(
+            allowed=False,
+            retry_after=retry_after(previous, current, elapsed, limit, window_seconds),
+        )
+
+
+# Mesmo algoritmo do backend em memória, atômico no Redis e usando o relógio do Redis
+# para que todos os workers/nós concordem sobre a janela. Um hash por chave (janela, contagem
+# atual, contagem anterior): o script só toca KEYS[1], o que o mantém válido num Redis Cluster.
+# Retorna {permitido, retry_after em ms}.
+_SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local index = math.floor(now / window)
+local elapsed = now - index * window
+
+local state = redis.call('HMGET', KEYS[1], 'window', 'current', 'previous')
+local current = tonumber(state[2] or '0')
+local previous = tonumber(state[3] or '0')
+local stored_window = tonumber(state[1] or index)
+if stored_window ~= index then
+    if stored_window == index - 1 then
+        previous = current
+    else
+        previous = 0
+    end
+    current = 0
+end
+
+if previous * (window - elapsed) / window + current >= limit then
+    local wait
+    if current < limit then
+        wait = math.max(0, window - elapsed - (limit - current) * window / previous)
+    else
+        wait = window - elapsed + window * (1 - limit / current)
+    end
+    return {0, math.ceil(wait * 1000)}
+end
+
+redis.call('HSET', KEYS[1], 'window', index, 'current', current + 1, 'previous', previous)
+redis.call('EXPIRE', KEYS[1], window * 2)
+return {1, 0}
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Janela deslizante em Redis via script Lua (uma ida ao Redis por requisição), compartilhada
+    entre todos os workers e nós. Se o Redis falhar, usa o backend em memória como fallback.
+    """
+
+    def __init__(self, client: aioredis.Redis, fallback: RateLimitBackend | None = None) -> None:
+        self.client = client
+        self.fallback = fallback or InMemoryRateLimitBackend()
+        self._script = client.register_script(_SLIDING_WINDOW_LUA)
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult:
+        try:
+            allowed, retry_after_ms = await self._script(
+                keys=[f"rl:{key}"], args=[limit, window_seconds]
+            )
+        except redis.RedisError:
+            logger.warning("Rate limit: Redis indisponível, usando limite local", exc_info=True)
+            return await self.fallback.hit(key, limit, window_seconds)
+        return RateLimitResult(allowed=bool(allowed), retry_after=retry_after_ms / 1000)
+
+
+class RateLimiter:
+    """
+    Aplica os limites configurados por escopo (rota) e papel do usuário.
+
+    `limits` mapeia escopo -> papel -> requisições por janela; o papel "default" vale para
+    papéis sem limite próprio. Escopos sem configuração não são limitados.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        limits: dict[str, dict[str, int]],
+        window_seconds: int,
+    ) -> None:
+        self.backend = backend
+        self.limits = limits
+        self.window_seconds = window_seconds
+
+    def get_limit(self, scope: str, role: str) -> int | None:
+        scope_limits = self.limits.get(scope)
+        if not scope_limits:
+            return None
+        return scope_limits.get(role, scope_limits.get("default"))
+
+    async def hit(self, scope: str, role: str, user_id: str) -> RateLimitResult:
+        """Registra uma request do usuário neste escopo e diz se ela cabe no limite"""
+        limit = self.get_limit(scope, role)
+        if limit is None:
+            return RateLimitResult(allowed=True)
+        return await self.backend.hit(f"{scope}:{user_id}", limit, self.window_seconds)
+
+
+def _create_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisRateLimitBackend(aioredis.from_url(str(settings.RATE_LIMIT_REDIS_URL)))
+    return InMemoryRateLimitBackend()
+
+
+# Instância global do rate limiter
+rate_limiter = RateLimiter(
+    backend=_create_backend(),
+    limits=settings.RATE_LIMITS,
+    window_seconds=settings.RATE_LIMIT_WINDOW_SECONDS,
+)
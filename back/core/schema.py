@@ -0,0 +1,52 @@
+"""Verificação, na inicialização da API, de que o banco está na revisão esperada."""
+
+from functools import cache
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from core.database import async_engine
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """O banco não está na revisão (head) das migrações deste código"""
+
+
+@cache
+def expected_revisions() -> frozenset[str]:
+    """Heads das migrações do Alembic (lidas dos arquivos, sem acessar o banco)"""
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    return frozenset(ScriptDirectory.from_config(config).get_heads())
+
+
+async def verify_schema() -> None:
+    """
+    Compara a revisão gravada pelo Alembic com a esperada pelo código.
+
+    Substitui o `create_all` na inicialização: em vez de refletir todas as tabelas em cada
+    worker, faz uma única leitura de `alembic_version` (as migrações rodam antes, no
+    entrypoint).
+
+    Raises:
+        SchemaOutOfDateError: se o banco estiver em outra revisão ou sem migrações.
+    """
+    try:
+        async with async_engine.connect() as connection:
+            result = await connection.execute(text("SELECT version_num FROM alembic_version"))
+            current = frozenset(result.scalars())
+    except ProgrammingError:
+        # Tabela alembic_version inexistente: nenhuma migração foi aplicada
+        current = frozenset()
+
+    expected = expected_revisions()
+    if current != expected:
+        raise SchemaOutOfDateError(
+            f"Banco na revisão {sorted(current) or 'nenhuma'}, código espera {sorted(expected)}: "
+            "rode `alembic upgrade head`"
+        )
@@ -0,0 +1,89 @@
+"""Helpers para respostas Server-Sent Events (text/event-stream)."""
+
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+
+import anyio
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Linha de comentário SSE: ignorada pelo cliente, mantém proxies e a conexão vivos
+SSE_HEARTBEAT = ": keep-alive\n\n"
+
+_DONE = object()
+
+
+def format_sse(data: str, *, event_id: int | None = None, event: str | None = None) -> str:
+    """Formata um evento SSE (id/event opcionais)"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+async def relay_stream(
+    stream: AsyncIterator[str],
+    *,
+    heartbeat_interval: float | None = None,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    poll_interval: float = 1.0,
+) -> AsyncGenerator[str]:
+    """
+    Repassa os itens de `stream`, consumido por uma task produtora dedicada.
+
+    - `heartbeat_interval`: envia SSE_HEARTBEAT quando o stream fica esse tempo sem
+      produzir nada (ex.: enquanto o modelo pensa ou executa tools).
+    - `is_disconnected`: verificado a cada `poll_interval` segundos; se o cliente caiu, a
+      task produtora é cancelada (abortando a geração) e o relay termina.
+
+    Consumir o stream inteiro numa única task evita que context managers abertos por ele
+    (como o run_stream do pydantic_ai) troquem de task entre um item e outro.
+    """
+    queue: asyncio.Queue[object] = asyncio.Queue()
+
+    async def pump() -> None:
+        try:
+            async for item in stream:
+                queue.put_nowait(item)
+        finally:
+            queue.put_nowait(_DONE)
+
+    loop = asyncio.get_running_loop()
+    producer = asyncio.create_task(pump())
+    last_sent = last_poll = loop.time()
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=poll_interval)
+            except TimeoutError:
+                item = None
+
+            if is_disconnected is not None and loop.time() - last_poll >= poll_interval:
+                last_poll = loop.time()
+                if await is_disconnected():
+                    break
+
+            if item is None:
+                if heartbeat_interval is not None and loop.time() - last_sent >= heartbeat_interval:
+                    last_sent = loop.time()
+                    yield SSE_HEARTBEAT
+                continue
+
+            if item is _DONE:
+                # Propaga exceções do produtor
+                await producer
+                break
+
+            last_sent = loop.time()
+            yield item  # type: ignore
+    finally:
+        if not producer.done():
+            producer.cancel()
+            # Espera a limpeza do produtor (ex.: salvar a resposta parcial). Blindado porque o
+            # Starlette, ao receber o http.disconnect, cancela o relay e repete o cancelamento
+            # até ele sair; sem a blindagem a resposta terminaria antes da limpeza
+            with anyio.CancelScope(shield=True):
+                await asyncio.gather(producer, return_exceptions=True)
@@ -0,0 +1,47 @@
+"""
+Armazenamento de arquivos plugável.
+
+`storage` é o backend configurado por STORAGE_BACKEND: "local" (diretório UPLOAD_FOLDER),
+"s3" (bucket S3 ou compatível, permite escalar a API sem disco compartilhado) ou "memory"
+(somente para testes).
+"""
+
+from core.config import settings
+from core.storage.base import STORAGE_CHUNK_SIZE, StorageBackend
+from core.storage.local import LocalStorage
+from core.storage.memory import InMemoryStorage
+from core.storage.s3 import S3Storage
+
+
+def create_storage() -> StorageBackend:
+    """Cria o backend configurado em settings"""
+    match settings.STORAGE_BACKEND:
+        case "s3":
+            if not settings.S3_BUCKET:
+                raise RuntimeError("STORAGE_BACKEND=s3 requer S3_BUCKET")
+            return S3Storage(
+                settings.S3_BUCKET,
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                region=settings.S3_REGION,
+                access_key_id=settings.S3_ACCESS_KEY_ID,
+                secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+                prefix=settings.S3_PREFIX,
+            )
+        case "memory":
+            return InMemoryStorage()
+        case _:
+            return LocalStorage(settings.UPLOAD_FOLDER)
+
+
+# Instância global do storage
+storage = create_storage()
+
+__all__ = [
+    "STORAGE_CHUNK_SIZE",
+    "InMemoryStorage",
+    "LocalStorage",
+    "S3Storage",
+    "StorageBackend",
+    "create_storage",
+    "storage",
+]
@@ -0,0 +1,48 @@
+from collections.abc import Iterator
+from typing import BinaryIO, Protocol
+
+STORAGE_CHUNK_SIZE = 64 * 1024
+
+
+class StorageBackend(Protocol):
+    """
+    Contrato dos backends de armazenamento de arquivos.
+
+    As chaves são caminhos relativos com "/" (ex.: "blobs/ab/cd/<sha256>"); cada backend
+    decide onde elas ficam de fato (disco local, bucket S3...).
+    """
+
+    def put(self, key: str, source: BinaryIO, content_type: str | None = None) -> None:
+        """Grava o conteúdo de `source` (lido em blocos) em `key`, substituindo o anterior"""
+        ...
+
+    def iter_chunks(self, key: str, chunk_size: int = STORAGE_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Lê o conteúdo de `key` em blocos.
+
+        Raises:
+            FileNotFoundError: se `key` não existe.
+        """
+        ...
+
+    def exists(self, key: str) -> bool: ...
+
+    def delete(self, key: str) -> None:
+        """Remove `key` (sem erro se já não existe)"""
+        ...
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        filename: str | None = None,
+        content_type: str | None = None,
+        expires_in: int = 300,
+    ) -> str | None:
+        """
+        URL temporária para o cliente baixar `key` direto do backend, sem passar pela API.
+
+        Retorna None quando o backend não suporta download direto; nesse caso o conteúdo
+        deve ser servido via `iter_chunks`.
+        """
+        ...
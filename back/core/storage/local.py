@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from typing import BinaryIO
+
+from core.storage.base import STORAGE_CHUNK_SIZE
+
+
+class LocalStorage:
+    """Arquivos em um diretório do disco local (ou volume compartilhado)"""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def path(self, key: str) -> str:
+        """Caminho no disco de `key` (rejeita chaves que escapam de `root`)"""
+        root = os.path.abspath(self.root)
+        path = os.path.abspath(os.path.join(root, key))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Chave de storage inválida: {key}")
+        return path
+
+    def put(self, key: str, source: BinaryIO, content_type: str | None = None) -> None:
+        # Grava num temporário no mesmo diretório e renomeia: leitores nunca veem parcial
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".put-", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                shutil.copyfileobj(source, temp_file, STORAGE_CHUNK_SIZE)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def iter_chunks(self, key: str, chunk_size: int = STORAGE_CHUNK_SIZE) -> Iterator[bytes]:
+        # Abre antes de virar gerador, para que FileNotFoundError apareça na chamada
+        file = open(self.path(key), "rb")
+
+        def read() -> Iterator[bytes]:
+            with file:
+                while chunk := file.read(chunk_size):
+                    yield chunk
+
+        return read()
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        filename: str | None = None,
+        content_type: str | None = None,
+        expires_in: int = 300,
+    ) -> str | None:
+        return None
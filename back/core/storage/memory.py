@@ -0,0 +1,37 @@
+from collections.abc import Iterator
+from typing import BinaryIO
+
+from core.storage.base import STORAGE_CHUNK_SIZE
+
+
+class InMemoryStorage:
+    """Arquivos em um dicionário do processo; substituto dos backends reais em testes"""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+
+    def put(self, key: str, source: BinaryIO, content_type: str | None = None) -> None:
+        self.objects[key] = source.read()
+
+    def iter_chunks(self, key: str, chunk_size: int = STORAGE_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            data = self.objects[key]
+        except KeyError:
+            raise FileNotFoundError(key) from None
+        return (data[i : i + chunk_size] for i in range(0, len(data), chunk_size))
+
+    def exists(self, key: str) -> bool:
+        return key in self.objects
+
+    def delete(self, key: str) -> None:
+        self.objects.pop(key, None)
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        filename: str | None = None,
+        content_type: str | None = None,
+        expires_in: int = 300,
+    ) -> str | None:
+        return None
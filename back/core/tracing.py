@@ -0,0 +1,103 @@
+"""
+Tracing (OpenTelemetry) das requests HTTP e das fases de um turno do chat LLM.
+
+Sem TRACING_FILE nenhum provider é configurado e o tracer é o no-op da API: os spans não
+custam nada. Com TRACING_FILE, a fração TRACING_SAMPLE_RATIO das requests é amostrada na
+raiz (o span HTTP) e seus spans são gravados no arquivo, um JSON por linha, para inspeção
+local com `python -m benchmarks.traces`.
+
+Os spans não carregam o conteúdo das mensagens nem os argumentos das tools (dados pessoais),
+apenas ids, tamanhos, contagens, tempos e uso de tokens.
+"""
+
+import functools
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+
+tracer = trace.get_tracer("w1.chat")
+
+
+def configure_tracing() -> None:
+    """Registra o provider com amostragem e exportação para TRACING_FILE (se definido)"""
+    if not settings.TRACING_FILE:
+        return
+
+    path = Path(settings.TRACING_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Append: vários workers (uvicorn --workers) podem gravar no mesmo arquivo
+    exporter = ConsoleSpanExporter(
+        out=path.open("a", encoding="utf-8"),
+        formatter=_span_to_json_line,
+    )
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.PROJECT_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+
+def _span_to_json_line(span: ReadableSpan) -> str:
+    return span.to_json(indent=None) + "\n"
+
+
+def traced_tool[**P, R](func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Executa uma tool do agente num span `chat.tool <nome>` (sem os argumentos)"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        with tracer.start_as_current_span(
+            f"chat.tool {name}", attributes={"gen_ai.tool.name": name}
+        ) as span:
+            result = await func(*args, **kwargs)
+            span.set_attribute("chat.tool.result_length", len(str(result)))
+            return result
+
+    return wrapper
+
+
+class TracingMiddleware:
+    """
+    Span raiz de cada request, nomeado pelo template da rota (ex.: `POST /api/llm-chat/...`).
+
+    Cobre também o corpo das respostas em streaming, então os spans do chat (dependências,
+    geração e tools) ficam todos sob ele.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        with tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as span:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.update_name(f"{method} {route.path}")
+                    span.set_attribute("http.route", route.path)
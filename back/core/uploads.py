@@ -0,0 +1,63 @@
+"""Gravação de uploads em blocos, com tamanho e SHA-256 calculados durante a cópia."""
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """O arquivo enviado excede o tamanho máximo permitido"""
+
+    def __init__(self, max_size: int) -> None:
+        super().__init__(f"Arquivo excede o tamanho máximo de {max_size} bytes")
+        self.max_size = max_size
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
+
+
+def stage_upload(
+    source: BinaryIO,
+    directory: str,
+    max_size: int,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> StoredUpload:
+    """
+    Copia `source` em blocos de `chunk_size` bytes para um arquivo temporário em `directory`.
+
+    O arquivo retornado (`StoredUpload.path`) é temporário: o chamador lê o conteúdo dele
+    (ex.: para enviá-lo ao storage) e o remove em seguida. A memória usada fica em torno de
+    `chunk_size`, independentemente do tamanho do arquivo.
+
+    Raises:
+        UploadTooLargeError: se o conteúdo passar de `max_size` bytes (a cópia é abortada
+            assim que o limite é ultrapassado).
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            while chunk := source.read(chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(max_size)
+                digest.update(chunk)
+                temp_file.write(chunk)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return StoredUpload(path=temp_path, size=size, sha256=digest.hexdigest())
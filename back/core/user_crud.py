@@ -1,9 +1,11 @@
 import uuid
-from datetime import UTC, datetime
 
-from sqlmodel import Session, select
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core.security import get_password_hash, verify_password
+from models.base import utcnow
 from models.onboarding import (
     OnboardingFlow,
     OnboardingStep,
@@ -14,21 +16,21 @@ from models.onboarding import (
 from models.user import User, UserProfile
 
 
-def get_user_by_email(session: Session, email: str) -> User | None:
+async def get_user_by_email(session: AsyncSession, email: str) -> User | None:
     """Busca um usuário pelo email"""
     query = select(User).where(User.email == email)
-    result = session.exec(query)
+    result = await session.exec(query)
     return result.one_or_none()
 
 
-def create_default_onboarding_flow(session: Session) -> OnboardingFlow:
+async def create_default_onboarding_flow(session: AsyncSession) -> OnboardingFlow:
     """Creates a default onboarding flow with predefined steps."""
     flow = OnboardingFlow(
         name="Cadastro de Usuário",
         description="Processo completo de cadastro e coleta de informações",
     )
     session.add(flow)
-    session.flush()
+    await session.flush()
 
     if not flow.id:
         raise Exception("Failed to create onboarding flow")
@@ -58,22 +60,24 @@ def create_default_onboarding_flow(session: Session) -> OnboardingFlow:
     ]
 
     session.add_all(steps)
-    session.flush()
+    await session.flush()
+    # Carrega flow.steps explicitamente: AsyncSession não faz lazy load
+    await session.refresh(flow, attribute_names=["steps"])
     return flow
 
 
-def assign_onboarding_flow_to_user(
-    session: Session, user: User, flow: OnboardingFlow
+async def assign_onboarding_flow_to_user(
+    session: AsyncSession, user: User, flow: OnboardingFlow
 ) -> UserOnboardingFlow:
     """Assigns an onboarding flow to a user."""
     if not flow.id:
         raise Exception("Failed to assign onboarding flow to user")
 
     user_flow = UserOnboardingFlow(
-        user_id=user.id, flow_id=flow.id, is_completed=False, started_at=datetime.now(UTC)
+        user_id=user.id, flow_id=flow.id, is_completed=False, started_at=utcnow()
     )
     session.add(user_flow)
-    session.flush()  # Ensure user_flow.id is available
+    await session.flush()  # Ensure user_flow.id is available
 
     if not user_flow.id:
         raise Exception("Failed to assign onboarding flow to user")
@@ -85,12 +89,12 @@ def assign_onboarding_flow_to_user(
     ]
 
     session.add_all(user_steps)
-    session.flush()
+    await session.flush()
     return user_flow
 
 
 async def create_user(
-    session: Session,
+    session: AsyncSession,
     email: str,
     password: str,
     name: str,
@@ -103,62 +107,80 @@ async def create_user(
         is_consultant=is_consultant,
     )
     session.add(user)
-    session.flush()
+    await session.flush()
 
     profile = UserProfile(user_id=user.id, full_name=name)
     session.add(profile)
 
     if is_consultant:
-        session.commit()
-        session.refresh(user)
+        await session.commit()
         return user
 
-    query = select(OnboardingFlow).where(OnboardingFlow.name == "Cadastro de Usuário")
-    result = session.exec(query)
+    query = (
+        select(OnboardingFlow)
+        .where(OnboardingFlow.name == "Cadastro de Usuário")
+        .options(selectinload(OnboardingFlow.steps))  # type: ignore
+    )
+    result = await session.exec(query)
     flow = result.first()
 
     if not flow:
-        flow = create_default_onboarding_flow(session)
+        flow = await create_default_onboarding_flow(session)
 
-    assign_onboarding_flow_to_user(session, user, flow)
+    await assign_onboarding_flow_to_user(session, user, flow)
 
-    session.commit()
-    session.refresh(user)
+    await session.commit()
     return user
 
 
-def authenticate_user(session: Session, email: str, password: str) -> User | None:
+async def authenticate_user(session: AsyncSession, email: str, password: str) -> User | None:
     """Autentica um usuário pelo email e senha"""
-    user = get_user_by_email(session, email)
+    user = await get_user_by_email(session, email)
     if not user or not verify_password(password, user.hashed_password):
         return None
     return user
 
 
-def get_user_onboarding_flow(session: Session, user_id: uuid.UUID) -> UserOnboardingFlow | None:
-    """Get the onboarding flow for a user"""
+async def get_user_onboarding_flow(
+    session: AsyncSession, user_id: uuid.UUID, with_steps: bool = False
+) -> UserOnboardingFlow | None:
+    """Get the onboarding flow for a user (optionally with flow and user steps loaded)"""
     statement = select(UserOnboardingFlow).where(UserOnboardingFlow.user_id == user_id)
-    return session.exec(statement).first()
+    if with_steps:
+        statement = statement.options(
+            selectinload(UserOnboardingFlow.flow).selectinload(OnboardingFlow.steps),  # type: ignore
+            selectinload(UserOnboardingFlow.user_steps).selectinload(UserOnboardingStep.step),  # type: ignore
+        )
+    return (await session.exec(statement)).first()
 
 
-def get_user_onboarding_step(
-    session: Session, step_id: int, user_flow_id: int
+async def get_user_onboarding_step(
+    session: AsyncSession, step_id: int, user_flow_id: int
 ) -> UserOnboardingStep | None:
     """Get a specific step from a user's onboarding flow"""
-    statement = select(UserOnboardingStep).where(
-        UserOnboardingStep.step_id == step_id, UserOnboardingStep.user_flow_id == user_flow_id
+    statement = (
+        select(UserOnboardingStep)
+        .where(
+            UserOnboardingStep.step_id == step_id, UserOnboardingStep.user_flow_id == user_flow_id
+        )
+        .options(selectinload(UserOnboardingStep.step))  # type: ignore
     )
-    return session.exec(statement).first()
+    return (await session.exec(statement)).first()
 
 
-def update_onboarding_step(
-    session: Session,
+async def update_onboarding_step(
+    session: AsyncSession,
     user_step_id: int,
     data: dict | None = None,
     is_completed: bool | None = None,
 ) -> UserOnboardingStep:
     """Update an onboarding step's data or completion status"""
-    user_step = session.get(UserOnboardingStep, user_step_id)
+    user_step = await session.get(
+        UserOnboardingStep,
+        user_step_id,
+        options=[selectinload(UserOnboardingStep.step)],  # type: ignore
+        populate_existing=True,
+    )
     if not user_step:
         raise ValueError(f"UserOnboardingStep with id {user_step_id} not found")
 
@@ -168,36 +190,34 @@ def update_onboarding_step(
     if is_completed is not None:
         user_step.is_completed = is_completed
         if is_completed:
-            user_step.completed_at = datetime.now(UTC)
+            user_step.completed_at = utcnow()
         else:
             user_step.completed_at = None
 
     session.add(user_step)
-    session.commit()
-    session.refresh(user_step)
+    await session.commit()
     return user_step
 
 
-def check_onboarding_flow_completion(session: Session, user_flow_id: int) -> bool:
+async def check_onboarding_flow_completion(session: AsyncSession, user_flow_id: int) -> bool:
     """Check if all steps in a user's onboarding flow are completed"""
     statement = select(UserOnboardingStep).where(
         UserOnboardingStep.user_flow_id == user_flow_id,
         UserOnboardingStep.is_completed == False,  # noqa
     )
-    incomplete_steps = session.exec(statement).all()
-    return len(incomplete_steps) == 0
+    incomplete_step = (await session.exec(statement.limit(1))).first()
+    return incomplete_step is None
 
 
-def complete_onboarding_flow(session: Session, user_flow_id: int) -> UserOnboardingFlow:
+async def complete_onboarding_flow(session: AsyncSession, user_flow_id: int) -> UserOnboardingFlow:
     """Mark a user's onboarding flow as completed"""
-    user_flow = session.get(UserOnboardingFlow, user_flow_id)
+    user_flow = await session.get(UserOnboardingFlow, user_flow_id)
     if not user_flow:
         raise ValueError(f"UserOnboardingFlow with id {user_flow_id} not found")
 
     user_flow.is_completed = True
-    user_flow.completed_at = datetime.now(UTC)
+    user_flow.completed_at = utcnow()
 
     session.add(user_flow)
-    session.commit()
-    session.refresh(user_flow)
+    await session.commit()
     return user_flow
@@ -15,5 +15,11 @@ done
 echo "Running database migrations"
 alembic upgrade head
 
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  # Métricas de processos de uma execução anterior não podem ser somadas às novas
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 echo "Starting application"
 exec "$@"
\ No newline at end of file
@@ -2,17 +2,26 @@ from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.routes import admin_documents, documents, llm_chat, onboarding, users
 from core.config import settings
 from core.database import create_db_and_tables
+from core.db_instrumentation import SQLTimingMiddleware
+from core.metrics import MetricsMiddleware, generate_metrics
+from core.schema import verify_schema
+from core.tracing import TracingMiddleware, configure_tracing
+
+configure_tracing()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
-    create_db_and_tables()
+    if settings.DB_SCHEMA_STARTUP == "create_all":
+        create_db_and_tables()
+    elif settings.DB_SCHEMA_STARTUP == "verify":
+        await verify_schema()
     yield
 
 
@@ -20,6 +29,7 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     description="API para sistema de gestão de holdings",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configuração de CORS
@@ -31,6 +41,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(SQLTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Por último: o span da request envolve os demais middlewares
+app.add_middleware(TracingMiddleware)
+
 # Incluir routers
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(onboarding.router, prefix="/api/onboarding", tags=["onboarding"])
@@ -49,5 +64,11 @@ async def health_check() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    content, media_type = generate_metrics()
+    return Response(content=content, media_type=media_type)
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,8 +1,15 @@
 from sqlmodel import SQLModel
 
 from models.base import TimeStampModel, UUIDModel
-from models.conversation import Conversation, Message, SenderType
-from models.document import Document, DocumentExtractedData, DocumentRequirement, DocumentReview
+from models.conversation import Conversation, ConversationSummary, Message, SenderType
+from models.document import (
+    Document,
+    DocumentBlob,
+    DocumentExtractedData,
+    DocumentRequirement,
+    DocumentReview,
+    OCRCacheEntry,
+)
 from models.onboarding import (
     OnboardingFlow,
     OnboardingStep,
@@ -15,12 +22,15 @@ from models.user import FamilyMember, User, UserProfile
 # Ensure all models are available at the module level for SQLModel and Alembic
 __all__ = [
     "Conversation",
+    "ConversationSummary",
     "Document",
+    "DocumentBlob",
     "DocumentExtractedData",
     "DocumentRequirement",
     "DocumentReview",
     "FamilyMember",
     "Message",
+    "OCRCacheEntry",
     "OnboardingFlow",
     "OnboardingStep",
     "OnboardingStepType",
@@ -4,11 +4,21 @@ from datetime import UTC, datetime
 from sqlmodel import Field, SQLModel
 
 
+def utcnow() -> datetime:
+    """
+    Agora em UTC, sem fuso.
+
+    As colunas de data são TIMESTAMP WITHOUT TIME ZONE: o asyncpg recusa datetimes com tzinfo
+    nelas, então tudo que vai para o banco usa este valor (UTC implícito).
+    """
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
 class TimeStampModel(SQLModel):
     """Modelo base com timestamps para auditoria"""
 
-    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
 
 
 class UUIDModel(SQLModel):
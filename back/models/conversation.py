@@ -1,8 +1,10 @@
 # models/conversation.py
 import uuid
+from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING, Optional
 
+from sqlalchemy import Index, text
 from sqlmodel import Field, Relationship
 
 from models.base import TimeStampModel, UUIDModel
@@ -22,6 +24,19 @@ class SenderType(str, Enum):
 class Conversation(TimeStampModel, UUIDModel, table=True):
     """Conversas com o cliente"""
 
+    # No máximo uma conversa LLM por usuário e step (alvo do ON CONFLICT em
+    # LLMChatService.get_or_create_conversation)
+    __table_args__ = (
+        Index(
+            "uq_conversation_llm_user_step",
+            "user_id",
+            "onboarding_step_id",
+            unique=True,
+            postgresql_where=text("is_llm"),
+            sqlite_where=text("is_llm"),
+        ),
+    )
+
     user_id: uuid.UUID = Field(foreign_key="user.id")
     title: str | None = None
     is_llm: bool = False  # Se é conversa com LLM ou com consultor
@@ -38,11 +53,35 @@ class Conversation(TimeStampModel, UUIDModel, table=True):
 class Message(TimeStampModel, UUIDModel, table=True):
     """Mensagens nas conversas"""
 
+    __table_args__ = (
+        Index("ix_message_conversation_id_created_at", "conversation_id", "created_at"),
+    )
+
     conversation_id: uuid.UUID = Field(foreign_key="conversation.id")
     sender_id: uuid.UUID | None = Field(default=None, foreign_key="user.id")
     sender_type: SenderType = Field(default=SenderType.USER)
     content: str
+    # Resposta do LLM interrompida (ex.: cliente desconectou no meio do streaming)
+    truncated: bool = Field(default=False)
 
     # Relacionamentos
     conversation: Conversation = Relationship(back_populates="messages")
     sender: Optional["User"] = Relationship(back_populates="messages_sent")
+
+
+class ConversationSummary(TimeStampModel, UUIDModel, table=True):
+    """Resumo acumulado das mensagens antigas de uma conversa com o LLM"""
+
+    __table_args__ = (
+        Index(
+            "ix_conversationsummary_conversation_id_covers_until",
+            "conversation_id",
+            "covers_until",
+        ),
+    )
+
+    conversation_id: uuid.UUID = Field(foreign_key="conversation.id")
+    content: str
+    # Cobre todas as mensagens da conversa com created_at <= covers_until
+    covers_until: datetime
+    message_count: int = Field(default=0)
@@ -4,6 +4,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
+from sqlalchemy import JSON, Column, Index, UniqueConstraint
 from sqlmodel import Field, Relationship
 
 from models.base import TimeStampModel, UUIDModel
@@ -16,6 +17,8 @@ if TYPE_CHECKING:
 class DocumentRequirement(TimeStampModel, UUIDModel, table=True):
     """Requirements for documents to be submitted during onboarding."""
 
+    __table_args__ = (Index("ix_documentrequirement_step_id_doc_type", "step_id", "doc_type"),)
+
     step_id: int = Field(foreign_key="onboardingstep.id")
     name: str
     description: str
@@ -34,20 +37,34 @@ class DocumentRequirement(TimeStampModel, UUIDModel, table=True):
     documents: list["Document"] = Relationship(back_populates="requirement")
 
 
+class DocumentBlob(TimeStampModel, table=True):
+    """Content-addressed file content, stored once per SHA-256 and shared by documents."""
+
+    sha256: str = Field(primary_key=True)
+    storage_path: str
+    size: int
+    ref_count: int = Field(default=0)  # documents pointing to this content
+
+    # Relationships
+    documents: list["Document"] = Relationship(back_populates="blob")
+
+
 class Document(TimeStampModel, UUIDModel, table=True):
     """Documents uploaded by users during onboarding."""
 
-    user_step_id: int = Field(foreign_key="useronboardingstep.id")
+    user_step_id: int = Field(foreign_key="useronboardingstep.id", index=True)
     requirement_id: uuid.UUID = Field(foreign_key="documentrequirement.id")
     file_path: str
     original_filename: str
     file_type: str  # 'pdf', 'jpg', 'png', etc.
     file_size: int
+    sha256: str | None = Field(default=None, foreign_key="documentblob.sha256", index=True)
     content_type: str  # MIME type
     uploaded_by_id: uuid.UUID = Field(foreign_key="user.id")
 
     # Status and validation
-    status: str = Field(default="uploaded")  # 'uploaded', 'processing', 'validated', 'rejected'
+    # 'uploaded', 'processing', 'pending_review', 'ocr_failed', 'validated', 'invalid'
+    status: str = Field(default="uploaded", index=True)
     rejection_reason: str | None = None
     validated_by_user_id: uuid.UUID | None = Field(default=None, foreign_key="user.id")
     validated_at: datetime | None = None
@@ -59,6 +76,7 @@ class Document(TimeStampModel, UUIDModel, table=True):
 
     # Relationships
     user_step: "UserOnboardingStep" = Relationship(back_populates="documents")
+    blob: DocumentBlob | None = Relationship(back_populates="documents")
     requirement: DocumentRequirement = Relationship(back_populates="documents")
     uploaded_by: "User" = Relationship(
         sa_relationship_kwargs={"foreign_keys": "[Document.uploaded_by_id]"}
@@ -70,9 +88,32 @@ class Document(TimeStampModel, UUIDModel, table=True):
     reviews: list["DocumentReview"] = Relationship(back_populates="document")
 
 
+class OCRCacheEntry(TimeStampModel, table=True):
+    """OCR page results keyed by content hash, engine and preprocessing parameters."""
+
+    cache_key: str = Field(primary_key=True)  # sha256:engine_id:engine_version:params_hash
+    sha256: str = Field(index=True)
+    engine_id: str
+    engine_version: str
+    params_hash: str
+    pages: list = Field(sa_column=Column(JSON, nullable=False))
+    hit_count: int = Field(default=0)
+    last_used_at: datetime | None = None
+
+
 class DocumentExtractedData(TimeStampModel, UUIDModel, table=True):
     """Data extracted from documents via OCR and processing."""
 
+    # One value per field and extraction method; re-runs upsert on this key
+    __table_args__ = (
+        UniqueConstraint(
+            "document_id",
+            "field_name",
+            "extraction_method",
+            name="uq_documentextracteddata_document_field_method",
+        ),
+    )
+
     document_id: uuid.UUID = Field(foreign_key="document.id")
     field_name: str
     field_value: str
@@ -94,7 +135,7 @@ class DocumentExtractedData(TimeStampModel, UUIDModel, table=True):
 class DocumentReview(TimeStampModel, UUIDModel, table=True):
     """Document reviews by consultants/administrators."""
 
-    document_id: uuid.UUID = Field(foreign_key="document.id")
+    document_id: uuid.UUID = Field(foreign_key="document.id", index=True)
     reviewer_id: uuid.UUID = Field(foreign_key="user.id")
     status: str  # 'approved', 'rejected', 'pending_correction'
     comments: str | None = None
@@ -1,11 +1,12 @@
 import uuid
-from datetime import UTC, datetime
+from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index
 from sqlmodel import Field, Relationship, SQLModel
 
+from models.base import utcnow
 from models.user import User
 
 if TYPE_CHECKING:
@@ -24,8 +25,8 @@ class OnboardingFlow(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     name: str
     description: str
-    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
 
     steps: list["OnboardingStep"] = Relationship(back_populates="flow")
     user_flows: list["UserOnboardingFlow"] = Relationship(back_populates="flow")
@@ -47,10 +48,10 @@ class OnboardingStep(SQLModel, table=True):
 
 class UserOnboardingFlow(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
-    user_id: uuid.UUID = Field(foreign_key="user.id")
+    user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
     flow_id: int = Field(foreign_key="onboardingflow.id")
     is_completed: bool = Field(default=False)
-    started_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    started_at: datetime = Field(default_factory=utcnow)
     completed_at: datetime | None = None
 
     user: "User" = Relationship(back_populates="onboarding_flows")
@@ -59,6 +60,10 @@ class UserOnboardingFlow(SQLModel, table=True):
 
 
 class UserOnboardingStep(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_useronboardingstep_user_flow_id_step_id", "user_flow_id", "step_id"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     user_flow_id: int = Field(foreign_key="useronboardingflow.id")
     step_id: int = Field(foreign_key="onboardingstep.id")
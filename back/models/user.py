@@ -26,12 +26,9 @@ class User(TimeStampModel, UUIDModel, table=True):
     # Relacionamentos básicos
     profile: "UserProfile" = Relationship(back_populates="user")
     family_members: list["FamilyMember"] = Relationship(back_populates="user")
-    conversations: list["Conversation"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
-    )
-    messages_sent: list["Message"] = Relationship(
-        back_populates="sender", sa_relationship_kwargs={"lazy": "selectin"}
-    )
+    # Carregados sob demanda: cada endpoint que precisar usa selectinload/joinedload explícito
+    conversations: list["Conversation"] = Relationship(back_populates="user")
+    messages_sent: list["Message"] = Relationship(back_populates="sender")
 
     # Relacionamento com onboarding
     onboarding_flows: list["UserOnboardingFlow"] = Relationship(back_populates="user")
@@ -1,32 +1,129 @@
+import logging
 import uuid
-from datetime import datetime
+from dataclasses import asdict
+from typing import Any
 
+from celery import chord
 from sqlmodel import Session
 
-from celery_app import celery_app
+from celery_app import PRIORITY_DEFAULT, PRIORITY_INTERACTIVE, celery_app
 from core.database import engine
-from models.holding.document import Document, DocumentExtractedData
+from core.ocr import PageResult, get_ocr_engine
+from core.ocr.cache import ocr_cache
+from core.ocr.fields import extract_fields, merge_fields
+from core.ocr.pipeline import (
+    claim_document,
+    discard_pages,
+    load_page,
+    mark_ocr_failed,
+    recognize_page,
+    recognize_pages,
+    save_ocr_result,
+    split_pages,
+    stage_pages,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_document_ocr(
+    document_id: uuid.UUID, *, interactive: bool = False, force: bool = False
+) -> None:
+    """
+    Enfileira o OCR do documento.
+
+    `interactive` (ex.: reprocessamento pedido por um consultor) fura o backlog: o documento
+    e todas as suas páginas vão com prioridade máxima. `force` ignora e descarta o resultado
+    em cache, para que o OCR rode de novo.
+    """
+    priority = PRIORITY_INTERACTIVE if interactive else PRIORITY_DEFAULT
+    process_document_ocr_task.apply_async((str(document_id), priority, force), priority=priority)
 
 
 @celery_app.task
-def process_document_ocr_task(document_id: str) -> None:
-    """Processa OCR de um documento em background."""
+def process_document_ocr_task(
+    document_id: str, priority: int = PRIORITY_DEFAULT, force: bool = False
+) -> None:
+    """
+    Processa OCR de um documento em background.
+
+    Documentos de várias páginas são divididos e cada página vira uma task (chord); o tempo
+    total passa a depender do número de workers, e não do número de páginas. As tasks das
+    páginas herdam a prioridade do documento.
+    """
+    ocr_engine = get_ocr_engine()
     with Session(engine) as session:
-        doc = session.get(Document, uuid.UUID(document_id))
-        if not doc:
+        document = claim_document(session, uuid.UUID(document_id))
+        if not document:
             return
-        doc.status = "processing"
-        doc.ocr_processed = True
-        doc.ocr_processed_at = datetime.utcnow()
-        # Simulação de extração
-        extracted_fields = {"nome": "Exemplo", "cpf": "000.000.000-00"}
-        for field, value in extracted_fields.items():
-            data = DocumentExtractedData(
-                document_id=doc.id,
-                field_name=field,
-                field_value=value,
-                confidence=0.99,
-                extraction_method="ocr",
-            )
-            session.add(data)
-        session.commit()
+        try:
+            if force:
+                # Reprocessamento pedido por um consultor: o OCR roda de novo e o resultado
+                # novo entra no cache no lugar do anterior
+                ocr_cache.evict(session, document.sha256, ocr_engine)
+                session.commit()
+            else:
+                # Mesmo conteúdo já reconhecido por este motor, com os mesmos parâmetros
+                results = ocr_cache.get(session, document.sha256, ocr_engine)
+                if results is not None:
+                    fields = merge_fields(extract_fields(results))
+                    save_ocr_result(session, document, results, fields)
+                    return
+
+            pages = split_pages(ocr_engine, document)
+            if len(pages) <= 1:
+                results = recognize_pages(ocr_engine, pages)
+                ocr_cache.set(session, document.sha256, ocr_engine, results)
+                save_ocr_result(session, document, results, merge_fields(extract_fields(results)))
+                return
+            keys = stage_pages(document.id, pages)
+        except Exception:
+            logger.exception("Falha no OCR do documento %s", document_id)
+            mark_ocr_failed(session, document.id)
+            raise
+
+    callback = (
+        merge_document_ocr_task.s(document_id, keys)
+        .set(priority=priority)
+        .on_error(ocr_failed_task.s(document_id, keys))
+    )
+    chord(
+        ocr_page_task.s(key, page_number).set(priority=priority)
+        for page_number, key in enumerate(keys, 1)
+    )(callback)
+
+
+@celery_app.task(ignore_result=False)
+def ocr_page_task(page_key: str, page_number: int) -> dict[str, Any]:
+    """OCR de uma página já gravada no storage"""
+    result = recognize_page(get_ocr_engine(), load_page(page_key), page_number)
+    return asdict(result)
+
+
+@celery_app.task
+def merge_document_ocr_task(
+    page_results: list[dict[str, Any]], document_id: str, page_keys: list[str]
+) -> None:
+    """Callback do chord: reconcilia os campos de todas as páginas e grava o resultado"""
+    pages = sorted((PageResult(**result) for result in page_results), key=lambda p: p.page_number)
+    with Session(engine) as session:
+        document = claim_document(session, uuid.UUID(document_id))
+        if document:
+            ocr_cache.set(session, document.sha256, get_ocr_engine(), pages)
+            save_ocr_result(session, document, pages, merge_fields(extract_fields(pages)))
+    discard_pages(page_keys)
+
+
+@celery_app.task
+def ocr_failed_task(
+    request: Any,  # noqa: ANN401
+    exc: Exception,
+    traceback: str | None,
+    document_id: str,
+    page_keys: list[str],
+) -> None:
+    """Errback do chord: alguma página falhou"""
+    logger.error("Falha no OCR do documento %s: %r", document_id, exc)
+    with Session(engine) as session:
+        mark_ocr_failed(session, uuid.UUID(document_id))
+    discard_pages(page_keys)
@@ -0,0 +1,12 @@
+from sqlmodel import Session
+
+from celery_app import celery_app
+from core.content_store import collect_orphan_blobs
+from core.database import engine
+
+
+@celery_app.task
+def collect_orphan_blobs_task() -> int:
+    """Remove do storage os conteúdos que nenhum documento referencia mais."""
+    with Session(engine) as session:
+        return collect_orphan_blobs(session)
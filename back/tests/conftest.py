@@ -0,0 +1,88 @@
+import os
+from collections.abc import AsyncIterator, Iterator
+
+# Antes de importar a aplicação: settings lidas no import
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("DB_SCHEMA_STARTUP", "off")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models  # noqa: F401 (registra todas as tabelas no metadata)
+from core.database import get_async_session, get_session
+from main import app
+
+
+@pytest.fixture
+def engine(tmp_path: os.PathLike) -> Iterator[Engine]:
+    """Banco SQLite descartável com as tabelas dos models"""
+    engine = create_engine(f"sqlite:///{tmp_path}/test.sqlite")
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+async def async_engine(tmp_path: os.PathLike) -> AsyncIterator[AsyncEngine]:
+    """Versão assíncrona (aiosqlite) do banco de teste, no lugar do asyncpg"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test-async.sqlite")
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session(engine: Engine) -> Iterator[Session]:
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def app_async_engine(engine: Engine) -> AsyncEngine:
+    """
+    Engine assíncrono (aiosqlite) no mesmo arquivo do `engine`, usado pelas rotas e
+    dependencies assíncronas (ex.: get_current_user). Sem pool: nenhuma conexão sobrevive ao
+    event loop do TestClient.
+    """
+    url = engine.url.set(drivername="sqlite+aiosqlite")
+    return create_async_engine(url, poolclass=NullPool)
+
+
+@pytest.fixture
+def client(engine: Engine, app_async_engine: AsyncEngine) -> Iterator[TestClient]:
+    """Cliente da API com as rotas síncronas e assíncronas usando o banco de teste"""
+
+    def get_test_session() -> Iterator[Session]:
+        with Session(engine) as session:
+            yield session
+
+    async def get_test_async_session() -> AsyncIterator[AsyncSession]:
+        async with AsyncSession(app_async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_test_session
+    app.dependency_overrides[get_async_session] = get_test_async_session
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def statements(engine: Engine, app_async_engine: AsyncEngine) -> Iterator[list[str]]:
+    """SQL executado no banco de teste, pelas duas engines (limpe a lista antes do trecho medido)"""
+    executed: list[str] = []
+
+    def record(*args: object) -> None:
+        executed.append(str(args[2]))
+
+    for target in (engine, app_async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", record)
+    yield executed
+    for target in (engine, app_async_engine.sync_engine):
+        event.remove(target, "before_cursor_execute", record)
@@ -0,0 +1,27 @@
+from celery_app import QUEUE_MAINTENANCE, QUEUE_OCR_HEAVY, QUEUE_OCR_LIGHT, celery_app
+
+
+def _queue(task_name: str) -> str:
+    return celery_app.amqp.router.route({}, task_name)["queue"].name
+
+
+def test_every_task_goes_to_a_declared_queue() -> None:
+    celery_app.loader.import_default_modules()
+    declared = {queue.name for queue in celery_app.conf.task_queues}
+    tasks = [name for name in celery_app.tasks if not name.startswith("celery.")]
+
+    assert tasks
+    assert {name: _queue(name) for name in tasks if _queue(name) not in declared} == {}
+
+
+def test_task_routes() -> None:
+    assert _queue("tasks.document_tasks.ocr_page_task") == QUEUE_OCR_HEAVY
+    assert _queue("tasks.document_tasks.process_document_ocr_task") == QUEUE_OCR_LIGHT
+    assert _queue("tasks.maintenance_tasks.collect_orphan_blobs_task") == QUEUE_MAINTENANCE
+
+
+def test_routes_point_at_existing_tasks() -> None:
+    celery_app.loader.import_default_modules()
+    for pattern in celery_app.conf.task_routes:
+        module = pattern.rsplit(".", 1)[0]
+        assert any(name.startswith(f"{module}.") for name in celery_app.tasks), pattern
@@ -0,0 +1,141 @@
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from api.dependencies import get_llm_chat_context
+from models.conversation import Conversation
+from models.onboarding import (
+    OnboardingFlow,
+    OnboardingStep,
+    OnboardingStepType,
+    UserOnboardingFlow,
+    UserOnboardingStep,
+)
+from models.user import User
+
+
+@dataclass
+class Onboarding:
+    user: User
+    personal_data: UserOnboardingStep
+    chat: UserOnboardingStep
+
+
+@pytest.fixture
+async def async_session(async_engine: AsyncEngine) -> AsyncIterator[AsyncSession]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+async def onboarding(async_session: AsyncSession) -> Onboarding:
+    """Flow com dados pessoais (obrigatório) antes do chat LLM, já concluído pelo usuário"""
+    flow = OnboardingFlow(name="Cadastro", description="")
+    user = User(email="cliente@example.com", hashed_password="")
+    async_session.add_all([flow, user])
+    await async_session.flush()
+    steps = [
+        OnboardingStep(name=name, description="", order=order, type=type_, flow_id=flow.id)  # type: ignore
+        for order, (name, type_) in enumerate(
+            [
+                ("Dados pessoais", OnboardingStepType.PERSONAL_DATA),
+                ("Entrevista", OnboardingStepType.LLM_CHAT),
+            ],
+            1,
+        )
+    ]
+    user_flow = UserOnboardingFlow(user_id=user.id, flow_id=flow.id)  # type: ignore
+    async_session.add_all([*steps, user_flow])
+    await async_session.flush()
+    user_steps = [
+        UserOnboardingStep(user_flow_id=user_flow.id, step_id=step.id, is_completed=index == 0)  # type: ignore
+        for index, step in enumerate(steps)
+    ]
+    async_session.add_all(user_steps)
+    await async_session.commit()
+    return Onboarding(user, *user_steps)
+
+
+@pytest.fixture
+def statements(async_engine: AsyncEngine) -> list[str]:
+    executed: list[str] = []
+    event.listen(
+        async_engine.sync_engine, "before_cursor_execute", lambda *args: executed.append(args[2])
+    )
+    return executed
+
+
+async def test_context_in_a_single_query(
+    async_session: AsyncSession, onboarding: Onboarding, statements: list[str]
+) -> None:
+    conversation = Conversation(
+        user_id=onboarding.user.id, is_llm=True, onboarding_step_id=onboarding.chat.step_id
+    )
+    async_session.add(conversation)
+    await async_session.commit()
+    async_session.expunge_all()
+    statements.clear()
+
+    context = await get_llm_chat_context(onboarding.chat.step_id, async_session, onboarding.user)
+
+    assert len(statements) == 1
+    assert context.user_step.id == onboarding.chat.id
+    assert context.user_step.step.type == OnboardingStepType.LLM_CHAT
+    assert context.user_step.user_flow.user_id == onboarding.user.id
+    assert context.conversation_id == conversation.id
+
+
+async def test_context_without_conversation(
+    async_session: AsyncSession, onboarding: Onboarding
+) -> None:
+    context = await get_llm_chat_context(onboarding.chat.step_id, async_session, onboarding.user)
+    assert context.conversation_id is None
+
+
+async def test_pending_prerequisite(async_session: AsyncSession, onboarding: Onboarding) -> None:
+    onboarding.personal_data.is_completed = False
+    async_session.add(onboarding.personal_data)
+    await async_session.commit()
+
+    with pytest.raises(HTTPException) as error:
+        await get_llm_chat_context(onboarding.chat.step_id, async_session, onboarding.user)
+    assert error.value.status_code == 400
+    assert "Dados pessoais" in error.value.detail
+
+
+async def test_step_of_another_user(async_session: AsyncSession, onboarding: Onboarding) -> None:
+    other = User(email="outro@example.com", hashed_password="")
+    async_session.add(other)
+    await async_session.commit()
+
+    with pytest.raises(HTTPException) as error:
+        await get_llm_chat_context(onboarding.chat.step_id, async_session, other)
+    assert error.value.status_code == 404
+
+
+@pytest.mark.parametrize(
+    ("change", "status_code"),
+    [("consultant", 403), ("completed_flow", 400), ("not_a_chat", 400)],
+)
+async def test_rejected_access(
+    async_session: AsyncSession, onboarding: Onboarding, change: str, status_code: int
+) -> None:
+    step_id = onboarding.chat.step_id
+    if change == "consultant":
+        onboarding.user.is_consultant = True
+    elif change == "completed_flow":
+        user_flow = await async_session.get(UserOnboardingFlow, onboarding.chat.user_flow_id)
+        user_flow.is_completed = True  # type: ignore
+        async_session.add(user_flow)
+        await async_session.commit()
+    else:
+        step_id = onboarding.personal_data.step_id
+
+    with pytest.raises(HTTPException) as error:
+        await get_llm_chat_context(step_id, async_session, onboarding.user)
+    assert error.value.status_code == status_code
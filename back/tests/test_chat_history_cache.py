@@ -0,0 +1,192 @@
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+from pydantic_ai.messages import ModelRequest, ModelResponse
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import core.chat_history_cache
+from core.chat_history_cache import ChatHistoryCache, HistoryEntry, HistoryState
+from models.conversation import Conversation, Message, SenderType
+from models.user import User
+
+STARTED = datetime(2025, 1, 1)
+
+
+def _message(conversation_id: uuid.UUID, position: int, content: str | None = None) -> Message:
+    return Message(
+        conversation_id=conversation_id,
+        sender_type=SenderType.USER if position % 2 == 0 else SenderType.LLM,
+        content=content or f"m{position}",
+        created_at=STARTED + timedelta(minutes=position),
+    )
+
+
+class Fetch:
+    """`fetch` do cache que conta as idas ao banco"""
+
+    def __init__(self, state: HistoryState) -> None:
+        self.state = state
+        self.calls = 0
+
+    async def __call__(self) -> HistoryState:
+        self.calls += 1
+        return self.state
+
+
+def _contents(state: HistoryState) -> list[str]:
+    return [entry.content for entry in state.entries]
+
+
+def test_entries_convert_to_pydantic_ai_messages() -> None:
+    user = HistoryEntry(SenderType.USER, "oi", STARTED)
+    llm = HistoryEntry(SenderType.LLM, "olá", STARTED)
+    consultant = HistoryEntry(SenderType.CONSULTANT, "nota", STARTED)
+
+    assert isinstance(user.model_message, ModelRequest)
+    assert isinstance(llm.model_message, ModelResponse)
+    assert consultant.model_message is None
+
+
+@pytest.fixture
+def server() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_cache(server: fakeredis.FakeServer, monkeypatch: pytest.MonkeyPatch) -> ChatHistoryCache:
+    monkeypatch.setattr(
+        core.chat_history_cache.aioredis,
+        "from_url",
+        lambda url: fakeredis.FakeAsyncRedis(server=server),
+    )
+    return ChatHistoryCache(
+        max_entries=3, max_conversations=10, ttl_seconds=60, redis_url="redis://fake"
+    )
+
+
+async def test_redis_miss_populates_and_hit_skips_the_database(
+    redis_cache: ChatHistoryCache,
+) -> None:
+    conversation_id = uuid.uuid4()
+    fetch = Fetch(HistoryState(summary="resumo", summary_until=STARTED, entries=[]))
+
+    await redis_cache.load(None, conversation_id, fetch)  # type: ignore
+    # Outro worker (cache local vazio) lê do Redis
+    other = ChatHistoryCache(3, 10, 60, redis_url="redis://fake")
+    state = await other.load(None, conversation_id, fetch)  # type: ignore
+
+    assert fetch.calls == 1
+    assert (state.summary, state.summary_until) == ("resumo", STARTED)
+
+
+async def test_append_extends_the_history_on_every_worker(
+    redis_cache: ChatHistoryCache,
+) -> None:
+    conversation_id = uuid.uuid4()
+    fetch = Fetch(HistoryState())
+    other = ChatHistoryCache(3, 10, 60, redis_url="redis://fake")
+    await redis_cache.load(None, conversation_id, fetch)  # type: ignore
+    await other.load(None, conversation_id, fetch)  # type: ignore
+
+    for position in range(4):
+        await redis_cache.append(conversation_id, _message(conversation_id, position))
+
+    # Janela limitada a max_entries, vista igual pelos dois workers, sem voltar ao banco
+    mine = await redis_cache.load(None, conversation_id, fetch)  # type: ignore
+    theirs = await other.load(None, conversation_id, fetch)  # type: ignore
+    assert _contents(mine) == _contents(theirs) == ["m1", "m2", "m3"]
+    assert fetch.calls == 1
+
+
+async def test_append_without_cached_history_only_bumps_the_version(
+    redis_cache: ChatHistoryCache,
+) -> None:
+    conversation_id = uuid.uuid4()
+    await redis_cache.append(conversation_id, _message(conversation_id, 0))
+
+    fetch = Fetch(HistoryState(entries=[HistoryEntry(SenderType.USER, "do banco", STARTED)]))
+    state = await redis_cache.load(None, conversation_id, fetch)  # type: ignore
+    assert _contents(state) == ["do banco"]
+    assert fetch.calls == 1
+
+
+async def test_populate_loses_to_a_concurrent_append(redis_cache: ChatHistoryCache) -> None:
+    conversation_id = uuid.uuid4()
+    stale = HistoryState(entries=[HistoryEntry(SenderType.USER, "antigo", STARTED)])
+
+    async def fetch_racing_an_append() -> HistoryState:
+        # Mensagem nova gravada por outro worker entre a leitura da versão e o populate
+        await redis_cache.invalidate(conversation_id)
+        return stale
+
+    assert await redis_cache.load(None, conversation_id, fetch_racing_an_append) is stale  # type: ignore
+    fetch = Fetch(HistoryState())
+    await redis_cache.load(None, conversation_id, fetch)  # type: ignore
+    assert fetch.calls == 1
+
+
+async def test_invalidate_forces_a_new_fetch(redis_cache: ChatHistoryCache) -> None:
+    conversation_id = uuid.uuid4()
+    fetch = Fetch(HistoryState())
+    await redis_cache.load(None, conversation_id, fetch)  # type: ignore
+    await redis_cache.invalidate(conversation_id)
+    await redis_cache.load(None, conversation_id, fetch)  # type: ignore
+    assert fetch.calls == 2
+
+
+async def test_redis_outage_falls_back_to_the_database(
+    redis_cache: ChatHistoryCache, server: fakeredis.FakeServer
+) -> None:
+    conversation_id = uuid.uuid4()
+    fetch = Fetch(HistoryState())
+    await redis_cache.load(None, conversation_id, fetch)  # type: ignore
+
+    server.connected = False
+    await redis_cache.append(conversation_id, _message(conversation_id, 0))
+    await redis_cache.load(None, conversation_id, fetch)  # type: ignore
+    assert fetch.calls == 2
+
+
+@pytest.fixture
+async def async_session(async_engine: AsyncEngine) -> AsyncIterator[AsyncSession]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def test_local_cache_is_validated_against_the_database(
+    async_session: AsyncSession,
+) -> None:
+    user = User(email="cliente@example.com", hashed_password="")
+    async_session.add(user)
+    await async_session.flush()
+    conversation = Conversation(user_id=user.id, is_llm=True)
+    async_session.add(conversation)
+    await async_session.flush()
+    first = _message(conversation.id, 0)
+    async_session.add(first)
+    await async_session.commit()
+
+    cache = ChatHistoryCache(max_entries=3, max_conversations=10, ttl_seconds=60)
+    fetch = Fetch(HistoryState(entries=[HistoryEntry.from_message(first)]))
+    await cache.load(async_session, conversation.id, fetch)
+    await cache.load(async_session, conversation.id, fetch)
+    assert fetch.calls == 1
+
+    # Mensagem registrada pelo append: o hit continua válido
+    second = _message(conversation.id, 1)
+    async_session.add(second)
+    await async_session.commit()
+    await cache.append(conversation.id, second)
+    state = await cache.load(async_session, conversation.id, fetch)
+    assert _contents(state) == ["m0", "m1"]
+    assert fetch.calls == 1
+
+    # Mensagem gravada por outro worker (sem append aqui): o banco denuncia e o cache recarrega
+    async_session.add(_message(conversation.id, 2))
+    await async_session.commit()
+    await cache.load(async_session, conversation.id, fetch)
+    assert fetch.calls == 2
@@ -0,0 +1,176 @@
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic_ai.messages import ModelRequest, ModelResponse, SystemPromptPart
+from pydantic_ai.models.test import TestModel
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import core.chat_memory
+from core.chat_history_cache import HistoryEntry, HistoryState
+from core.chat_memory import ChatMemory, estimate_tokens
+from models.conversation import Conversation, ConversationSummary, Message, SenderType
+from models.user import User
+
+STARTED = datetime(2025, 1, 1)
+CONVERSATION_ID = uuid.uuid4()
+
+
+class FixedHistory:
+    """Cache que sempre devolve o mesmo histórico (sem banco nem Redis)"""
+
+    max_entries = 100
+
+    def __init__(self, state: HistoryState) -> None:
+        self.state = state
+        self.invalidated: list[uuid.UUID] = []
+
+    async def load(
+        self, session: object, conversation_id: uuid.UUID, fetch: Callable[[], Awaitable[object]]
+    ) -> HistoryState:
+        return self.state
+
+    async def invalidate(self, conversation_id: uuid.UUID) -> None:
+        self.invalidated.append(conversation_id)
+
+
+def _history(*contents: str, summary: str | None = None) -> HistoryState:
+    return HistoryState(
+        summary=summary,
+        summary_until=STARTED if summary else None,
+        entries=[
+            HistoryEntry(
+                SenderType.USER if index % 2 == 0 else SenderType.LLM,
+                content,
+                STARTED + timedelta(minutes=index + 1),
+            )
+            for index, content in enumerate(contents)
+        ],
+    )
+
+
+def _memory(state: HistoryState, max_messages: int = 4, token_budget: int = 1000) -> ChatMemory:
+    return ChatMemory(max_messages, token_budget, summary_batch=3, cache=FixedHistory(state))  # type: ignore
+
+
+def _contents(messages: list) -> list[str]:
+    return [part.content for message in messages for part in message.parts]
+
+
+def test_estimate_tokens() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * 40) == 10
+
+
+async def test_window_keeps_the_latest_messages_in_order() -> None:
+    state = _history("m0", "m1", "m2", "m3", "m4", "m5")
+
+    memory = await _memory(state).load(None, CONVERSATION_ID)  # type: ignore
+
+    assert _contents(memory.messages) == ["m2", "m3", "m4", "m5"]
+    assert isinstance(memory.messages[0], ModelRequest)
+    assert isinstance(memory.messages[1], ModelResponse)
+    assert memory.unsummarized == 2
+    assert memory.window_start == state.entries[2].created_at
+
+
+async def test_token_budget_cuts_the_window() -> None:
+    # 10 tokens por mensagem: o orçamento de 25 comporta só as duas últimas
+    state = _history(*(f"{index}".ljust(40, ".") for index in range(4)))
+
+    memory = await _memory(state, token_budget=25).load(None, CONVERSATION_ID)  # type: ignore
+
+    assert [content[0] for content in _contents(memory.messages)] == ["2", "3"]
+    assert memory.tokens == 20
+    assert memory.unsummarized == 2
+
+
+async def test_oversized_last_message_is_kept() -> None:
+    state = _history("curta", "x" * 4000)
+
+    memory = await _memory(state, token_budget=100).load(None, CONVERSATION_ID)  # type: ignore
+
+    assert _contents(memory.messages) == ["x" * 4000]
+    assert memory.unsummarized == 1
+
+
+async def test_summary_goes_first_as_system_prompt() -> None:
+    state = _history("m0", summary="Cliente tem dois imóveis")
+
+    memory = await _memory(state).load(None, CONVERSATION_ID)  # type: ignore
+
+    first = memory.messages[0].parts[0]
+    assert isinstance(first, SystemPromptPart)
+    assert "Cliente tem dois imóveis" in first.content
+    assert _contents(memory.messages)[1:] == ["m0"]
+
+
+async def test_empty_history() -> None:
+    memory = await _memory(HistoryState()).load(None, CONVERSATION_ID)  # type: ignore
+
+    assert memory.messages == []
+    assert memory.unsummarized == 0
+    assert memory.window_start is None
+
+
+@pytest.mark.parametrize(("messages", "scheduled"), [(6, False), (7, True)])
+async def test_checkpoint_only_after_a_full_batch(
+    monkeypatch: pytest.MonkeyPatch, messages: int, scheduled: bool
+) -> None:
+    chat_memory = _memory(_history(*(f"m{index}" for index in range(messages))))
+    calls: list[datetime] = []
+
+    async def checkpoint(conversation_id: uuid.UUID, before: datetime) -> None:
+        calls.append(before)
+
+    monkeypatch.setattr(chat_memory, "checkpoint", checkpoint)
+    memory = await chat_memory.load(None, CONVERSATION_ID)  # type: ignore
+    chat_memory.schedule_checkpoint(CONVERSATION_ID, memory)
+    chat_memory.schedule_checkpoint(CONVERSATION_ID, memory)  # já em andamento: ignorado
+    for task in list(chat_memory._checkpoints.values()):
+        await task
+
+    assert calls == ([memory.window_start] if scheduled else [])
+
+
+# Falha também com APIs depreciadas do pydantic_ai (ex.: result.data)
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+async def test_checkpoint_stores_the_summary(
+    async_engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(core.chat_memory, "async_session_maker", session_maker)
+
+    async with session_maker() as session:
+        user = User(email="cliente@example.com", hashed_password="")
+        session.add(user)
+        await session.flush()
+        conversation = Conversation(user_id=user.id, is_llm=True)
+        session.add(conversation)
+        await session.flush()
+        session.add_all(
+            Message(
+                conversation_id=conversation.id,
+                sender_type=SenderType.USER,
+                content=f"m{index}",
+                created_at=STARTED + timedelta(minutes=index),
+            )
+            for index in range(5)
+        )
+        await session.commit()
+
+    cache = FixedHistory(HistoryState())
+    chat_memory = ChatMemory(4, 1000, summary_batch=3, cache=cache)  # type: ignore
+    with chat_memory.summarizer.override(model=TestModel(custom_output_text="Resumo novo")):
+        await chat_memory.checkpoint(conversation.id, before=STARTED + timedelta(minutes=3))
+
+    async with session_maker() as session:
+        summary = (await session.exec(select(ConversationSummary))).one()
+
+    assert summary.content == "Resumo novo"
+    assert summary.covers_until == STARTED + timedelta(minutes=2)
+    assert summary.message_count == 3
+    assert cache.invalidated == [conversation.id]
@@ -0,0 +1,150 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator, Iterator
+
+import pytest
+from pydantic_ai.messages import ModelMessage
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import core.llm_chat
+from core.database import get_async_session
+from core.llm_chat import llm_chat_service
+from core.security import create_access_token
+from main import app
+from models.conversation import Message, SenderType
+from models.onboarding import (
+    OnboardingFlow,
+    OnboardingStep,
+    OnboardingStepType,
+    UserOnboardingFlow,
+    UserOnboardingStep,
+)
+from models.user import User
+
+PARTIAL = ["Olá, ", "vamos ", "começar"]
+
+
+async def _slow_model(messages: list[ModelMessage], info: AgentInfo) -> AsyncIterator[str]:
+    """Modelo que envia o início da resposta e depois fica "pensando" até ser cancelado"""
+    for chunk in PARTIAL:
+        yield chunk
+    await asyncio.Event().wait()
+    yield "nunca chega"
+
+
+@pytest.fixture
+def chat_step(session: Session) -> tuple[User, int]:
+    flow = OnboardingFlow(name="Cadastro", description="")
+    user = User(email="cliente@example.com", hashed_password="")
+    session.add_all([flow, user])
+    session.flush()
+    step = OnboardingStep(
+        name="Entrevista",
+        description="",
+        order=1,
+        type=OnboardingStepType.LLM_CHAT,
+        flow_id=flow.id,  # type: ignore
+    )
+    user_flow = UserOnboardingFlow(user_id=user.id, flow_id=flow.id)  # type: ignore
+    session.add_all([step, user_flow])
+    session.flush()
+    session.add(UserOnboardingStep(user_flow_id=user_flow.id, step_id=step.id))  # type: ignore
+    session.commit()
+    return user, step.id  # type: ignore
+
+
+@pytest.fixture
+def app_sessions(app_async_engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """Rota e sessão de limpeza (resposta truncada) no banco de teste"""
+
+    async def get_test_async_session() -> AsyncIterator[AsyncSession]:
+        async with AsyncSession(app_async_engine, expire_on_commit=False) as session:
+            yield session
+
+    monkeypatch.setattr(
+        core.llm_chat,
+        "async_session_maker",
+        async_sessionmaker(app_async_engine, class_=AsyncSession, expire_on_commit=False),
+    )
+    app.dependency_overrides[get_async_session] = get_test_async_session
+    yield
+    app.dependency_overrides.clear()
+
+
+async def _post_and_disconnect(path: str, body: dict, token: str, after_chunks: int) -> list[bytes]:
+    """
+    Chama a aplicação direto pelo ASGI e desconecta o cliente depois de `after_chunks`
+    chunks do corpo (o TestClient não simula desconexão no meio do stream)
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"content-type", b"application/json"),
+            (b"authorization", f"Bearer {token}".encode()),
+        ],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    request_sent = False
+    disconnected = asyncio.Event()
+    chunks: list[bytes] = []
+
+    async def receive() -> dict:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": json.dumps(body).encode()}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append(message["body"])
+            if len(chunks) >= after_chunks:
+                disconnected.set()
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=10)
+    return chunks
+
+
+async def test_disconnect_saves_the_partial_response_as_truncated(
+    engine: Engine, chat_step: tuple[User, int], app_sessions: None
+) -> None:
+    user, step_id = chat_step
+    cancelled = llm_chat_service.generation_stats.cancelled
+
+    with llm_chat_service.agent.override(model=FunctionModel(stream_function=_slow_model)):
+        chunks = await _post_and_disconnect(
+            f"/api/llm-chat/message/stream?step_id={step_id}",
+            {"message": "Quero montar uma holding", "step_id": step_id},
+            create_access_token(user.id),
+            after_chunks=1,
+        )
+
+    # O stream termina sem erro: nenhum chunk "complete" depois da desconexão
+    lines = [line for chunk in chunks for line in chunk.decode().splitlines() if line]
+    events = [json.loads(line.removeprefix("data: ")) for line in lines]
+    assert events and all(event["type"] == "message" for event in events)
+
+    with Session(engine) as session:
+        messages = session.exec(select(Message).order_by(Message.created_at)).all()  # type: ignore
+    assert [(m.sender_type, m.truncated) for m in messages] == [
+        (SenderType.USER, False),
+        (SenderType.LLM, True),
+    ]
+    assert messages[1].content == "".join(PARTIAL)
+    assert llm_chat_service.generation_stats.cancelled == cancelled + 1
@@ -0,0 +1,119 @@
+"""
+Conteúdo enviado ao storage numa transação sem commit vira órfão e é coletado.
+
+Precisa de um Postgres em TEST_DATABASE_URL (o store usa upsert do Postgres); sem ela, os
+testes são pulados. As tabelas ficam num schema temporário, apagado no final.
+"""
+
+import io
+import os
+import uuid
+from collections.abc import Iterator
+
+import pytest
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, select
+
+import core.content_store
+from core.content_store import collect_orphan_blobs, store_document_content
+from core.storage import InMemoryStorage
+from models.document import DocumentBlob
+
+CONTENT = b"%PDF-1.4 contrato"
+
+
+@pytest.fixture(scope="module")
+def engine() -> Iterator[Engine]:
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL não definida (precisa de um Postgres)")
+    schema = f"content_store_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(url)
+    try:
+        with admin.begin() as connection:
+            connection.exec_driver_sql(f"CREATE SCHEMA {schema}")
+    except OperationalError as e:
+        pytest.skip(f"Postgres indisponível: {e}")
+
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    SQLModel.metadata.create_all(engine)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as connection:
+            connection.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+        admin.dispose()
+
+
+@pytest.fixture
+def storage(engine: Engine, monkeypatch: pytest.MonkeyPatch) -> Iterator[InMemoryStorage]:
+    storage = InMemoryStorage()
+    monkeypatch.setattr(core.content_store, "storage", storage)
+    yield storage
+    with Session(engine) as session:
+        for blob in session.exec(select(DocumentBlob)).all():
+            session.delete(blob)
+        session.commit()
+
+
+def _blobs(engine: Engine) -> dict[str, int]:
+    with Session(engine) as session:
+        return {blob.sha256: blob.ref_count for blob in session.exec(select(DocumentBlob))}
+
+
+def _store(session: Session) -> DocumentBlob:
+    return store_document_content(session, io.BytesIO(CONTENT), 1024, "application/pdf")
+
+
+def test_commit_keeps_the_content(engine: Engine, storage: InMemoryStorage) -> None:
+    with Session(engine) as session:
+        blob = _store(session)
+        session.commit()
+        sha256, storage_path = blob.sha256, blob.storage_path
+
+    assert _blobs(engine) == {sha256: 1}
+    assert storage.exists(storage_path)
+    with Session(engine) as session:
+        assert collect_orphan_blobs(session) == 0
+
+
+@pytest.mark.parametrize("finish", ["rollback", "close"])
+def test_uncommitted_upload_is_collected(
+    engine: Engine, storage: InMemoryStorage, finish: str
+) -> None:
+    with Session(engine) as session:
+        blob = _store(session)
+        sha256, storage_path = blob.sha256, blob.storage_path
+        if finish == "rollback":
+            session.rollback()
+
+    # Sem Document apontando para ele: fica como órfão até a coleta
+    assert _blobs(engine) == {sha256: 0}
+    assert storage.exists(storage_path)
+
+    with Session(engine) as session:
+        assert collect_orphan_blobs(session) == 1
+    assert _blobs(engine) == {}
+    assert not storage.exists(storage_path)
+
+
+def test_rollback_keeps_content_referenced_elsewhere(
+    engine: Engine, storage: InMemoryStorage
+) -> None:
+    with Session(engine) as session:
+        blob = _store(session)
+        session.commit()
+        sha256, storage_path = blob.sha256, blob.storage_path
+
+    # Arquivo perdido no storage: o reenvio o grava de novo, e o rollback não pode apagá-lo
+    storage.delete(storage_path)
+    with Session(engine) as session:
+        _store(session)
+        session.rollback()
+
+    assert _blobs(engine) == {sha256: 1}
+    assert storage.exists(storage_path)
+    with Session(engine) as session:
+        assert collect_orphan_blobs(session) == 0
@@ -0,0 +1,87 @@
+import logging
+from collections.abc import Iterator
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from core.config import settings
+from core.db_instrumentation import SQLTimingMiddleware, instrument_engine, normalize_sql
+
+
+def test_normalize_sql() -> None:
+    assert normalize_sql("SELECT *\n  FROM  message\n\tWHERE id = %(id)s ") == (
+        "SELECT * FROM message WHERE id = %(id)s"
+    )
+    assert normalize_sql("SELECT " + "x" * 20, max_length=10) == "SELECT xxx..."
+    assert normalize_sql("SELECT 1", max_length=8) == "SELECT 1"
+
+
+@pytest.fixture
+def engine() -> Iterator[Engine]:
+    # Banco em memória compartilhado com a thread das rotas síncronas
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_slow_queries_are_logged(
+    engine: Engine, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(settings, "DB_SLOW_QUERY_MS", 0.0)
+    with caplog.at_level(logging.WARNING, "core.db_instrumentation"), engine.connect() as conn:
+        conn.execute(text("SELECT\n    1"))
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].getMessage().endswith("ms): SELECT 1")
+
+
+def test_failed_query_does_not_break_the_timing(engine: Engine) -> None:
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM nao_existe"))
+        assert conn.info["query_started_at"] == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_started_at"] == []
+
+
+def _app(engine: Engine, queries: int) -> Starlette:
+    def endpoint(request: Request) -> PlainTextResponse:
+        with engine.connect() as conn:
+            for _ in range(queries):
+                conn.execute(text("SELECT 1"))
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/", endpoint)])
+    app.add_middleware(SQLTimingMiddleware)
+    return app
+
+
+def test_server_timing_header(engine: Engine) -> None:
+    response = TestClient(_app(engine, 3)).get("/")
+
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert response.headers["Server-Timing"].endswith(';desc="3 queries"')
+
+
+def test_query_budget_warning(
+    engine: Engine, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(settings, "DB_REQUEST_QUERY_BUDGET", 2)
+    with caplog.at_level(logging.WARNING, "core.db_instrumentation"):
+        TestClient(_app(engine, 2)).get("/")
+        assert caplog.records == []
+
+        TestClient(_app(engine, 3)).get("/")
+
+    assert len(caplog.records) == 1
+    assert "GET / executou 3 queries" in caplog.records[0].getMessage()
@@ -0,0 +1,172 @@
+"""Número de queries SQL das rotas de documentos (autenticação incluída): fixo, sem N+1"""
+
+from collections.abc import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from core.principal_cache import principal_cache
+from core.security import create_access_token
+from models.document import Document, DocumentExtractedData, DocumentRequirement, DocumentReview
+from models.onboarding import (
+    OnboardingFlow,
+    OnboardingStep,
+    OnboardingStepType,
+    UserOnboardingFlow,
+    UserOnboardingStep,
+)
+from models.user import User
+
+
+@pytest.fixture(params=[1, 5], ids=["1-doc", "5-docs"])
+def documents(request: pytest.FixtureRequest, session: Session) -> list[Document]:
+    """Documentos de um step, cada um com campos extraídos e uma revisão"""
+    user = User(email="consultor@example.com", hashed_password="", is_consultant=True)
+    flow = OnboardingFlow(name="Cadastro", description="")
+    session.add_all([user, flow])
+    session.flush()
+    step = OnboardingStep(
+        name="Verificação",
+        description="",
+        order=1,
+        type=OnboardingStepType.DATA_VERIFICATION,
+        flow_id=flow.id,  # type: ignore
+    )
+    user_flow = UserOnboardingFlow(user_id=user.id, flow_id=flow.id)  # type: ignore
+    session.add_all([step, user_flow])
+    session.flush()
+    user_step = UserOnboardingStep(user_flow_id=user_flow.id, step_id=step.id)  # type: ignore
+    requirement = DocumentRequirement(
+        step_id=step.id,  # type: ignore
+        name="RG",
+        description="",
+        doc_type="rg",
+    )
+    session.add_all([user_step, requirement])
+    session.flush()
+
+    documents = []
+    for index in range(request.param):
+        document = Document(
+            user_step_id=user_step.id,  # type: ignore
+            requirement_id=requirement.id,
+            file_path=f"blobs/{index}",
+            original_filename=f"rg-{index}.pdf",
+            file_type="application",
+            file_size=100,
+            content_type="application/pdf",
+            uploaded_by_id=user.id,
+            status="validated",
+        )
+        session.add(document)
+        session.flush()
+        session.add_all(
+            [
+                DocumentExtractedData(
+                    document_id=document.id,
+                    field_name=name,
+                    field_value="x",
+                    confidence=0.9,
+                    extraction_method="ocr",
+                )
+                for name in ("nome", "cpf")
+            ]
+        )
+        session.add(DocumentReview(document_id=document.id, reviewer_id=user.id, status="approved"))
+        documents.append(document)
+    session.commit()
+    return documents
+
+
+@pytest.fixture
+def api(client: TestClient, documents: list[Document]) -> Iterator[TestClient]:
+    """Cliente autenticado como o consultor, pelo get_current_user de verdade (token JWT)"""
+    token = create_access_token(documents[0].uploaded_by_id)
+    client.headers["Authorization"] = f"Bearer {token}"
+    yield client
+    principal_cache.clear()
+
+
+def _get(api: TestClient, statements: list[str], url: str) -> list[str]:
+    # Cache do usuário vazio: a query de autenticação entra na contagem
+    principal_cache.clear()
+    statements.clear()
+    response = api.get(url)
+    assert response.status_code == 200, response.text
+    return list(statements)
+
+
+def _is_user_query(sql: str) -> bool:
+    return 'FROM "user"' in sql or "FROM user " in sql
+
+
+def test_authentication_loads_only_the_user(
+    api: TestClient, documents: list[Document], statements: list[str]
+) -> None:
+    executed = _get(api, statements, f"/api/documents/{documents[-1].id}")
+    auth = [sql for sql in executed if _is_user_query(sql)]
+    # Só a linha do usuário: nada de conversas/mensagens carregadas junto (selectin)
+    assert len(auth) == 1, executed
+    assert not any("FROM conversation" in sql or "FROM message" in sql for sql in executed)
+
+    # Com o usuário em cache, a autenticação não vai ao banco
+    statements.clear()
+    api.get(f"/api/documents/{documents[-1].id}")
+    assert not any(_is_user_query(sql) for sql in statements)
+
+
+def test_list_user_step_documents(
+    api: TestClient, documents: list[Document], statements: list[str]
+) -> None:
+    executed = _get(
+        api, statements, f"/api/documents/user-steps/{documents[0].user_step_id}/documents"
+    )
+    # usuário + step + documentos + campos extraídos + revisões
+    assert len(executed) == 5, executed
+
+
+def test_get_user_step_document(
+    api: TestClient, documents: list[Document], statements: list[str]
+) -> None:
+    document = documents[-1]
+    url = f"/api/documents/user-steps/{document.user_step_id}/documents/{document.id}"
+    executed = _get(api, statements, url)
+    assert len(executed) == 5, executed
+
+
+def test_list_documents_for_requirement(
+    api: TestClient, documents: list[Document], statements: list[str]
+) -> None:
+    executed = _get(api, statements, f"/api/documents/requirements/{documents[0].requirement_id}")
+    # usuário + requisito + documentos + campos extraídos + revisões
+    assert len(executed) == 5, executed
+
+
+def test_get_document_by_id(
+    api: TestClient, documents: list[Document], statements: list[str]
+) -> None:
+    executed = _get(api, statements, f"/api/documents/{documents[-1].id}")
+    assert len(executed) == 4, executed
+
+
+def test_admin_list_documents(
+    api: TestClient, documents: list[Document], statements: list[str]
+) -> None:
+    executed = _get(api, statements, "/api/admin/documents/?status=validated")
+    assert len(executed) == 4, executed
+
+
+def test_admin_update_document_status(
+    api: TestClient, documents: list[Document], statements: list[str]
+) -> None:
+    url = f"/api/admin/documents/{documents[-1].id}/status"
+    principal_cache.clear()
+    statements.clear()
+    response = api.patch(
+        url,
+        json={"status": "invalid", "rejection_reason": "ilegível"},
+    )
+    assert response.status_code == 200, response.text
+    # usuário + documento + UPDATE + refresh + campos extraídos + revisões
+    assert len(statements) == 6, statements
@@ -0,0 +1,136 @@
+import hashlib
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine
+from sqlmodel import Session, select
+
+import core.ocr.pipeline
+import tasks.document_tasks
+from core.ocr import StubOCREngine
+from core.ocr.cache import ocr_cache
+from core.security import create_access_token
+from core.storage import InMemoryStorage
+from models.document import Document, DocumentExtractedData, DocumentRequirement, OCRCacheEntry
+from models.onboarding import (
+    OnboardingFlow,
+    OnboardingStep,
+    OnboardingStepType,
+    UserOnboardingFlow,
+    UserOnboardingStep,
+)
+from models.user import User
+from tasks.document_tasks import process_document_ocr_task
+
+CONTENT = b"Nome: Maria Souza\nCPF 123.456.789-09"
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def storage(monkeypatch: pytest.MonkeyPatch) -> InMemoryStorage:
+    storage = InMemoryStorage()
+    monkeypatch.setattr(core.ocr.pipeline, "storage", storage)
+    return storage
+
+
+@pytest.fixture
+def document(
+    engine: Engine, session: Session, storage: InMemoryStorage, monkeypatch: pytest.MonkeyPatch
+) -> Document:
+    """Documento de uma página no storage, com o OCR rodando no banco de teste"""
+    monkeypatch.setattr(tasks.document_tasks, "engine", engine)
+    admin = User(email="admin@example.com", hashed_password="", is_admin=True)
+    flow = OnboardingFlow(name="Cadastro", description="")
+    session.add_all([admin, flow])
+    session.flush()
+    step = OnboardingStep(
+        name="Verificação",
+        description="",
+        order=1,
+        type=OnboardingStepType.DATA_VERIFICATION,
+        flow_id=flow.id,  # type: ignore
+    )
+    user_flow = UserOnboardingFlow(user_id=admin.id, flow_id=flow.id)  # type: ignore
+    session.add_all([step, user_flow])
+    session.flush()
+    user_step = UserOnboardingStep(user_flow_id=user_flow.id, step_id=step.id)  # type: ignore
+    requirement = DocumentRequirement(
+        step_id=step.id,  # type: ignore
+        name="RG",
+        description="",
+        doc_type="rg",
+    )
+    session.add_all([user_step, requirement])
+    session.flush()
+    storage.put(f"blobs/{SHA256}", io.BytesIO(CONTENT))
+    document = Document(
+        user_step_id=user_step.id,  # type: ignore
+        requirement_id=requirement.id,
+        file_path=f"blobs/{SHA256}",
+        original_filename="rg.txt",
+        file_type="text",
+        file_size=len(CONTENT),
+        sha256=SHA256,
+        content_type="text/plain",
+        uploaded_by_id=admin.id,
+        status="uploaded",
+    )
+    session.add(document)
+    session.commit()
+    return document
+
+
+def _fields(session: Session, document: Document) -> dict[str, str]:
+    rows = session.exec(
+        select(DocumentExtractedData).where(DocumentExtractedData.document_id == document.id)
+    ).all()
+    return {row.field_name: row.field_value for row in rows}
+
+
+def _reset(session: Session, document: Document) -> None:
+    document.ocr_processed = False
+    document.status = "uploaded"
+    session.add(document)
+    session.commit()
+
+
+@pytest.mark.parametrize("force", [False, True])
+def test_reprocess_uses_the_cache_unless_forced(
+    session: Session, storage: InMemoryStorage, document: Document, force: bool
+) -> None:
+    process_document_ocr_task(str(document.id))
+    session.expire_all()
+    assert _fields(session, document)["cpf"] == "123.456.789-09"
+    assert session.get(OCRCacheEntry, ocr_cache.key(SHA256, StubOCREngine())) is not None
+
+    # O mesmo conteúdo agora é lido de outro jeito (ex.: motor corrigido sem mudar a versão)
+    storage.put(document.file_path, io.BytesIO(CONTENT.replace(b"789-09", b"789-00")))
+    _reset(session, document)
+    process_document_ocr_task(str(document.id), force=force)
+
+    session.expire_all()
+    expected = "123.456.789-00" if force else "123.456.789-09"
+    assert _fields(session, document)["cpf"] == expected
+    entry = session.get(OCRCacheEntry, ocr_cache.key(SHA256, StubOCREngine()))
+    assert entry is not None
+    assert ("789-00" in entry.pages[0]["text"]) == force
+
+
+def test_admin_reprocess_forces_the_ocr(
+    client: TestClient, document: Document, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls = []
+    monkeypatch.setattr(
+        "api.routes.admin_documents.enqueue_document_ocr",
+        lambda document_id, **options: calls.append((document_id, options)),
+    )
+    token = create_access_token(document.uploaded_by_id)
+
+    response = client.post(
+        f"/api/admin/documents/{document.id}/reprocess",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 202, response.text
+    assert calls == [(document.id, {"interactive": True, "force": True})]
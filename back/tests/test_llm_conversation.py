@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.llm_chat import llm_chat_service
+from models.conversation import Conversation
+from models.onboarding import OnboardingFlow, OnboardingStep, OnboardingStepType
+from models.user import User
+
+
+@pytest.fixture
+async def user_and_step(async_engine: AsyncEngine) -> tuple[User, int]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        flow = OnboardingFlow(name="Cadastro", description="")
+        user = User(email="cliente@example.com", hashed_password="")
+        session.add_all([flow, user])
+        await session.flush()
+        step = OnboardingStep(
+            name="Entrevista",
+            description="",
+            order=1,
+            type=OnboardingStepType.LLM_CHAT,
+            flow_id=flow.id,  # type: ignore
+        )
+        session.add(step)
+        await session.commit()
+        return user, step.id  # type: ignore
+
+
+async def _count(async_engine: AsyncEngine) -> int:
+    async with AsyncSession(async_engine) as session:
+        return (await session.exec(select(func.count()).select_from(Conversation))).one()
+
+
+async def test_get_or_create_returns_the_same_conversation(
+    async_engine: AsyncEngine, user_and_step: tuple[User, int]
+) -> None:
+    user, step_id = user_and_step
+
+    async def get_or_create() -> Conversation:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await llm_chat_service.get_or_create_conversation(session, user.id, step_id)
+
+    conversations = await asyncio.gather(*(get_or_create() for _ in range(5)))
+
+    assert len({conversation.id for conversation in conversations}) == 1
+    assert conversations[0].is_llm
+    assert conversations[0].onboarding_step_id == step_id
+    assert await _count(async_engine) == 1
+
+
+async def test_one_llm_conversation_per_user_and_step(
+    async_engine: AsyncEngine, user_and_step: tuple[User, int]
+) -> None:
+    user, step_id = user_and_step
+    async with AsyncSession(async_engine) as session:
+        session.add(Conversation(user_id=user.id, is_llm=True, onboarding_step_id=step_id))
+        await session.commit()
+
+        # Conversas com consultores no mesmo step não entram no índice único
+        session.add_all(
+            Conversation(user_id=user.id, is_llm=False, onboarding_step_id=step_id)
+            for _ in range(2)
+        )
+        await session.commit()
+
+        session.add(Conversation(user_id=user.id, is_llm=True, onboarding_step_id=step_id))
+        with pytest.raises(IntegrityError):
+            await session.commit()
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+ROUTE = "/api/documents/{document_id}"
+BACK_DIR = Path(__file__).resolve().parent.parent
+
+# Um processo da API: faz uma request numa rota com parâmetro e, se pedido, imprime o /metrics
+WORKER = """
+import sys
+import uuid
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+with TestClient(app) as client:
+    client.get(f"/api/documents/{uuid.uuid4()}")
+    if sys.argv[1:] == ["scrape"]:
+        print(client.get("/metrics").text)
+"""
+
+
+def _count(route: str, status: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count",
+        {"method": "GET", "route": route, "status": status},
+    )
+    return value or 0.0
+
+
+def test_requests_are_labelled_by_route_template(client: TestClient) -> None:
+    before = _count(ROUTE, "401"), _count("unmatched", "404")
+    document_id = uuid.uuid4()
+
+    # Sem token: a rota casa, mas a autenticação recusa
+    assert client.get(f"/api/documents/{document_id}").status_code == 401
+    assert client.get(f"/api/documents/{uuid.uuid4()}").status_code == 401
+    assert client.get("/nao-existe").status_code == 404
+
+    assert (_count(ROUTE, "401"), _count("unmatched", "404")) == (before[0] + 2, before[1] + 1)
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert f'route="{ROUTE}"' in metrics.text
+    assert str(document_id) not in metrics.text
+
+
+def test_multiprocess_metrics_are_aggregated(tmp_path: Path) -> None:
+    env = {
+        **os.environ,
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path),
+        "OPENAI_API_KEY": "test",
+        "DB_SCHEMA_STARTUP": "off",
+    }
+
+    def run(*args: str) -> str:
+        result = subprocess.run(
+            [sys.executable, "-c", WORKER, *args],
+            cwd=BACK_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=True,
+        )
+        return result.stdout
+
+    # Dois processos gravam no diretório; o terceiro soma os três no /metrics
+    run()
+    run()
+    metrics = run("scrape")
+
+    sample = f'http_request_duration_seconds_count{{method="GET",route="{ROUTE}",status="401"}}'
+    assert f"{sample} 3.0" in metrics.splitlines()
@@ -0,0 +1,119 @@
+import pytest
+
+from core.config import settings
+from core.ocr import StubOCREngine, get_ocr_engine
+from core.ocr.engine import FieldCandidate, PageResult
+from core.ocr.fields import extract_fields, merge_fields
+from core.ocr.pipeline import recognize_pages
+
+
+def test_stub_engine_splits_pdf_pages() -> None:
+    engine = StubOCREngine()
+    assert engine.split_pages(b"um\fdois\ftres", "application/pdf") == [b"um", b"dois", b"tres"]
+    assert engine.split_pages(b"um\fdois", "image/png") == [b"um\fdois"]
+
+
+def test_stub_engine_normalizes_the_page() -> None:
+    engine = StubOCREngine()
+    # NFD -> NFC, \r\n -> \n, espaços e caracteres de controle -> um espaço
+    page = "  Jose\u0301\tda\x00Silva\r\nRG: 1.234.567  ".encode()
+    assert engine.preprocess(page) == "José da Silva\nRG: 1.234.567".encode()
+
+
+def test_stub_engine_confidence_is_the_readable_ratio() -> None:
+    engine = StubOCREngine()
+    assert engine.recognize(b"CPF 123", 1) == PageResult(1, "CPF 123", 1.0)
+    assert engine.recognize(b"ab##", 2).confidence == 0.5
+    assert engine.recognize(b"", 3).confidence == 0.0
+
+
+def test_recognize_pages_numbers_from_one() -> None:
+    pages = recognize_pages(StubOCREngine(), [b"a", b"b"])
+    assert [page.page_number for page in pages] == [1, 2]
+
+
+def test_extract_fields() -> None:
+    text = (
+        "Nome: Maria Souza\n"
+        "CPF 123.456.789-09 RG: 12.345.678-X\n"
+        "CNPJ 12.345.678/0001-90 em 01/02/2024, valor R$ 1.234,56"
+    )
+    candidates = extract_fields([PageResult(page_number=2, text=text, confidence=0.8)])
+
+    assert {c.field_name: c.value for c in candidates} == {
+        "nome": "Maria Souza",
+        "cpf": "123.456.789-09",
+        "rg": "12.345.678-X",
+        "cnpj": "12.345.678/0001-90",
+        "data": "01/02/2024",
+        "valor": "R$ 1.234,56",
+    }
+    assert {(c.confidence, c.page_number) for c in candidates} == {(0.8, 2)}
+
+
+def test_extract_fields_keeps_every_occurrence() -> None:
+    pages = [
+        PageResult(page_number=1, text="01/01/2020 e 02/02/2021", confidence=0.9),
+        PageResult(page_number=2, text="03/03/2022", confidence=0.7),
+    ]
+    dates = [(c.value, c.page_number) for c in extract_fields(pages) if c.field_name == "data"]
+    assert dates == [("01/01/2020", 1), ("02/02/2021", 1), ("03/03/2022", 2)]
+
+
+def test_get_ocr_engine(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "OCR_ENGINE", "stub")
+    assert isinstance(get_ocr_engine(), StubOCREngine)
+
+    monkeypatch.setattr(settings, "OCR_ENGINE", "inexistente")
+    with pytest.raises(RuntimeError, match="inexistente"):
+        get_ocr_engine()
+
+
+def _candidate(
+    value: str, confidence: float, page_number: int, field_name: str = "cpf"
+) -> FieldCandidate:
+    return FieldCandidate(field_name, value, confidence, page_number)
+
+
+def test_merge_fields_agreeing_pages_keep_the_value() -> None:
+    merged = merge_fields([_candidate("123", 0.9, 1), _candidate("123", 0.7, 2)])
+    assert merged == [_candidate("123", 0.8, 1)]
+
+
+def test_merge_fields_value_with_more_support_wins() -> None:
+    # 0.5 + 0.5 em duas páginas supera uma leitura isolada com 0.9
+    merged = merge_fields(
+        [_candidate("111", 0.9, 1), _candidate("222", 0.5, 2), _candidate("222", 0.5, 3)]
+    )
+    assert len(merged) == 1
+    assert merged[0].value == "222"
+    assert merged[0].page_number == 2
+    # Concordância 1.0/1.9 vezes confiança média 0.5: o conflito derruba a confiança
+    assert merged[0].confidence == pytest.approx(0.2632)
+
+
+def test_merge_fields_ignores_case_and_spaces() -> None:
+    merged = merge_fields(
+        [
+            _candidate("Maria  Souza", 0.6, 1, "nome"),
+            _candidate("maria souza", 0.8, 2, "nome"),
+        ]
+    )
+    assert merged == [_candidate("Maria  Souza", 0.7, 1, "nome")]
+
+
+def test_merge_fields_tie_keeps_the_first_value() -> None:
+    merged = merge_fields([_candidate("111", 0.5, 1), _candidate("222", 0.5, 2)])
+    assert (merged[0].value, merged[0].confidence) == ("111", 0.25)
+
+
+def test_merge_fields_one_value_per_field() -> None:
+    merged = merge_fields(
+        [
+            _candidate("123", 0.9, 1),
+            _candidate("01/01/2020", 0.9, 1, "data"),
+            _candidate("123", 0.9, 2),
+        ]
+    )
+    assert [(c.field_name, c.value) for c in merged] == [("cpf", "123"), ("data", "01/01/2020")]
+    assert merge_fields([]) == []
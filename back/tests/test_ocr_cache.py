@@ -0,0 +1,129 @@
+from dataclasses import asdict
+
+import fakeredis
+import pytest
+from sqlmodel import Session
+
+from core.ocr import StubOCREngine
+from core.ocr.cache import OCRCache
+from core.ocr.engine import PageResult
+from models.document import OCRCacheEntry
+
+SHA256 = "ab" * 32
+PAGES = [PageResult(1, "CPF 123.456.789-09", 0.95), PageResult(2, "RG: 12.345.678", 0.9)]
+
+
+@pytest.fixture
+def server() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(server: fakeredis.FakeServer) -> OCRCache:
+    cache = OCRCache(ttl_seconds=60, max_entries=2)
+    cache._redis = fakeredis.FakeRedis(server=server)
+    return cache
+
+
+def test_key_changes_with_engine_version_and_params() -> None:
+    engine = StubOCREngine()
+    key = OCRCache.key(SHA256, engine)
+
+    assert key.startswith(f"{SHA256}:stub:1:")
+    assert OCRCache.key(SHA256, StubOCREngine(page_latency=1.0)) == key  # não é parâmetro
+    assert OCRCache.key(SHA256, StubOCREngine(unicode_form="NFKC")) != key
+    engine.version = "2"
+    assert OCRCache.key(SHA256, engine) != key
+
+
+def test_no_sha256_is_never_cached(cache: OCRCache) -> None:
+    assert cache.get(None, None, StubOCREngine()) is None  # type: ignore
+    assert cache.stats() == {}
+
+
+def test_redis_hit_skips_the_database(cache: OCRCache) -> None:
+    engine = StubOCREngine()
+    cache._redis_set(cache.key(SHA256, engine), [asdict(page) for page in PAGES])
+
+    # Sem sessão: um acesso ao banco quebraria o teste
+    assert cache.get(None, SHA256, engine) == PAGES  # type: ignore
+    assert cache.stats() == {"redis_hits": 1}
+
+
+def test_database_hit_is_promoted_to_redis(cache: OCRCache, session: Session) -> None:
+    engine = StubOCREngine()
+    key = cache.key(SHA256, engine)
+    session.add(
+        OCRCacheEntry(
+            cache_key=key,
+            sha256=SHA256,
+            engine_id=engine.engine_id,
+            engine_version=engine.version,
+            params_hash=key.rsplit(":", 1)[1],
+            pages=[asdict(page) for page in PAGES],
+        )
+    )
+    session.commit()
+
+    assert cache.get(session, SHA256, engine) == PAGES
+    session.commit()
+    assert cache.get(None, SHA256, engine) == PAGES  # type: ignore
+
+    entry = session.get(OCRCacheEntry, key, populate_existing=True)
+    assert entry is not None
+    assert entry.hit_count == 1
+    assert entry.last_used_at is not None
+    assert cache.stats() == {"db_hits": 1, "redis_hits": 1}
+
+
+def test_miss(cache: OCRCache, session: Session) -> None:
+    assert cache.get(session, SHA256, StubOCREngine()) is None
+    assert cache.stats() == {"misses": 1}
+
+
+def test_redis_keeps_the_most_recently_used_entries(
+    cache: OCRCache, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    clock = iter(range(100))
+    monkeypatch.setattr("core.ocr.cache.time.time", lambda: next(clock))
+    data = [asdict(PAGES[0])]
+
+    cache._redis_set("a", data)
+    cache._redis_set("b", data)
+    assert cache._redis_get("a") == data  # "a" passa a ser a mais recente
+    cache._redis_set("c", data)
+
+    assert cache._redis_get("b") is None
+    assert cache._redis_get("a") == data
+    assert cache._redis_get("c") == data
+
+
+def test_redis_outage_falls_back_to_the_database(
+    cache: OCRCache, server: fakeredis.FakeServer, session: Session
+) -> None:
+    server.connected = False
+    assert cache.get(session, SHA256, StubOCREngine()) is None
+    assert cache.stats() == {"misses": 1}
+
+
+def test_evict_removes_both_tiers(cache: OCRCache, session: Session) -> None:
+    engine = StubOCREngine()
+    key = cache.key(SHA256, engine)
+    session.add(
+        OCRCacheEntry(
+            cache_key=key,
+            sha256=SHA256,
+            engine_id=engine.engine_id,
+            engine_version=engine.version,
+            params_hash=key.rsplit(":", 1)[1],
+            pages=[asdict(page) for page in PAGES],
+        )
+    )
+    session.commit()
+    cache._redis_set(key, [asdict(page) for page in PAGES])
+
+    cache.evict(session, SHA256, engine)
+    session.commit()
+
+    assert cache.get(session, SHA256, engine) is None
+    assert session.get(OCRCacheEntry, key) is None
@@ -0,0 +1,219 @@
+"""
+Gravação em lote dos campos extraídos.
+
+Os casos rodam no SQLite e, com TEST_DATABASE_URL, também no Postgres (num schema
+temporário, apagado no final); o caminho por COPY só existe no Postgres.
+"""
+
+import os
+import uuid
+from collections.abc import Iterator
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, select
+
+import core.ocr.writer
+from core.ocr.engine import FieldCandidate
+from core.ocr.writer import COPY_THRESHOLD, write_extracted_fields
+from models.document import Document, DocumentExtractedData, DocumentRequirement
+from models.onboarding import (
+    OnboardingFlow,
+    OnboardingStep,
+    OnboardingStepType,
+    UserOnboardingFlow,
+    UserOnboardingStep,
+)
+from models.user import User
+
+METHOD = "ocr"
+
+
+@pytest.fixture(scope="module")
+def postgres_engine() -> Iterator[Engine]:
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL não definida (precisa de um Postgres)")
+    schema = f"ocr_writer_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(url)
+    try:
+        with admin.begin() as connection:
+            connection.exec_driver_sql(f"CREATE SCHEMA {schema}")
+    except OperationalError as e:
+        pytest.skip(f"Postgres indisponível: {e}")
+
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    SQLModel.metadata.create_all(engine)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as connection:
+            connection.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+        admin.dispose()
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def db(request: pytest.FixtureRequest) -> Engine:
+    if request.param == "sqlite":
+        return request.getfixturevalue("engine")
+    return request.getfixturevalue("postgres_engine")
+
+
+@pytest.fixture
+def document(db: Engine) -> Iterator[tuple[uuid.UUID, uuid.UUID]]:
+    """(documento, usuário) recém-criados; os dados do documento são apagados no final"""
+    with Session(db) as session:
+        user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="")
+        flow = OnboardingFlow(name="Cadastro", description="")
+        session.add_all([user, flow])
+        session.flush()
+        step = OnboardingStep(
+            name="Verificação",
+            description="",
+            order=1,
+            type=OnboardingStepType.DATA_VERIFICATION,
+            flow_id=flow.id,  # type: ignore
+        )
+        user_flow = UserOnboardingFlow(user_id=user.id, flow_id=flow.id)  # type: ignore
+        session.add_all([step, user_flow])
+        session.flush()
+        user_step = UserOnboardingStep(user_flow_id=user_flow.id, step_id=step.id)  # type: ignore
+        requirement = DocumentRequirement(
+            step_id=step.id,  # type: ignore
+            name="RG",
+            description="",
+            doc_type="rg",
+        )
+        session.add_all([user_step, requirement])
+        session.flush()
+        document = Document(
+            user_step_id=user_step.id,  # type: ignore
+            requirement_id=requirement.id,
+            file_path="rg.txt",
+            original_filename="rg.txt",
+            file_type="text",
+            file_size=1,
+            content_type="text/plain",
+            uploaded_by_id=user.id,
+        )
+        session.add(document)
+        session.commit()
+        ids = document.id, user.id
+
+    yield ids
+
+    with Session(db) as session:
+        rows = session.exec(
+            select(DocumentExtractedData).where(DocumentExtractedData.document_id == ids[0])
+        ).all()
+        for row in rows:
+            session.delete(row)
+        session.commit()
+
+
+def _fields(**values: str) -> list[FieldCandidate]:
+    return [FieldCandidate(name, value, 0.9, 1) for name, value in values.items()]
+
+
+def _write(db: Engine, document_id: uuid.UUID, fields: list[FieldCandidate], method: str) -> None:
+    with Session(db) as session:
+        write_extracted_fields(session, document_id, fields, method)
+        session.commit()
+
+
+def _rows(db: Engine, document_id: uuid.UUID) -> dict[tuple[str, str], DocumentExtractedData]:
+    with Session(db) as session:
+        rows = session.exec(
+            select(DocumentExtractedData).where(DocumentExtractedData.document_id == document_id)
+        ).all()
+    return {(row.extraction_method, row.field_name): row for row in rows}
+
+
+def test_rewrite_updates_and_removes_fields(
+    db: Engine, document: tuple[uuid.UUID, uuid.UUID]
+) -> None:
+    document_id, user_id = document
+    _write(db, document_id, _fields(nome="Maria", cpf="123", rg="456"), METHOD)
+    _write(db, document_id, _fields(nome="Maria (manual)"), "manual")
+    first = _rows(db, document_id)
+    assert len(first) == 4
+
+    # Verificação manual dos dois campos que continuam no reprocessamento
+    with Session(db) as session:
+        for name in ("nome", "cpf"):
+            row = session.get(DocumentExtractedData, first[(METHOD, name)].id)
+            row.verified = True  # type: ignore
+            row.verified_by_user_id = user_id  # type: ignore
+            row.verified_at = datetime(2026, 1, 1)  # type: ignore
+            session.add(row)
+        session.commit()
+
+    # Último valor vence quando o mesmo campo aparece duas vezes
+    rewrite = [*_fields(nome="Maria", cpf="999"), FieldCandidate("cpf", "124", 0.8, 2)]
+    _write(db, document_id, rewrite, METHOD)
+
+    rows = _rows(db, document_id)
+    assert set(rows) == {(METHOD, "nome"), (METHOD, "cpf"), ("manual", "nome")}
+    nome, cpf = rows[(METHOD, "nome")], rows[(METHOD, "cpf")]
+    # Upsert: mesmas linhas, sem duplicar
+    assert nome.id == first[(METHOD, "nome")].id
+    assert cpf.id == first[(METHOD, "cpf")].id
+    # Valor igual mantém a verificação; valor novo a descarta
+    assert (nome.field_value, nome.verified, nome.verified_by_user_id) == ("Maria", True, user_id)
+    assert (cpf.field_value, cpf.confidence, cpf.verified) == ("124", 0.8, False)
+    assert (cpf.verified_by_user_id, cpf.verified_at) == (None, None)
+    # Outros métodos de extração não são tocados
+    assert rows[("manual", "nome")].field_value == "Maria (manual)"
+
+
+def test_empty_rewrite_removes_every_field(
+    db: Engine, document: tuple[uuid.UUID, uuid.UUID]
+) -> None:
+    document_id, _ = document
+    _write(db, document_id, _fields(nome="Maria", cpf="123"), METHOD)
+    _write(db, document_id, [], METHOD)
+    assert _rows(db, document_id) == {}
+
+
+@pytest.mark.parametrize("db", ["postgres"], indirect=True)
+def test_large_batch_goes_through_copy(
+    db: Engine, document: tuple[uuid.UUID, uuid.UUID], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    document_id, _ = document
+    copies = []
+    copy_upsert = core.ocr.writer._copy_upsert
+
+    def spy(session: Session, rows: list) -> None:
+        copies.append(len(rows))
+        copy_upsert(session, rows)
+
+    monkeypatch.setattr(core.ocr.writer, "_copy_upsert", spy)
+    count = 2 * COPY_THRESHOLD + 100
+    _write(
+        db,
+        document_id,
+        _fields(**{f"campo_{index}": str(index) for index in range(count)}),
+        METHOD,
+    )
+    first = _rows(db, document_id)
+
+    # Reprocessamento: metade dos campos some e o resto muda de valor (ainda acima do limite)
+    kept = range(0, count, 2)
+    _write(
+        db,
+        document_id,
+        _fields(**{f"campo_{index}": f"novo {index}" for index in kept}),
+        METHOD,
+    )
+    rows = _rows(db, document_id)
+
+    assert copies == [count, len(kept)]
+    assert len(first) == count
+    assert set(rows) == {(METHOD, f"campo_{index}") for index in kept}
+    assert all(
+        row.field_value == f"novo {name.removeprefix('campo_')}" for (_, name), row in rows.items()
+    )
+    assert all(row.id == first[key].id for key, row in rows.items())
@@ -0,0 +1,225 @@
+import asyncio
+import uuid
+from collections.abc import Iterator
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import core.principal_cache
+from api.dependencies import get_current_user
+from core.principal_cache import PrincipalCache, principal_cache
+from core.security import create_access_token
+from models.user import User
+
+
+class Fetch:
+    """`fetch` do cache que conta as idas ao banco"""
+
+    def __init__(self, user: User | None) -> None:
+        self.user = user
+        self.calls = 0
+
+    async def __call__(self) -> User | None:
+        self.calls += 1
+        return self.user
+
+
+def _user(**flags: bool) -> User:
+    return User(id=uuid.uuid4(), email="cliente@example.com", hashed_password="hash", **flags)
+
+
+async def test_local_cache_expires_after_its_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(core.principal_cache.time, "monotonic", lambda: now)
+    cache = PrincipalCache(ttl_seconds=60, local_ttl_seconds=5, max_size=10)
+    user = _user(is_admin=True)
+    fetch = Fetch(user)
+
+    await cache.load(user.id, fetch)
+    cached = await cache.load(user.id, fetch)
+    assert fetch.calls == 1
+    assert (cached.id, cached.is_admin, cached.hashed_password) == (user.id, True, "")  # type: ignore
+
+    now += 5
+    await cache.load(user.id, fetch)
+    assert fetch.calls == 2
+
+
+async def test_disabled_cache_always_fetches() -> None:
+    cache = PrincipalCache(ttl_seconds=0, local_ttl_seconds=5, max_size=10)
+    user = _user()
+    fetch = Fetch(user)
+    await cache.load(user.id, fetch)
+    await cache.load(user.id, fetch)
+    assert fetch.calls == 2
+
+
+async def test_invalidate_drops_the_local_entry() -> None:
+    cache = PrincipalCache(ttl_seconds=60, local_ttl_seconds=5, max_size=10)
+    user = _user()
+    fetch = Fetch(user)
+    await cache.load(user.id, fetch)
+    cache.invalidate({user.id})
+    await cache.load(user.id, fetch)
+    assert fetch.calls == 2
+
+
+async def test_load_racing_an_invalidation_is_not_cached() -> None:
+    cache = PrincipalCache(ttl_seconds=60, local_ttl_seconds=5, max_size=10)
+    user = _user()
+
+    async def fetch_then_commit_elsewhere() -> User:
+        cache.invalidate({user.id})  # commit de outra request durante a leitura
+        return user
+
+    await cache.load(user.id, fetch_then_commit_elsewhere)
+    fetch = Fetch(user)
+    await cache.load(user.id, fetch)
+    assert fetch.calls == 1
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> fakeredis.FakeServer:
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        core.principal_cache.aioredis,
+        "from_url",
+        lambda url: fakeredis.FakeAsyncRedis(server=server),
+    )
+    monkeypatch.setattr(
+        core.principal_cache.redis.Redis,
+        "from_url",
+        lambda url: fakeredis.FakeRedis(server=server),
+    )
+    return server
+
+
+def _worker() -> PrincipalCache:
+    return PrincipalCache(ttl_seconds=60, local_ttl_seconds=5, max_size=10, redis_url="redis://")
+
+
+async def test_redis_is_shared_between_workers(server: fakeredis.FakeServer) -> None:
+    user = _user(is_consultant=True)
+    fetch = Fetch(user)
+
+    await _worker().load(user.id, fetch)
+    cached = await _worker().load(user.id, fetch)
+
+    assert fetch.calls == 1
+    assert cached.is_consultant  # type: ignore
+
+
+async def test_invalidation_reaches_other_workers(server: fakeredis.FakeServer) -> None:
+    user = _user()
+    fetch = Fetch(user)
+    worker = _worker()
+    await worker.load(user.id, fetch)
+
+    worker.invalidate({user.id})
+    # Até a invalidação chegar ao Redis, o próprio worker lê do banco
+    await worker.load(user.id, fetch)
+    assert fetch.calls == 2
+    await asyncio.gather(*worker._tasks)
+
+    await _worker().load(user.id, fetch)
+    assert fetch.calls == 3
+
+
+def test_invalidation_without_event_loop(server: fakeredis.FakeServer) -> None:
+    user = _user()
+    fetch = Fetch(user)
+    asyncio.run(_worker().load(user.id, fetch))
+
+    _worker().invalidate({user.id})
+
+    asyncio.run(_worker().load(user.id, fetch))
+    assert fetch.calls == 2
+
+
+async def test_stale_snapshot_is_not_written_to_redis(server: fakeredis.FakeServer) -> None:
+    user = _user()
+    worker = _worker()
+
+    async def fetch_then_commit_elsewhere() -> User:
+        _worker().invalidate({user.id})
+        await asyncio.sleep(0.01)  # a invalidação em background chega ao Redis
+        return user
+
+    await worker.load(user.id, fetch_then_commit_elsewhere)
+    fetch = Fetch(user)
+    await _worker().load(user.id, fetch)
+    assert fetch.calls == 1  # o snapshot anterior ao commit não foi reaproveitado
+
+
+async def test_redis_outage_falls_back_to_the_database(server: fakeredis.FakeServer) -> None:
+    user = _user()
+    fetch = Fetch(user)
+    server.connected = False
+    assert await _worker().load(user.id, fetch) is user
+
+
+@pytest.fixture
+def invalidated(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[set[uuid.UUID]]]:
+    calls: list[set[uuid.UUID]] = []
+    monkeypatch.setattr(principal_cache, "invalidate", calls.append)
+    yield calls
+
+
+@pytest.fixture
+def saved_user(session: Session) -> User:
+    user = User(email="cliente@example.com", hashed_password="hash")
+    session.add(user)
+    session.commit()
+    return user
+
+
+def test_invalidates_after_commit_only(
+    session: Session, saved_user: User, invalidated: list[set[uuid.UUID]]
+) -> None:
+    saved_user.email = "novo@example.com"
+    session.commit()
+    assert invalidated == []  # não é flag de acesso
+
+    saved_user.is_admin = True
+    session.flush()
+    assert invalidated == []
+    session.commit()
+    assert invalidated == [{saved_user.id}]
+
+
+@pytest.mark.parametrize("finish", ["rollback", "close"])
+def test_uncommitted_changes_are_discarded(
+    session: Session, saved_user: User, invalidated: list[set[uuid.UUID]], finish: str
+) -> None:
+    saved_user.is_active = False
+    session.flush()
+    if finish == "rollback":
+        session.rollback()
+    else:
+        session.close()
+
+    # A próxima transação da mesma sessão não herda a mudança desfeita
+    session.add(User(email="outro@example.com", hashed_password=""))
+    session.commit()
+    assert invalidated == []
+
+
+async def test_get_current_user_rejects_inactive_users(async_engine: AsyncEngine) -> None:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        user = User(email="cliente@example.com", hashed_password="hash")
+        session.add(user)
+        await session.commit()
+        token = create_access_token(user.id)
+
+        assert (await get_current_user(token, session)).id == user.id
+
+        user.is_active = False
+        session.add(user)
+        await session.commit()
+        with pytest.raises(HTTPException) as error:
+            await get_current_user(token, session)
+        assert error.value.status_code == 401
@@ -0,0 +1,161 @@
+import time
+from collections.abc import Iterator
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from api import dependencies
+from core.rate_limit import (
+    InMemoryRateLimitBackend,
+    RateLimitBackend,
+    RateLimiter,
+    RedisRateLimitBackend,
+)
+from models.user import User
+
+WINDOW = 60
+LIMIT = 10
+
+
+class Clock:
+    """Relógio controlado pelos testes (time.time, usado também pelo TIME do fakeredis)"""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000 * WINDOW  # início de uma janela
+
+    def at(self, window: int, elapsed: float) -> None:
+        self.now = (1_000_000 + window) * WINDOW + elapsed
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def redis_server() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request: pytest.FixtureRequest, redis_server: fakeredis.FakeServer) -> RateLimitBackend:
+    if request.param == "memory":
+        return InMemoryRateLimitBackend()
+    return RedisRateLimitBackend(fakeredis.FakeAsyncRedis(server=redis_server))
+
+
+async def _hits(backend: RateLimitBackend, count: int, key: str = "chat:u1") -> list[bool]:
+    return [(await backend.hit(key, LIMIT, WINDOW)).allowed for _ in range(count)]
+
+
+async def test_allows_up_to_the_limit(clock: Clock, backend: RateLimitBackend) -> None:
+    assert await _hits(backend, LIMIT + 2) == [True] * LIMIT + [False, False]
+    # Outro usuário tem o próprio contador
+    assert await _hits(backend, 1, key="chat:u2") == [True]
+
+
+async def test_previous_window_decays_across_the_boundary(
+    clock: Clock, backend: RateLimitBackend
+) -> None:
+    assert all(await _hits(backend, LIMIT))
+
+    # Início da próxima janela: a anterior ainda pesa por inteiro
+    clock.at(1, 0)
+    assert await _hits(backend, 1) == [False]
+
+    # Meia janela depois ela pesa metade: cabem mais 5 (5 + 4 < 10, 5 + 5 não)
+    clock.at(1, WINDOW / 2)
+    assert await _hits(backend, 6) == [True] * 5 + [False]
+
+    # Duas janelas sem requests: tudo zerado
+    clock.at(3, 0)
+    assert await _hits(backend, LIMIT + 1) == [True] * LIMIT + [False]
+
+
+async def test_retry_after_when_current_window_is_full(
+    clock: Clock, backend: RateLimitBackend
+) -> None:
+    await _hits(backend, LIMIT)
+    clock.at(0, 15)
+    result = await backend.hit("chat:u1", LIMIT, WINDOW)
+    # Só na próxima janela, quando a atual passa a pesar (60 - e) / 60 < 1
+    assert not result.allowed
+    assert result.retry_after == pytest.approx(45, abs=0.01)
+
+
+async def test_retry_after_while_previous_window_decays(
+    clock: Clock, backend: RateLimitBackend
+) -> None:
+    clock.at(0, 50)
+    await _hits(backend, LIMIT)
+    clock.at(1, 10)
+    # 10 * 50/60 + 0 e + 1 cabem; com 2 na atual passa do limite
+    assert await _hits(backend, 2) == [True, True]
+    result = await backend.hit("chat:u1", LIMIT, WINDOW)
+    assert not result.allowed
+    # 10 * (50 - t) / 60 + 2 < 10  =>  t > 2
+    assert result.retry_after == pytest.approx(2, abs=0.01)
+
+    clock.at(1, 12.5)
+    assert await _hits(backend, 1) == [True]
+
+
+async def test_redis_script_touches_only_its_key(
+    clock: Clock, redis_server: fakeredis.FakeServer
+) -> None:
+    client = fakeredis.FakeAsyncRedis(server=redis_server)
+    backend = RedisRateLimitBackend(client)
+    await backend.hit("chat:u1", LIMIT, WINDOW)
+    assert await client.keys() == [b"rl:chat:u1"]
+    assert await client.ttl("rl:chat:u1") == 2 * WINDOW
+
+
+async def test_redis_failure_falls_back_to_memory(
+    clock: Clock, redis_server: fakeredis.FakeServer
+) -> None:
+    backend = RedisRateLimitBackend(fakeredis.FakeAsyncRedis(server=redis_server))
+    redis_server.connected = False
+    assert await _hits(backend, LIMIT + 1) == [True] * LIMIT + [False]
+
+
+async def test_per_role_limits(clock: Clock) -> None:
+    limiter = RateLimiter(
+        InMemoryRateLimitBackend(),
+        limits={"chat": {"client": 2, "admin": 4, "default": 3}},
+        window_seconds=WINDOW,
+    )
+
+    async def allowed(role: str, user_id: str, count: int, scope: str = "chat") -> int:
+        return sum([(await limiter.hit(scope, role, user_id)).allowed for _ in range(count)])
+
+    assert await allowed("client", "c", 10) == 2
+    assert await allowed("admin", "a", 10) == 4
+    # Papel sem limite próprio usa o "default"
+    assert await allowed("consultant", "k", 10) == 3
+    # Escopo sem configuração não é limitado
+    assert await allowed("client", "c", 10, scope="upload") == 10
+
+
+@pytest.fixture
+def chat_limiter(monkeypatch: pytest.MonkeyPatch) -> Iterator[RateLimiter]:
+    limiter = RateLimiter(InMemoryRateLimitBackend(), {"llm_chat": {"default": 1}}, WINDOW)
+    monkeypatch.setattr(dependencies, "rate_limiter", limiter)
+    yield limiter
+
+
+async def test_dependency_sends_retry_after(clock: Clock, chat_limiter: RateLimiter) -> None:
+    user = User(email="cliente@example.com", hashed_password="")
+    check = dependencies.rate_limit("llm_chat")
+
+    clock.at(0, 20)
+    await check(user)
+    with pytest.raises(HTTPException) as error:
+        await check(user)
+    assert error.value.status_code == 429
+    assert error.value.headers == {"Retry-After": "40"}
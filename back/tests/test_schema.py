@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+import core.schema
+from core.schema import SchemaOutOfDateError, expected_revisions, verify_schema
+
+
+def test_expected_revisions_are_the_alembic_heads() -> None:
+    heads = expected_revisions()
+    # Histórico linear: um único head, lido dos arquivos de migração
+    assert len(heads) == 1
+    (head,) = heads
+    assert any(
+        path.name.startswith(head) for path in (core.schema.ALEMBIC_DIR / "versions").iterdir()
+    )
+
+
+@pytest.fixture
+async def database(async_engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch) -> AsyncEngine:
+    monkeypatch.setattr(core.schema, "async_engine", async_engine)
+    async with async_engine.begin() as connection:
+        await connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+    return async_engine
+
+
+async def _set_revisions(engine: AsyncEngine, *revisions: str) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(text("DELETE FROM alembic_version"))
+        for revision in revisions:
+            await connection.execute(
+                text("INSERT INTO alembic_version VALUES (:revision)"), {"revision": revision}
+            )
+
+
+async def test_database_at_head(database: AsyncEngine) -> None:
+    await _set_revisions(database, *expected_revisions())
+    await verify_schema()
+
+
+@pytest.mark.parametrize("revisions", [(), ("0000000000",), (*expected_revisions(), "outro")])
+async def test_database_at_another_revision(
+    database: AsyncEngine, revisions: tuple[str, ...]
+) -> None:
+    await _set_revisions(database, *revisions)
+    with pytest.raises(SchemaOutOfDateError, match="alembic upgrade head"):
+        await verify_schema()
@@ -0,0 +1,75 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from core.sse import SSE_HEARTBEAT, format_sse, relay_stream
+
+
+def test_format_sse() -> None:
+    assert format_sse("oi") == "data: oi\n\n"
+    assert format_sse('{"a": 1}', event_id=3, event="delta") == (
+        'id: 3\nevent: delta\ndata: {"a": 1}\n\n'
+    )
+    assert format_sse("", event_id=0) == "id: 0\ndata: \n\n"
+
+
+def test_format_sse_splits_lines() -> None:
+    # Uma quebra de linha crua encerraria o campo data (ou o evento, se dupla)
+    assert format_sse("a\n\nb") == "data: a\ndata: \ndata: b\n\n"
+
+
+async def _items(*items: str, delay: float = 0.0) -> AsyncIterator[str]:
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
+
+
+async def test_relay_passes_items_through() -> None:
+    relayed = [item async for item in relay_stream(_items("a", "b", "c"))]
+    assert relayed == ["a", "b", "c"]
+
+
+async def test_relay_sends_heartbeats_while_idle() -> None:
+    stream = relay_stream(_items("a", delay=0.05), heartbeat_interval=0.01, poll_interval=0.005)
+    relayed = [item async for item in stream]
+
+    assert relayed[-1] == "a"
+    assert SSE_HEARTBEAT in relayed
+
+
+async def test_relay_propagates_producer_errors() -> None:
+    async def failing() -> AsyncIterator[str]:
+        yield "a"
+        raise RuntimeError("falhou")
+
+    relayed = []
+    with pytest.raises(RuntimeError, match="falhou"):
+        async for item in relay_stream(failing()):
+            relayed.append(item)
+    assert relayed == ["a"]
+
+
+async def test_relay_cancels_producer_on_disconnect() -> None:
+    cleaned_up = asyncio.Event()
+
+    async def endless() -> AsyncIterator[str]:
+        try:
+            while True:
+                await asyncio.sleep(0.001)
+                yield "x"
+        finally:
+            cleaned_up.set()
+
+    async def is_disconnected() -> bool:
+        return True
+
+    relayed = [
+        item
+        async for item in relay_stream(
+            endless(), is_disconnected=is_disconnected, poll_interval=0.01
+        )
+    ]
+
+    assert cleaned_up.is_set()
+    assert len(relayed) < 50
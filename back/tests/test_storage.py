@@ -0,0 +1,102 @@
+import io
+from collections.abc import Iterator
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+import pytest
+import requests
+from moto import mock_aws
+
+from core.storage import InMemoryStorage, LocalStorage, S3Storage, StorageBackend
+
+BUCKET = "w1-test"
+CONTENT = bytes(range(256)) * 1000  # 256 KB, vários blocos
+
+
+@pytest.fixture
+def s3_client() -> Iterator[object]:
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture(params=["memory", "local", "s3"])
+def storage(request: pytest.FixtureRequest, tmp_path: Path) -> StorageBackend:
+    if request.param == "memory":
+        return InMemoryStorage()
+    if request.param == "local":
+        return LocalStorage(str(tmp_path))
+    return S3Storage(BUCKET, prefix="uploads/", client=request.getfixturevalue("s3_client"))
+
+
+def test_put_then_read_in_chunks(storage: StorageBackend) -> None:
+    storage.put("blobs/ab/cd/abcd", io.BytesIO(CONTENT), content_type="application/pdf")
+
+    assert storage.exists("blobs/ab/cd/abcd")
+    chunks = list(storage.iter_chunks("blobs/ab/cd/abcd", chunk_size=64 * 1024))
+    assert b"".join(chunks) == CONTENT
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 64 * 1024 for chunk in chunks)
+
+
+def test_put_replaces_existing_content(storage: StorageBackend) -> None:
+    storage.put("doc", io.BytesIO(b"antigo"))
+    storage.put("doc", io.BytesIO(b"novo"))
+    assert b"".join(storage.iter_chunks("doc")) == b"novo"
+
+
+def test_missing_key(storage: StorageBackend) -> None:
+    assert not storage.exists("nao/existe")
+    with pytest.raises(FileNotFoundError):
+        storage.iter_chunks("nao/existe")
+
+
+def test_delete_is_idempotent(storage: StorageBackend) -> None:
+    storage.put("doc", io.BytesIO(b"x"))
+    storage.delete("doc")
+    storage.delete("doc")
+    assert not storage.exists("doc")
+
+
+def test_presigned_url_only_for_s3(storage: StorageBackend) -> None:
+    storage.put("doc", io.BytesIO(b"x"))
+    url = storage.presigned_url("doc", filename="contrato.pdf", content_type="application/pdf")
+    assert (url is not None) == isinstance(storage, S3Storage)
+
+
+def test_local_storage_rejects_keys_outside_root(tmp_path: Path) -> None:
+    storage = LocalStorage(str(tmp_path / "uploads"))
+    with pytest.raises(ValueError):
+        storage.put("../fora", io.BytesIO(b"x"))
+
+
+def test_s3_uses_prefix_and_content_type(s3_client: object) -> None:
+    storage = S3Storage(BUCKET, prefix="uploads/", client=s3_client)
+    storage.put("blobs/doc", io.BytesIO(CONTENT), content_type="application/pdf")
+
+    head = s3_client.head_object(Bucket=BUCKET, Key="uploads/blobs/doc")  # type: ignore
+    assert head["ContentType"] == "application/pdf"
+    assert head["ContentLength"] == len(CONTENT)
+
+
+def test_s3_presigned_url_downloads_the_object(s3_client: object) -> None:
+    storage = S3Storage(BUCKET, prefix="uploads/", client=s3_client)
+    storage.put("blobs/doc", io.BytesIO(CONTENT))
+
+    url = storage.presigned_url(
+        "blobs/doc", filename="relatório.pdf", content_type="application/pdf", expires_in=60
+    )
+    assert url is not None
+    parsed = urlparse(url)
+    params = parse_qs(parsed.query)
+    assert parsed.path.endswith("/uploads/blobs/doc")
+    assert params["response-content-disposition"] == [
+        "attachment; filename*=UTF-8''relat%C3%B3rio.pdf"
+    ]
+
+    response = requests.get(url, timeout=5)
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["Content-Type"] == "application/pdf"
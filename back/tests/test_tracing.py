@@ -0,0 +1,74 @@
+import inspect
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+import core.tracing
+from core.tracing import traced_tool
+
+
+@pytest.fixture
+def exporter(monkeypatch: pytest.MonkeyPatch) -> InMemorySpanExporter:
+    """Spans gravados em memória (sem mexer no provider global)"""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(core.tracing, "tracer", provider.get_tracer("test"))
+    return exporter
+
+
+def test_request_span_is_named_by_the_route(
+    client: TestClient, exporter: InMemorySpanExporter
+) -> None:
+    document_id = uuid.uuid4()
+    assert client.get(f"/api/documents/{document_id}").status_code == 401
+
+    (span,) = exporter.get_finished_spans()
+    assert span.name == "GET /api/documents/{document_id}"
+    assert span.kind == trace.SpanKind.SERVER
+    assert span.attributes == {
+        "http.request.method": "GET",
+        "url.path": f"/api/documents/{document_id}",
+        "http.response.status_code": 401,
+        "http.route": "/api/documents/{document_id}",
+    }
+
+
+def test_unmatched_request_keeps_the_path(
+    client: TestClient, exporter: InMemorySpanExporter
+) -> None:
+    assert client.get("/nao-existe").status_code == 404
+
+    (span,) = exporter.get_finished_spans()
+    assert span.name == "GET /nao-existe"
+    assert "http.route" not in span.attributes  # type: ignore
+    assert span.attributes["http.response.status_code"] == 404  # type: ignore
+
+
+async def test_traced_tool(exporter: InMemorySpanExporter) -> None:
+    async def adicionar_imovel(ctx: object, tipo: str, localizacao: str) -> str:
+        """Adiciona um imóvel"""
+        return f"Imóvel adicionado: {tipo} em {localizacao}"
+
+    tool = traced_tool(adicionar_imovel)
+    # O agente monta o schema da tool a partir da assinatura e da docstring
+    assert tool.__name__ == "adicionar_imovel"
+    assert tool.__doc__ == "Adiciona um imóvel"
+    assert inspect.signature(tool) == inspect.signature(adicionar_imovel)
+
+    with core.tracing.tracer.start_as_current_span("chat.model_stream"):
+        result = await tool(None, "casa", "Recife")
+
+    tool_span, parent = exporter.get_finished_spans()
+    assert tool_span.name == "chat.tool adicionar_imovel"
+    assert tool_span.parent.span_id == parent.context.span_id  # type: ignore
+    # Sem os argumentos (dados pessoais): só o nome da tool e o tamanho do resultado
+    assert tool_span.attributes == {
+        "gen_ai.tool.name": "adicionar_imovel",
+        "chat.tool.result_length": len(result),
+    }
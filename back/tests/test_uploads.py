@@ -0,0 +1,44 @@
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from core.uploads import UploadTooLargeError, stage_upload
+
+CONTENT = os.urandom(200_000)
+
+
+def test_stage_upload_copies_in_chunks(tmp_path: Path) -> None:
+    staged = stage_upload(
+        io.BytesIO(CONTENT), str(tmp_path / "uploads"), 1_000_000, chunk_size=4096
+    )
+
+    assert staged.size == len(CONTENT)
+    assert staged.sha256 == hashlib.sha256(CONTENT).hexdigest()
+    assert Path(staged.path).parent == tmp_path / "uploads"
+    assert Path(staged.path).read_bytes() == CONTENT
+
+
+def test_stage_upload_accepts_exactly_max_size(tmp_path: Path) -> None:
+    staged = stage_upload(io.BytesIO(CONTENT), str(tmp_path), len(CONTENT))
+    assert staged.size == len(CONTENT)
+
+
+def test_stage_upload_aborts_when_too_large(tmp_path: Path) -> None:
+    source = io.BytesIO(CONTENT)
+
+    with pytest.raises(UploadTooLargeError) as error:
+        stage_upload(source, str(tmp_path), 10_000, chunk_size=4096)
+
+    assert error.value.max_size == 10_000
+    # Para no primeiro bloco acima do limite, sem ler o resto nem deixar arquivo parcial
+    assert source.tell() == 12_288
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stage_upload_empty_file(tmp_path: Path) -> None:
+    staged = stage_upload(io.BytesIO(b""), str(tmp_path), 10)
+    assert staged.size == 0
+    assert staged.sha256 == hashlib.sha256(b"").hexdigest()
@@ -24,6 +24,8 @@ export const sendMessageStream = async (
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          // Negotiates delta streaming: each chunk carries only the new text
+          Accept: 'text/event-stream',
           Authorization: `Bearer ${localStorage.getItem('auth_token')}`,
         },
         body: JSON.stringify(request),
@@ -41,16 +43,21 @@ export const sendMessageStream = async (
 
     const reader = response.body.getReader()
     const decoder = new TextDecoder()
+    let buffer = ''
+    let content = ''
 
     try {
       while (true) {
         const { done, value } = await reader.read()
         if (done) break
 
-        const chunk = decoder.decode(value)
-        const lines = chunk.split('\n')
+        buffer += decoder.decode(value, { stream: true })
+        const lines = buffer.split('\n')
+        // Keep the last (possibly incomplete) line for the next read
+        buffer = lines.pop() ?? ''
 
         for (const line of lines) {
+          // Ignores "id:", "event:" and heartbeat comment lines
           if (line.startsWith('data: ')) {
             try {
               const jsonStr = line.slice(6) // Remove "data: "
@@ -58,12 +65,23 @@ export const sendMessageStream = async (
                 const data: StreamMessageChunk = JSON.parse(jsonStr)
 
                 switch (data.type) {
+                  case 'delta':
+                    content += data.content ?? ''
+                    if (callbacks.onMessage) {
+                      callbacks.onMessage(content)
+                    }
+                    break
+
                   case 'message':
-                    if (data.content && callbacks.onMessage) {
-                      callbacks.onMessage(data.content)
+                    content = data.content ?? ''
+                    if (content && callbacks.onMessage) {
+                      callbacks.onMessage(content)
                     }
                     break
 
+                  case 'structured_data':
+                    break
+
                   case 'complete':
                     if (callbacks.onComplete) {
                       callbacks.onComplete(data.content)
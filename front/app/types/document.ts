@@ -1,6 +1,12 @@
 import type { UUID } from 'crypto'
 
-export type DocumentStatus = 'uploaded' | 'validated' | 'invalid' | 'pending_review'
+export type DocumentStatus =
+  | 'uploaded'
+  | 'processing'
+  | 'pending_review'
+  | 'ocr_failed'
+  | 'validated'
+  | 'invalid'
 
 export interface DocumentRequirement {
   id: UUID
@@ -70,6 +70,7 @@ export interface ChatMessage {
   id: string
   sender_type: 'user' | 'llm' | 'system' | 'consultant'
   content: string
+  truncated?: boolean
   created_at: string
 }
 
@@ -82,12 +83,13 @@ export interface ChatResetRequest extends Record<string, unknown> {
   step_id: number
 }
 
-export type StreamMessageChunkType = 'message' | 'complete'
+export type StreamMessageChunkType = 'message' | 'delta' | 'structured_data' | 'complete'
 
 export interface StreamMessageChunk {
   type: StreamMessageChunkType
   content?: string
   data?: Record<string, unknown>
+  seq?: number
 }
 
 export interface StreamCallbacks {